@@ -0,0 +1,65 @@
+"""Composite tour filter indexes and normalized country column
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:00:00
+
+Databases created by ``Base.metadata.create_all`` before this revision
+already contain the ``tours`` and ``bookings`` tables, so this revision
+starts from that schema.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("tours") as batch_op:
+        batch_op.add_column(sa.Column("country_normalized", sa.String(100), nullable=True))
+
+    # Backfill in Python: SQLite lower() only folds ASCII characters
+    conn = op.get_bind()
+    tours = sa.table(
+        "tours",
+        sa.column("id", sa.Integer),
+        sa.column("country", sa.String),
+        sa.column("country_normalized", sa.String),
+    )
+    rows = conn.execute(sa.select(tours.c.id, tours.c.country)).fetchall()
+    for tour_id, country in rows:
+        conn.execute(
+            tours.update()
+            .where(tours.c.id == tour_id)
+            .values(country_normalized=country.strip().lower())
+        )
+
+    with op.batch_alter_table("tours") as batch_op:
+        batch_op.alter_column("country_normalized", existing_type=sa.String(100), nullable=False)
+        batch_op.drop_index("ix_tours_start_date")
+        batch_op.create_index("ix_tours_created_at", ["created_at"])
+        batch_op.create_index(
+            "ix_tours_country_norm_created_at", ["country_normalized", "created_at"]
+        )
+        batch_op.create_index(
+            "ix_tours_country_norm_price_dates",
+            ["country_normalized", "price", "start_date", "end_date"],
+        )
+        batch_op.create_index("ix_tours_start_date_end_date", ["start_date", "end_date"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("tours") as batch_op:
+        batch_op.drop_index("ix_tours_start_date_end_date")
+        batch_op.drop_index("ix_tours_country_norm_price_dates")
+        batch_op.drop_index("ix_tours_country_norm_created_at")
+        batch_op.drop_index("ix_tours_created_at")
+        batch_op.create_index("ix_tours_start_date", ["start_date"])
+        batch_op.drop_column("country_normalized")
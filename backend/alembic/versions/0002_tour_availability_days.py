@@ -0,0 +1,69 @@
+"""Day-bucketed tour availability table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 11:00:00
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _as_datetime(value):
+    # SQLite returns DateTime columns as strings in raw selects
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def upgrade() -> None:
+    availability = op.create_table(
+        "tour_availability_days",
+        sa.Column("tour_id", sa.Integer(), sa.ForeignKey("tours.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("country_normalized", sa.String(100), nullable=False),
+        sa.Column("available_slots", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_tour_availability_days_country_day",
+        "tour_availability_days",
+        ["country_normalized", "day"],
+    )
+    op.create_index("ix_tour_availability_days_day", "tour_availability_days", ["day"])
+
+    # Backfill from existing tours
+    conn = op.get_bind()
+    tours = conn.execute(
+        sa.text(
+            "SELECT id, country_normalized, available_slots, start_date, end_date FROM tours"
+        )
+    ).fetchall()
+    rows = []
+    for tour_id, country, slots, start, end in tours:
+        first = _as_datetime(start).date()
+        last = _as_datetime(end).date()
+        for i in range((last - first).days + 1):
+            rows.append(
+                {
+                    "tour_id": tour_id,
+                    "day": first + timedelta(days=i),
+                    "country_normalized": country,
+                    "available_slots": slots,
+                }
+            )
+    if rows:
+        op.bulk_insert(availability, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tour_availability_days_day", table_name="tour_availability_days")
+    op.drop_index("ix_tour_availability_days_country_day", table_name="tour_availability_days")
+    op.drop_table("tour_availability_days")
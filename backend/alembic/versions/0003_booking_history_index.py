@@ -0,0 +1,32 @@
+"""Composite booking history index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The composite index also serves plain email lookups
+    op.drop_index("ix_bookings_customer_email", table_name="bookings")
+    op.create_index(
+        "ix_bookings_customer_email_created_at",
+        "bookings",
+        ["customer_email", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_customer_email_created_at", table_name="bookings")
+    op.create_index("ix_bookings_customer_email", "bookings", ["customer_email"])
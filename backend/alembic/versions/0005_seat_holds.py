@@ -0,0 +1,47 @@
+"""Seat holds
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "seat_holds",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tour_id", sa.Integer(), sa.ForeignKey("tours.id"), nullable=False),
+        sa.Column("number_of_people", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_seat_holds_id", "seat_holds", ["id"])
+    op.create_index("ix_seat_holds_tour_id", "seat_holds", ["tour_id"])
+    op.create_index(
+        "ix_seat_holds_active_expires_at",
+        "seat_holds",
+        ["expires_at"],
+        sqlite_where=sa.text("status = 'active'"),
+        postgresql_where=sa.text("status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_seat_holds_active_expires_at", table_name="seat_holds")
+    op.drop_index("ix_seat_holds_tour_id", table_name="seat_holds")
+    op.drop_index("ix_seat_holds_id", table_name="seat_holds")
+    op.drop_table("seat_holds")
@@ -0,0 +1,37 @@
+"""Sharded slot counters for hot tours
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("tours") as batch_op:
+        batch_op.add_column(
+            sa.Column("slot_shards", sa.Integer(), nullable=False, server_default="0")
+        )
+    op.create_table(
+        "tour_slot_shards",
+        sa.Column("tour_id", sa.Integer(), sa.ForeignKey("tours.id"), primary_key=True),
+        sa.Column("shard_no", sa.Integer(), primary_key=True),
+        sa.Column("available_slots", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tour_slot_shards")
+    with op.batch_alter_table("tours") as batch_op:
+        batch_op.drop_column("slot_shards")
@@ -0,0 +1,45 @@
+"""Booking revenue rollups per day/country and per tour
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("country_normalized", sa.String(100), primary_key=True),
+        sa.Column("country", sa.String(100), nullable=False),
+        sa.Column("bookings", sa.Integer(), nullable=False),
+        sa.Column("people", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "tour_booking_stats",
+        sa.Column("tour_id", sa.Integer(), sa.ForeignKey("tours.id"), primary_key=True),
+        sa.Column("bookings", sa.Integer(), nullable=False),
+        sa.Column("people", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_tour_booking_stats_people", "tour_booking_stats", ["people"])
+    # Backfill with: python rebuild_analytics.py
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tour_booking_stats_people", table_name="tour_booking_stats")
+    op.drop_table("tour_booking_stats")
+    op.drop_table("booking_daily_stats")
@@ -0,0 +1,55 @@
+"""Interval-friendly indexes for tour date filters
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 17:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # created_at lets date-filtered pages be chosen from the index alone
+    op.drop_index("ix_tours_start_date_end_date", table_name="tours")
+    op.create_index(
+        "ix_tours_dates_created_at", "tours", ["start_date", "end_date", "created_at"]
+    )
+    op.create_index(
+        "ix_tours_country_norm_dates_created_at",
+        "tours",
+        ["country_normalized", "start_date", "end_date", "created_at"],
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        # Longest tour span in one lookup: bounds overlap range scans
+        op.execute(
+            "CREATE INDEX ix_tours_span_days ON tours "
+            "(julianday(end_date) - julianday(start_date))"
+        )
+    elif dialect == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_tours_period_gist ON tours "
+            "USING gist (tsrange(start_date, end_date, '[]'))"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute("DROP INDEX ix_tours_span_days")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX ix_tours_period_gist")
+
+    op.drop_index("ix_tours_country_norm_dates_created_at", table_name="tours")
+    op.drop_index("ix_tours_dates_created_at", table_name="tours")
+    op.create_index("ix_tours_start_date_end_date", "tours", ["start_date", "end_date"])
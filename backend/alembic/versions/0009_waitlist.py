@@ -0,0 +1,49 @@
+"""Waitlist for sold-out tours
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tour_id", sa.Integer(), sa.ForeignKey("tours.id"), nullable=False),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("customer_email", sa.String(100), nullable=False),
+        sa.Column("customer_phone", sa.String(20), nullable=False),
+        sa.Column("number_of_people", sa.Integer(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("promoted_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_waitlist_entries_id", "waitlist_entries", ["id"])
+    op.create_index(
+        "ix_waitlist_entries_waiting_tour_id",
+        "waitlist_entries",
+        ["tour_id", "id"],
+        sqlite_where=sa.text("status = 'waiting'"),
+        postgresql_where=sa.text("status = 'waiting'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_waitlist_entries_waiting_tour_id", table_name="waitlist_entries")
+    op.drop_index("ix_waitlist_entries_id", table_name="waitlist_entries")
+    op.drop_table("waitlist_entries")
@@ -0,0 +1,32 @@
+"""Tour version column for optimistic concurrency
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 21:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Plain ADD COLUMN: a batch table rebuild would drop the expression
+    # index ix_tours_span_days, which SQLite reflection does not see
+    op.add_column(
+        "tours",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    # Plain DROP COLUMN (SQLite >= 3.35) for the same reason
+    op.drop_column("tours", "version")
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 
-from app.api.v1 import tours, bookings, chat
+from app.api.v1 import tours, bookings, holds, chat, analytics, waitlist
 
 api_router = APIRouter()
 
 api_router.include_router(tours.router, prefix="/tours", tags=["tours"])
 api_router.include_router(bookings.router, prefix="/bookings", tags=["bookings"])
+api_router.include_router(holds.router, prefix="/holds", tags=["holds"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(waitlist.router, prefix="/waitlist", tags=["waitlist"])
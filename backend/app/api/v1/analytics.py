@@ -0,0 +1,73 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.crud import analytics_crud
+from app.schemas.tour import AnalyticsResponse, CountryRevenue, RevenueTotals
+
+router = APIRouter()
+
+
+@router.get("", response_model=AnalyticsResponse)
+async def get_analytics(
+    start_date: Optional[date] = Query(None, description="First day (YYYY-MM-DD), default: 29 days before end_date"),
+    end_date: Optional[date] = Query(None, description="Last day (YYYY-MM-DD), default: today (UTC)"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+    tours_limit: int = Query(10, ge=0, le=100, description="Most booked tours to include"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get revenue, booking volume and occupancy for dashboards.
+
+    Answered from rollup tables maintained on every confirmed booking:
+    - daily: bookings, people and revenue per day and country (volume trend)
+    - countries / totals: the same summed over the window
+    - tours: most booked tours with occupancy (max_people - available_slots)
+    """
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=29)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days + 1 > settings.analytics_max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date window must not exceed {settings.analytics_max_days} days",
+        )
+
+    daily = await analytics_crud.get_daily(
+        db=db, start_date=start_date, end_date=end_date, country=country
+    )
+    tours = await analytics_crud.get_tour_occupancy(db=db, limit=tours_limit, country=country)
+
+    totals = RevenueTotals()
+    countries: Dict[str, CountryRevenue] = {}
+    for row in daily:
+        by_country = countries.setdefault(
+            row.country_normalized, CountryRevenue(country=row.country)
+        )
+        for bucket in (totals, by_country):
+            bucket.bookings += row.bookings
+            bucket.people += row.people
+            bucket.revenue += row.revenue
+
+    return AnalyticsResponse(
+        start_date=start_date,
+        end_date=end_date,
+        country=country,
+        totals=totals,
+        countries=sorted(countries.values(), key=lambda c: c.revenue, reverse=True),
+        daily=[
+            {
+                "date": row.day,
+                "country": row.country,
+                "bookings": row.bookings,
+                "people": row.people,
+                "revenue": row.revenue,
+            }
+            for row in daily
+        ],
+        tours=tours,
+    )
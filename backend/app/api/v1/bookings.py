@@ -1,29 +1,156 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.crud import booking_crud
-from app.schemas.tour import BookingCreate, BookingResponse
+from app.export import export_response
+from app.crud import booking_crud, idempotency_crud
+from app.crud.idempotency import hash_request
+from app.models.idempotency import IdempotencyKey
+from app.schemas.tour import (
+    BookingCreate,
+    BookingResponse,
+    BookingListResponse,
+    BookingBulkCancel,
+    BookingBulkCancelResponse,
+)
 
 router = APIRouter()
 
 
+def _replay(record: IdempotencyKey, request_hash: str) -> JSONResponse:
+    """Return the stored response of an idempotent request."""
+    if record.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response_body),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
 @router.post("/", response_model=BookingResponse, status_code=201)
 async def create_booking(
     booking_data: BookingCreate,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Client-generated key; retries with the same key return the original booking",
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new booking.
 
     This endpoint creates a booking without real payment processing.
+    With an `Idempotency-Key` header, a repeated request returns the stored
+    response without creating another booking or touching the tour.
     """
+    request_hash = None
+    if idempotency_key:
+        request_hash = hash_request(booking_data.model_dump(mode="json"))
+        record = await idempotency_crud.get(db, idempotency_key)
+        if record:
+            return _replay(record, request_hash)
+
     try:
-        booking = await booking_crud.create_booking(db=db, booking_data=booking_data)
+        booking = await booking_crud.create_booking(
+            db=db,
+            booking_data=booking_data,
+            idempotency_key=idempotency_key,
+            request_hash=request_hash,
+        )
         return booking
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        # A concurrent request with the same key committed first
+        await db.rollback()
+        if not idempotency_key:
+            raise
+        record = await idempotency_crud.get(db, idempotency_key)
+        if not record:
+            raise
+        return _replay(record, request_hash)
+
+
+@router.get("/export")
+async def export_bookings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    status: Optional[str] = Query(None, description="Filter by status (confirmed, cancelled)"),
+    tour_id: Optional[int] = Query(None, description="Filter by tour"),
+    date_from: Optional[datetime] = Query(None, description="Created at or after (ISO format)"),
+    date_to: Optional[datetime] = Query(None, description="Created before (ISO format)"),
+):
+    """
+    Export all bookings matching the filters as NDJSON or CSV.
+
+    Rows are streamed from a server-side cursor in id order, so memory use
+    does not depend on the number of bookings and the download starts at once.
+    """
+    query = booking_crud.build_export_query(
+        status=status, tour_id=tour_id, date_from=date_from, date_to=date_to
+    )
+    return export_response(query, format, "bookings")
+
+
+@router.post("/cancel", response_model=BookingBulkCancelResponse)
+async def cancel_tour_bookings(
+    cancel_data: BookingBulkCancel,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cancel all confirmed bookings of a tour, or the listed ones.
+
+    Runs in a single transaction however many bookings there are; their
+    slots return to the tour and waitlisted parties are promoted into them.
+    Bookings that are already cancelled or belong to another tour are skipped.
+    """
+    booking_ids, tour = await booking_crud.cancel_tour_bookings(
+        db=db, tour_id=cancel_data.tour_id, booking_ids=cancel_data.booking_ids
+    )
+
+    if not tour:
+        raise HTTPException(
+            status_code=404, detail=f"Tour with id {cancel_data.tour_id} not found"
+        )
+
+    return BookingBulkCancelResponse(
+        tour_id=tour.id,
+        cancelled=len(booking_ids),
+        booking_ids=booking_ids,
+        available_slots=tour.available_slots,
+    )
+
+
+@router.post("/{booking_id}/cancel", response_model=BookingResponse)
+async def cancel_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cancel a confirmed booking and return its slots to the tour.
+
+    Returns 409 if the booking is already cancelled.
+    """
+    try:
+        booking = await booking_crud.cancel_booking(db=db, booking_id=booking_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if not booking:
+        raise HTTPException(
+            status_code=404, detail=f"Booking with id {booking_id} not found"
+        )
+
+    return booking
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
@@ -42,11 +169,31 @@ async def get_booking(
     return booking
 
 
-@router.get("/", response_model=List[BookingResponse])
+@router.get("/", response_model=BookingListResponse)
 async def get_bookings_by_email(
     email: str = Query(..., description="Customer email address"),
+    status: Optional[str] = Query(None, description="Filter by status (confirmed, cancelled)"),
+    limit: int = Query(50, ge=1, le=200, description="Max bookings per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from previous page (next_cursor)"),
+    include_tour: bool = Query(False, description="Embed tour summary into each booking"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get all bookings by customer email."""
-    bookings = await booking_crud.get_bookings_by_email(db=db, email=email)
-    return bookings
+    """
+    Get bookings by customer email, newest first.
+
+    Uses cursor pagination: pass `next_cursor` from the response as `cursor`
+    to get the next page. `next_cursor` is null on the last page.
+    """
+    try:
+        bookings, next_cursor = await booking_crud.get_bookings_by_email(
+            db=db,
+            email=email,
+            status=status,
+            limit=limit,
+            cursor=cursor,
+            include_tour=include_tour,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BookingListResponse(bookings=bookings, next_cursor=next_cursor)
@@ -2,12 +2,14 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import sys
 import os
 from dotenv import load_dotenv
 import asyncio
 
+from app.metrics import format_labels, registry
+
 # Добавляем путь к chatbot в sys.path
 # Путь от backend/app/api/v1/chat.py к корню проекта, затем к chatbot
 backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -67,6 +69,9 @@ class ChatResponse(BaseModel):
     """Ответ чат-бота"""
     response: str = Field(..., description="Ответ чат-бота")
     session_id: str = Field(..., description="ID сессии")
+    usage: Optional[Dict[str, Any]] = Field(
+        None, description="Токены (в т.ч. из кэша префикса промпта) и задержка вызовов LLM"
+    )
 
 
 @router.post("/", response_model=ChatResponse)
@@ -84,7 +89,8 @@ async def chat(request: ChatRequest):
         response_text = result.get("output", "Не удалось получить ответ")
         return ChatResponse(
             response=response_text,
-            session_id=request.session_id or "default"
+            session_id=request.session_id or "default",
+            usage=result.get("usage")
         )
     except Exception as e:
         raise HTTPException(
@@ -106,3 +112,85 @@ async def clear_chat(session_id: Optional[str] = "default"):
             detail=f"Ошибка при очистке истории: {str(e)}"
         )
 
+
+@router.get("/stats", response_model=dict)
+async def chat_stats():
+    """Статистика чат-бота: токены LLM, шаги по уровням моделей и доля запросов без LLM"""
+    try:
+        agent = get_agent()
+        return {
+            "usage": agent.get_usage_stats(),
+            "models": agent.get_model_stats(),
+            "fast_path": agent.get_router_stats()
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Ошибка при получении статистики: {str(e)}"
+        )
+
+
+@router.get("/traces/{session_id}", response_model=list)
+async def chat_traces(session_id: str):
+    """Разбивка задержки по ходам сессии: время LLM, инструментов и остального кода агента"""
+    try:
+        agent = get_agent()
+        return agent.get_session_traces(session_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Ошибка при получении трасс: {str(e)}"
+        )
+
+
+def _collect_agent_traces() -> List[str]:
+    """Сводка трасс агента для /metrics (пусто, пока агент не инициализирован)"""
+    if _agent_instance is None:
+        return []
+    summary = _agent_instance.tracer.summary()
+
+    lines = [
+        "# HELP agent_turns_total Chat turns handled by the agent.",
+        "# TYPE agent_turns_total counter",
+    ]
+    for route, totals in sorted(summary["turns"].items()):
+        lines.append(f"agent_turns_total{format_labels(('route',), (route,))} {totals['count']}")
+    lines += [
+        "# HELP agent_turn_seconds_total Total chat turn latency in seconds.",
+        "# TYPE agent_turn_seconds_total counter",
+    ]
+    for route, totals in sorted(summary["turns"].items()):
+        lines.append(f"agent_turn_seconds_total{format_labels(('route',), (route,))} {totals['seconds']}")
+
+    spans = sorted(summary["spans"], key=lambda span: (span["kind"], span["name"]))
+    for metric, key, documentation in (
+        ("agent_spans_total", "count", "LLM and tool calls made by the agent."),
+        ("agent_span_seconds_total", "seconds", "Total duration of agent LLM and tool calls in seconds."),
+        ("agent_span_errors_total", "errors", "Agent LLM and tool calls that failed."),
+        ("agent_span_retries_total", "retries", "Retries of agent LLM calls."),
+    ):
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} counter"]
+        for span in spans:
+            labels = format_labels(("kind", "name"), (span["kind"], span["name"]))
+            lines.append(f"{metric}{labels} {span[key]}")
+
+    lines += [
+        "# HELP agent_llm_tokens_total Tokens used by agent LLM calls.",
+        "# TYPE agent_llm_tokens_total counter",
+    ]
+    for span in spans:
+        if span["kind"] != "llm":
+            continue
+        for token_type in ("prompt_tokens", "cached_prompt_tokens", "completion_tokens"):
+            labels = format_labels(("model", "type"), (span["name"], token_type.replace("_tokens", "")))
+            lines.append(f"agent_llm_tokens_total{labels} {span[token_type]}")
+
+    lines += [
+        "# HELP agent_max_iterations_total Turns stopped by the agent iteration limit.",
+        "# TYPE agent_max_iterations_total counter",
+        f"agent_max_iterations_total {summary['max_iterations_reached']}",
+    ]
+    return lines
+
+
+registry.register_collector(_collect_agent_traces)
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.crud import hold_crud
+from app.schemas.tour import HoldCreate, HoldConfirm, HoldResponse, BookingResponse
+
+router = APIRouter()
+
+
+@router.post("/", response_model=HoldResponse, status_code=201)
+async def create_hold(
+    hold_data: HoldCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Hold tour slots for a limited time.
+
+    Slots are taken from the tour immediately and returned automatically
+    if the hold is not confirmed before `expires_at`.
+    """
+    ttl_minutes = min(
+        hold_data.ttl_minutes or settings.hold_ttl_minutes,
+        settings.hold_max_ttl_minutes,
+    )
+    try:
+        return await hold_crud.create_hold(db=db, hold_data=hold_data, ttl_minutes=ttl_minutes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{hold_id}", response_model=HoldResponse)
+async def get_hold(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get hold details by ID."""
+    hold = await hold_crud.get_hold(db=db, hold_id=hold_id)
+
+    if not hold:
+        raise HTTPException(status_code=404, detail=f"Hold with id {hold_id} not found")
+
+    return hold
+
+
+@router.post("/{hold_id}/confirm", response_model=BookingResponse, status_code=201)
+async def confirm_hold(
+    hold_id: int,
+    confirm_data: HoldConfirm,
+    db: AsyncSession = Depends(get_db),
+):
+    """Confirm an active hold into a booking."""
+    try:
+        return await hold_crud.confirm_hold(db=db, hold_id=hold_id, confirm_data=confirm_data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("/{hold_id}", response_model=HoldResponse)
+async def release_hold(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Release an active hold and return its slots to the tour."""
+    hold = await hold_crud.release_hold(db=db, hold_id=hold_id)
+
+    if not hold:
+        raise HTTPException(
+            status_code=404, detail=f"Active hold with id {hold_id} not found"
+        )
+
+    return hold
@@ -1,18 +1,44 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import math
+import json
 
-from app.database import get_db
-from app.crud import tour_crud
-from app.schemas.tour import TourResponse, TourListResponse, FilterOptionsResponse
+from app.database import get_db, AsyncSessionLocal
+from app.pubsub import tour_events
+from app.config import settings
+from app.etag import conditional_response, tour_etag
+from app.export import export_response
+from app.listing_cache import listing_cache, make_key
+from app.similarity import similarity_index
+from app.crud import tour_crud, availability_crud, slot_crud
+from app.schemas.tour import (
+    TourResponse,
+    TourListResponse,
+    TourBatchResponse,
+    SimilarTour,
+    SimilarToursResponse,
+    FilterOptionsResponse,
+    AvailabilityCalendarResponse,
+    SlotShardsUpdate,
+    TourUpdate,
+    TourReprice,
+    TourRepriceResponse,
+)
 
 router = APIRouter()
 
 
+def _check_date_mode(date_mode: str, within_days: Optional[int]) -> None:
+    """Reject starts_within without a window length."""
+    if date_mode == "starts_within" and within_days is None:
+        raise HTTPException(status_code=400, detail="within_days is required for date_mode=starts_within")
+
+
 @router.get("/", response_model=TourListResponse)
 async def get_tours(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
     country: Optional[str] = Query(None, description="Filter by country"),
@@ -20,6 +46,14 @@ async def get_tours(
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date (ISO format)"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date (ISO format)"),
+    date_mode: str = Query(
+        "within",
+        pattern="^(within|overlaps|starts_within)$",
+        description="within, overlaps or starts_within",
+    ),
+    within_days: Optional[int] = Query(
+        None, ge=1, le=366, description="Days from start_date (default today) for starts_within"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -28,30 +62,33 @@ async def get_tours(
     Filters:
     - country: Search by country name (case-insensitive)
     - min_price, max_price: Price range filter
-    - start_date, end_date: Date range filter
-    """
-    skip = (page - 1) * page_size
+    - start_date, end_date: Date range filter, interpreted by date_mode:
+      - within (default): tour starts and ends inside the range
+      - overlaps: tour runs at any point of the range (either bound may be omitted)
+      - starts_within: tour starts within `within_days` days from start_date
+        (default: today, UTC); end_date still limits the tour end
 
-    tours, total = await tour_crud.get_tours(
-        db=db,
-        skip=skip,
-        limit=page_size,
+    Rendered pages are served from the listing cache until the next tour or
+    booking write. Responses carry an ETag; send it back in `If-None-Match`
+    to get `304 Not Modified` while the page is unchanged.
+    """
+    _check_date_mode(date_mode, within_days)
+    key = make_key(
+        page=page,
+        page_size=page_size,
         country=country,
         min_price=min_price,
         max_price=max_price,
         start_date=start_date,
         end_date=end_date,
+        date_mode=date_mode,
+        within_days=within_days,
     )
+    cached = await listing_cache.load(db, key)
 
-    total_pages = math.ceil(total / page_size) if total > 0 else 0
-
-    return TourListResponse(
-        tours=tours,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    response = Response(content=cached.body, media_type="application/json")
+    not_modified = conditional_response(request, response, cached.etag)
+    return not_modified if not_modified is not None else response
 
 
 @router.get("/filters", response_model=FilterOptionsResponse)
@@ -70,15 +107,300 @@ async def get_filter_options(
     return FilterOptionsResponse(**options)
 
 
+@router.get("/availability", response_model=AvailabilityCalendarResponse)
+async def get_availability(
+    start_date: date = Query(..., description="First day of the window (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Last day of the window (YYYY-MM-DD)"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+    min_slots: int = Query(1, ge=1, description="Minimum free slots per tour"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get per-day availability calendar.
+
+    For every day in the window returns tours running that day with
+    at least `min_slots` free slots, and the total of free slots.
+    Served from the precomputed day-bucketed availability table.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days + 1 > settings.availability_max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date window must not exceed {settings.availability_max_days} days",
+        )
+
+    days = await availability_crud.get_calendar(
+        db=db,
+        start_date=start_date,
+        end_date=end_date,
+        country=country,
+        min_slots=min_slots,
+    )
+
+    return AvailabilityCalendarResponse(
+        country=country,
+        start_date=start_date,
+        end_date=end_date,
+        days=days,
+    )
+
+
+@router.get("/export")
+async def export_tours(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    start_date: Optional[datetime] = Query(None, description="Filter by start date (ISO format)"),
+    end_date: Optional[datetime] = Query(None, description="Filter by end date (ISO format)"),
+    date_mode: str = Query(
+        "within",
+        pattern="^(within|overlaps|starts_within)$",
+        description="within, overlaps or starts_within",
+    ),
+    within_days: Optional[int] = Query(
+        None, ge=1, le=366, description="Days from start_date (default today) for starts_within"
+    ),
+):
+    """
+    Export all tours matching the list filters as NDJSON or CSV.
+
+    Rows are streamed from a server-side cursor in id order, so memory use
+    does not depend on the number of tours and the download starts at once.
+    """
+    _check_date_mode(date_mode, within_days)
+    query = tour_crud.build_export_query(
+        country=country,
+        min_price=min_price,
+        max_price=max_price,
+        start_date=start_date,
+        end_date=end_date,
+        date_mode=date_mode,
+        within_days=within_days,
+    )
+    return export_response(query, format, "tours")
+
+
+@router.post("/reprice", response_model=TourRepriceResponse)
+async def reprice_tours(
+    reprice: TourReprice,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Change prices of many tours at once.
+
+    Selects tours by the list filters (`country`, `min_price`, `max_price`,
+    `start_date`, `end_date`) and/or `tour_ids`, then applies `percent` to
+    all of them or the first matching of `rules`. Runs as a single UPDATE;
+    listing pages and the in-memory catalogue are refreshed once per call,
+    and every changed tour gets a new `version`.
+    """
+    updated = await tour_crud.reprice_tours(db=db, reprice=reprice)
+    return TourRepriceResponse(updated=updated)
+
+
+@router.get("/batch", response_model=TourBatchResponse)
+async def get_tours_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description="Comma-separated tour IDs"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get several tours by ID in one request.
+
+    Tours are returned in the order of `ids` (duplicates collapsed);
+    ids without a tour are listed in `missing_ids`. Supports ETag /
+    If-None-Match like the single-tour route.
+    """
+    try:
+        tour_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not tour_ids or len(tour_ids) > settings.tours_batch_max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {settings.tours_batch_max_ids} tour ids",
+        )
+
+    tours = await tour_crud.get_tours_by_ids(db=db, tour_ids=tour_ids)
+    found = {tour.id for tour in tours}
+    missing_ids = [tour_id for tour_id in tour_ids if tour_id not in found]
+
+    not_modified = conditional_response(request, response, tour_etag(tours, *missing_ids))
+    if not_modified is not None:
+        return not_modified
+
+    return TourBatchResponse(tours=tours, missing_ids=missing_ids)
+
+
+@router.get("/stream")
+async def stream_tour_updates(
+    ids: str = Query(..., description="Comma-separated tour IDs to watch"),
+):
+    """
+    Stream slot and price changes of tours as Server-Sent Events.
+
+    Sends the current state of every requested tour first, then an `update`
+    event whenever a booking or hold changes it. Replaces polling of
+    GET /tours/{tour_id}.
+    """
+    try:
+        tour_ids = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not tour_ids or len(tour_ids) > settings.stream_max_tours:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {settings.stream_max_tours} tour ids",
+        )
+
+    # Subscribe before the snapshot so no change is lost in between
+    subscription = tour_events.subscribe(tour_ids)
+    try:
+        async with AsyncSessionLocal() as db:
+            snapshot = await tour_crud.get_tour_states(db, tour_ids)
+    except Exception:
+        tour_events.unsubscribe(subscription)
+        raise
+
+    async def event_stream():
+        try:
+            for state in snapshot:
+                yield f"event: snapshot\ndata: {json.dumps(state, default=str)}\n\n"
+            while True:
+                pending = await subscription.get(timeout=settings.stream_keepalive_seconds)
+                if not pending:
+                    yield ": keepalive\n\n"
+                    continue
+                for message in pending.values():
+                    yield f"event: update\ndata: {message}\n\n"
+        finally:
+            tour_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{tour_id}", response_model=TourResponse)
 async def get_tour(
     tour_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get tour details by ID."""
+    """
+    Get tour details by ID.
+
+    Supports conditional GET via ETag / If-None-Match.
+    """
     tour = await tour_crud.get_tour(db=db, tour_id=tour_id)
 
+    if not tour:
+        raise HTTPException(status_code=404, detail=f"Tour with id {tour_id} not found")
+
+    not_modified = conditional_response(request, response, tour_etag([tour]))
+    if not_modified is not None:
+        return not_modified
+
+    return tour
+
+
+@router.patch("/{tour_id}", response_model=TourResponse)
+async def update_tour(
+    tour_id: int,
+    tour_data: TourUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Edit a tour.
+
+    Send the `version` from the tour you edited along with the changed
+    fields. Returns 409 if the tour was changed since (reload it and
+    retry), or if `max_people` would drop below the seats already taken.
+    Bookings are never blocked by an edit.
+    """
+    try:
+        tour = await tour_crud.update_tour(db=db, tour_id=tour_id, tour_data=tour_data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
     if not tour:
         raise HTTPException(status_code=404, detail=f"Tour with id {tour_id} not found")
 
     return tour
+
+
+@router.get("/{tour_id}/similar", response_model=SimilarToursResponse)
+async def get_similar_tours(
+    tour_id: int,
+    limit: int = Query(5, ge=1, le=settings.similar_tours_k, description="Max tours to return"),
+    only_available: bool = Query(True, description="Skip sold-out tours"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get tours similar to a tour (country, city, price, duration, dates, description).
+
+    Neighbours are precomputed for every tour, so the lookup does not depend
+    on the catalogue size; the returned tours are read in one query.
+    """
+    if not settings.similar_tours_enabled:
+        raise HTTPException(status_code=404, detail="Similar tours are disabled")
+    if not similarity_index.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Similar tours index is being built",
+            headers={"Retry-After": "5"},
+        )
+
+    if not similarity_index.contains(tour_id):
+        # Created by another worker since the last refresh
+        tour = await tour_crud.get_tour(db=db, tour_id=tour_id)
+        if not tour:
+            raise HTTPException(status_code=404, detail=f"Tour with id {tour_id} not found")
+        similarity_index.upsert_tour(tour)
+
+    neighbours = similarity_index.similar(tour_id)
+    scores = dict(neighbours)
+    tours = await tour_crud.get_tours_by_ids(db=db, tour_ids=list(scores))
+    if only_available:
+        tours = [tour for tour in tours if tour.available_slots > 0]
+
+    return SimilarToursResponse(
+        tour_id=tour_id,
+        tours=[
+            SimilarTour(**TourResponse.model_validate(tour).model_dump(), score=scores[tour.id])
+            for tour in tours[:limit]
+        ],
+    )
+
+
+@router.put("/{tour_id}/shards", response_model=TourResponse)
+async def set_slot_shards(
+    tour_id: int,
+    shards_data: SlotShardsUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Enable hot-tour mode by splitting free slots across counter shards.
+
+    Bookings then contend per shard instead of on the tour row.
+    `shards = 0` gathers the slots back into the tour. Off by default on
+    SQLite (see SLOT_SHARDS_ENABLED); gathering slots back is always allowed.
+    """
+    tour = await tour_crud.get_tour(db=db, tour_id=tour_id)
+
+    if not tour:
+        raise HTTPException(status_code=404, detail=f"Tour with id {tour_id} not found")
+
+    if shards_data.shards > 0 and not settings.slot_shards_allowed:
+        raise HTTPException(
+            status_code=409,
+            detail="Slot sharding is disabled (set SLOT_SHARDS_ENABLED=true to enable it)",
+        )
+
+    return await slot_crud.set_shards(db=db, tour=tour, shards=shards_data.shards)
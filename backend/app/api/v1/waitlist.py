@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.crud import tour_crud, waitlist_crud
+from app.schemas.tour import WaitlistCreate, WaitlistEntryResponse, WaitlistDemandResponse
+
+router = APIRouter()
+
+
+@router.post("/", response_model=WaitlistEntryResponse, status_code=201)
+async def join_waitlist(
+    entry_data: WaitlistCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Join the waitlist of a sold-out tour.
+
+    When slots free up (cancellations, released or expired holds), waiting
+    parties are booked automatically, strictly in arrival order: a party
+    that does not fit yet holds up the parties behind it.
+    Returns 422 if the party is larger than the tour, and 409 if the tour
+    still has enough slots to book directly.
+    """
+    tour = await tour_crud.get_tour(db=db, tour_id=entry_data.tour_id)
+    if not tour:
+        raise HTTPException(status_code=404, detail=f"Tour with id {entry_data.tour_id} not found")
+    if entry_data.number_of_people > tour.max_people:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Party of {entry_data.number_of_people} exceeds tour capacity of {tour.max_people}",
+        )
+
+    try:
+        entry = await waitlist_crud.create_entry(db=db, entry_data=entry_data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"Tour with id {entry_data.tour_id} not found")
+
+    return entry
+
+
+@router.get("/tours/{tour_id}", response_model=WaitlistDemandResponse)
+async def get_tour_waitlist(
+    tour_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the number of parties and people waiting for a tour."""
+    tour = await tour_crud.get_tour(db=db, tour_id=tour_id)
+
+    if not tour:
+        raise HTTPException(status_code=404, detail=f"Tour with id {tour_id} not found")
+
+    return await waitlist_crud.get_demand(db=db, tour=tour)
+
+
+@router.get("/{entry_id}", response_model=WaitlistEntryResponse)
+async def get_waitlist_entry(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get waitlist entry with its queue position, or the booking it was promoted to."""
+    entry = await waitlist_crud.get_entry(db=db, entry_id=entry_id)
+
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"Waitlist entry with id {entry_id} not found")
+
+    return entry
+
+
+@router.delete("/{entry_id}", response_model=WaitlistEntryResponse)
+async def leave_waitlist(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Leave the waitlist."""
+    entry = await waitlist_crud.cancel_entry(db=db, entry_id=entry_id)
+
+    if not entry:
+        raise HTTPException(
+            status_code=404, detail=f"Waiting entry with id {entry_id} not found"
+        )
+
+    return entry
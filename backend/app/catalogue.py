@@ -0,0 +1,277 @@
+"""In-process columnar snapshot of the tour catalogue.
+
+``TourCRUD.get_tours`` filters on a handful of scalar columns and sorts by
+``created_at``. When enabled, those columns are kept in NumPy arrays
+pre-sorted by ``created_at DESC`` so a filtered page is a few vectorized
+comparisons plus a slice; only the page rows are then loaded from SQL.
+
+The snapshot mirrors ``TourCRUD.build_filter_conditions`` exactly:
+datetimes are compared as naive values (tzinfo dropped, as SQLite does)
+and tours without ``created_at`` sort last.
+
+Writes in this process update the snapshot directly; writes made by other
+workers are picked up by :func:`app.tasks.run_index_refresh`, which
+reloads rows whose ``updated_at`` moved past the last seen watermark.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tour import Tour, normalize_country, starts_within_range
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the catalogue is optional
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+# Sort key for a missing created_at: after every real timestamp in DESC order
+_NO_CREATED_AT = -(2**62)
+
+_COLUMNS = (
+    Tour.id,
+    Tour.country_normalized,
+    Tour.price,
+    Tour.start_date,
+    Tour.end_date,
+    Tour.created_at,
+    Tour.available_slots,
+    Tour.updated_at,
+)
+
+
+def _micros(value: datetime) -> int:
+    """Naive microseconds since the epoch."""
+    delta = value.replace(tzinfo=None) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class TourCatalogue:
+    """Columnar copy of the tour filter columns, ordered by (created_at, id) DESC."""
+
+    def __init__(self) -> None:
+        self.ready = False
+        # Highest updated_at applied to the snapshot (refresh watermark)
+        self.watermark: Optional[datetime] = None
+        self._country_codes: Dict[str, int] = {}
+        self._reset()
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def _reset(self) -> None:
+        if np is None:
+            return
+        self.ids = np.empty(0, dtype=np.int64)
+        self.country = np.empty(0, dtype=np.int32)
+        self.price = np.empty(0, dtype=np.float64)
+        self.start = np.empty(0, dtype=np.int64)
+        self.end = np.empty(0, dtype=np.int64)
+        self.created = np.empty(0, dtype=np.int64)
+        self.slots = np.empty(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.ids) if self.ready else 0
+
+    def memory_bytes(self) -> int:
+        """Size of the column arrays."""
+        if not self.ready:
+            return 0
+        columns = (self.ids, self.country, self.price, self.start, self.end, self.created, self.slots)
+        return sum(column.nbytes for column in columns)
+
+    def _country_code(self, country: str) -> int:
+        code = self._country_codes.get(country)
+        if code is None:
+            code = self._country_codes[country] = len(self._country_codes)
+        return code
+
+    def _advance(self, updated_at: Optional[datetime]) -> None:
+        if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def build(self, rows: Iterable[tuple]) -> None:
+        """Replace the snapshot with ``rows`` (tuples in ``_COLUMNS`` order)."""
+        self._country_codes = {}
+        self.watermark = None
+        ids, country, price, start, end, created, slots = [], [], [], [], [], [], []
+        for row in rows:
+            ids.append(row[0])
+            country.append(self._country_code(row[1]))
+            price.append(row[2])
+            start.append(_micros(row[3]))
+            end.append(_micros(row[4]))
+            created.append(_micros(row[5]) if row[5] is not None else _NO_CREATED_AT)
+            slots.append(row[6])
+            self._advance(row[7])
+
+        ids = np.array(ids, dtype=np.int64)
+        created = np.array(created, dtype=np.int64)
+        order = np.lexsort((-ids, -created))
+        self.ids = ids[order]
+        self.country = np.array(country, dtype=np.int32)[order]
+        self.price = np.array(price, dtype=np.float64)[order]
+        self.start = np.array(start, dtype=np.int64)[order]
+        self.end = np.array(end, dtype=np.int64)[order]
+        self.created = created[order]
+        self.slots = np.array(slots, dtype=np.int32)[order]
+        self.ready = True
+
+    async def load(self, db: AsyncSession) -> int:
+        """Build the snapshot from the tours table. Returns the number of tours."""
+        result = await db.execute(select(*_COLUMNS))
+        self.build(result.all())
+        return len(self.ids)
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply tours changed since the watermark. Returns the number of rows applied."""
+        query = select(*_COLUMNS)
+        if self.watermark is not None:
+            # >= so rows sharing the watermark timestamp are not missed; upserts are idempotent
+            query = query.where(Tour.updated_at >= self.watermark)
+        result = await db.execute(query)
+        rows = result.all()
+        self._upsert_many(rows)
+        return len(rows)
+
+    def upsert_tour(self, tour: Tour) -> None:
+        """Insert or update one tour after it was committed."""
+        if self.ready:
+            self._upsert(tuple(getattr(tour, column.key) for column in _COLUMNS))
+
+    def _upsert(self, row: tuple) -> None:
+        tour_id = row[0]
+        created = _micros(row[5]) if row[5] is not None else _NO_CREATED_AT
+        hit = np.flatnonzero(self.ids == tour_id)
+        if len(hit) and self.created[hit[0]] == created:
+            i = hit[0]
+            self.country[i] = self._country_code(row[1])
+            self.price[i] = row[2]
+            self.start[i] = _micros(row[3])
+            self.end[i] = _micros(row[4])
+            self.slots[i] = row[6]
+        else:
+            if len(hit):
+                self._delete(hit[0])
+            # Position in (created DESC, id DESC) order; the negated key is ascending
+            key = -self.created
+            lo = np.searchsorted(key, -created, side="left")
+            hi = np.searchsorted(key, -created, side="right")
+            i = lo + int(np.count_nonzero(self.ids[lo:hi] > tour_id))
+            self.ids = np.insert(self.ids, i, tour_id)
+            self.country = np.insert(self.country, i, self._country_code(row[1]))
+            self.price = np.insert(self.price, i, row[2])
+            self.start = np.insert(self.start, i, _micros(row[3]))
+            self.end = np.insert(self.end, i, _micros(row[4]))
+            self.created = np.insert(self.created, i, created)
+            self.slots = np.insert(self.slots, i, row[6])
+        self._advance(row[7])
+
+    def _upsert_many(self, rows: List[tuple]) -> None:
+        """
+        Apply many rows, e.g. after a bulk repricing.
+
+        Rows of known tours whose created_at did not change are written in
+        place with vectorized assignments (one id lookup for all rows);
+        the rest are inserted or moved one by one.
+        """
+        if len(rows) < 16 or not len(self.ids):
+            for row in rows:
+                self._upsert(row)
+            return
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        created = np.array(
+            [_micros(row[5]) if row[5] is not None else _NO_CREATED_AT for row in rows],
+            dtype=np.int64,
+        )
+        order = np.argsort(self.ids)
+        pos = np.minimum(np.searchsorted(self.ids, ids, sorter=order), len(order) - 1)
+        at = order[pos]
+        in_place = (self.ids[at] == ids) & (self.created[at] == created)
+
+        i = at[in_place]
+        same = [row for row, flag in zip(rows, in_place) if flag]
+        self.country[i] = [self._country_code(row[1]) for row in same]
+        self.price[i] = [row[2] for row in same]
+        self.start[i] = [_micros(row[3]) for row in same]
+        self.end[i] = [_micros(row[4]) for row in same]
+        self.slots[i] = [row[6] for row in same]
+        for row in same:
+            self._advance(row[7])
+        for row, flag in zip(rows, in_place):
+            if not flag:
+                self._upsert(row)
+
+    def _delete(self, i: int) -> None:
+        self.ids = np.delete(self.ids, i)
+        self.country = np.delete(self.country, i)
+        self.price = np.delete(self.price, i)
+        self.start = np.delete(self.start, i)
+        self.end = np.delete(self.end, i)
+        self.created = np.delete(self.created, i)
+        self.slots = np.delete(self.slots, i)
+
+    def update_slots(self, tour_id: int, available_slots: int) -> None:
+        """Record a new free-slot count for one tour."""
+        if not self.ready:
+            return
+        hit = np.flatnonzero(self.ids == tour_id)
+        if len(hit):
+            self.slots[hit[0]] = available_slots
+
+    def query(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        country: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        date_mode: str = "within",
+        within_days: Optional[int] = None,
+    ) -> Tuple[List[int], int]:
+        """
+        Evaluate the get_tours filters on the snapshot.
+
+        Returns (ids of the requested page in display order, total count).
+        """
+        mask = None
+
+        def both(condition):
+            return condition if mask is None else mask & condition
+
+        if country:
+            code = self._country_codes.get(normalize_country(country))
+            if code is None:
+                return [], 0
+            mask = both(self.country == code)
+        if min_price is not None:
+            mask = both(self.price >= min_price)
+        if max_price is not None:
+            mask = both(self.price <= max_price)
+        if date_mode == "overlaps":
+            if start_date:
+                mask = both(self.end >= _micros(start_date))
+            if end_date:
+                mask = both(self.start <= _micros(end_date))
+        else:
+            if date_mode == "starts_within":
+                start_date, latest_start = starts_within_range(start_date, within_days)
+                mask = both(self.start <= _micros(latest_start))
+            if start_date:
+                mask = both(self.start >= _micros(start_date))
+            if end_date:
+                mask = both(self.end <= _micros(end_date))
+
+        if mask is None:
+            return self.ids[skip:skip + limit].tolist(), len(self.ids)
+        matched = np.flatnonzero(mask)
+        return self.ids[matched[skip:skip + limit]].tolist(), len(matched)
+
+
+tour_catalogue = TourCatalogue()
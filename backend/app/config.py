@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -12,9 +12,80 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite+aiosqlite:///./tours.db"
 
+    # Availability calendar
+    availability_max_days: int = 92
+
+    # Idempotency keys for POST /bookings
+    idempotency_ttl_seconds: int = 86400
+
+    # Seat holds
+    hold_ttl_minutes: int = 15
+    hold_max_ttl_minutes: int = 60
+    hold_sweep_interval_seconds: float = 30.0
+    hold_sweep_batch_size: int = 1000
+
+    # Waitlist: full re-scan interval (freed slots also wake the promoter)
+    # and max entries promoted per tour in one transaction
+    waitlist_promote_interval_seconds: float = 30.0
+    waitlist_promote_batch_size: int = 500
+
+    # Sharded slot counters (hot tours). None = off on SQLite, which serializes
+    # every write anyway, and on for server databases
+    slot_shards_enabled: Optional[bool] = None
+    shard_sync_interval_seconds: float = 5.0
+
+    # Tour update stream (SSE)
+    stream_max_tours: int = 100
+    stream_keepalive_seconds: float = 15.0
+
+    # Bulk tour lookup (GET /tours/batch)
+    tours_batch_max_ids: int = 100
+
+    # Similar tours (GET /tours/{id}/similar): neighbours kept per tour
+    similar_tours_enabled: bool = True
+    similar_tours_k: int = 20
+    similar_tours_refresh_interval_seconds: float = 60.0
+
+    # Analytics (GET /analytics): longest date window
+    analytics_max_days: int = 366
+
+    # Streaming CSV / NDJSON exports: rows fetched per cursor round trip
+    export_batch_size: int = 1000
+
+    # In-memory columnar tour catalogue for GET /tours filtering (needs NumPy)
+    catalogue_enabled: bool = False
+    catalogue_refresh_interval_seconds: float = 5.0
+
+    # GET /tours result cache (bounded by cached body size)
+    listing_cache_enabled: bool = True
+    listing_cache_max_bytes: int = 16 * 1024 * 1024
+    listing_cache_ttl_seconds: float = 30.0
+    listing_cache_warm_top_n: int = 20
+    listing_cache_warm_page_sizes: List[int] = [6, 10, 50]
+
+    # Production server (serve.py)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    # Per-process state (SSE stream, caches, metrics) is not shared: keep 1 (see serve.py)
+    server_workers: int = 1  # 0 = one worker per CPU core
+    server_backlog: int = 2048
+    server_keepalive_seconds: int = 15
+    server_graceful_timeout_seconds: int = 30
+    server_access_log: bool = False
+
+    # Performance instrumentation
+    metrics_enabled: bool = True
+    slow_query_threshold_ms: float = 100.0
+
     # CORS
     cors_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
+    @property
+    def slot_shards_allowed(self) -> bool:
+        if self.slot_shards_enabled is not None:
+            return self.slot_shards_enabled
+        return not self.database_url.startswith("sqlite")
+
     class Config:
         env_file = ".env"
         case_sensitive = False
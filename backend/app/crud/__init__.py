@@ -1,3 +1,18 @@
 from app.crud.tour import tour_crud, booking_crud
+from app.crud.availability import availability_crud
+from app.crud.idempotency import idempotency_crud
+from app.crud.slots import slot_crud
+from app.crud.hold import hold_crud
+from app.crud.analytics import analytics_crud
+from app.crud.waitlist import waitlist_crud
 
-__all__ = ["tour_crud", "booking_crud"]
+__all__ = [
+    "tour_crud",
+    "booking_crud",
+    "availability_crud",
+    "idempotency_crud",
+    "slot_crud",
+    "hold_crud",
+    "analytics_crud",
+    "waitlist_crud",
+]
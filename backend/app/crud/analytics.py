@@ -0,0 +1,239 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.slots import slot_crud
+from app.models.analytics import BookingDailyStat, TourBookingStat
+from app.models.tour import Tour, Booking, normalize_country
+
+_COUNTERS = ("bookings", "people", "revenue")
+
+
+class AnalyticsCRUD:
+    """
+    Revenue and occupancy rollups.
+
+    Every confirmed booking adds its counts to one BookingDailyStat row
+    (day, country) and one TourBookingStat row in the booking transaction,
+    so analytics reads O(days x countries) rows instead of bookings.
+    """
+
+    async def record_booking(self, db: AsyncSession, tour: Tour, booking: Booking) -> None:
+        """
+        Add a flushed confirmed booking to the rollups.
+
+        Called in the transaction that creates the booking. Does not commit.
+        """
+        await self.record_bookings(
+            db, tour, booking.created_at.date(), 1, booking.number_of_people, booking.total_price
+        )
+
+    async def record_bookings(
+        self,
+        db: AsyncSession,
+        tour: Tour,
+        day: date,
+        bookings: int,
+        people: int,
+        revenue: float,
+    ) -> None:
+        """
+        Add aggregated totals of several bookings of one tour made on ``day``.
+
+        Lets batch writers (waitlist promotion) update each rollup row once
+        per batch instead of once per booking. Does not commit.
+        """
+        totals = {"bookings": bookings, "people": people, "revenue": revenue}
+        await self._add_daily(db, [{
+            "day": day,
+            "country_normalized": tour.country_normalized,
+            "country": tour.country,
+            **totals,
+        }])
+        await self._add_tours(db, [{"tour_id": tour.id, **totals}])
+
+    async def record_cancellations(
+        self, db: AsyncSession, tour: Tour, bookings: List[Tuple[date, int, float]]
+    ) -> None:
+        """
+        Subtract cancelled bookings (day booked, people, revenue) of one tour.
+
+        Each booking is taken off the day it was counted on, and rows left
+        with no bookings are deleted, so the rollups stay equal to a rebuild
+        over confirmed bookings. One upsert and one delete per table
+        regardless of the number of bookings. Does not commit.
+        """
+        daily: Dict[date, dict] = {}
+        for day, people, revenue in bookings:
+            bucket = daily.setdefault(day, {
+                "day": day,
+                "country_normalized": tour.country_normalized,
+                "country": tour.country,
+                **dict.fromkeys(_COUNTERS, 0),
+            })
+            bucket["bookings"] -= 1
+            bucket["people"] -= people
+            bucket["revenue"] -= revenue
+        if not daily:
+            return
+        await self._add_daily(db, list(daily.values()))
+        await self._add_tours(db, [{
+            "tour_id": tour.id,
+            "bookings": -len(bookings),
+            "people": -sum(people for _, people, _ in bookings),
+            "revenue": -sum(revenue for _, _, revenue in bookings),
+        }])
+        await db.execute(
+            delete(BookingDailyStat).where(
+                BookingDailyStat.country_normalized == tour.country_normalized,
+                BookingDailyStat.day.in_(list(daily)),
+                BookingDailyStat.bookings <= 0,
+            )
+        )
+        await db.execute(
+            delete(TourBookingStat).where(
+                TourBookingStat.tour_id == tour.id, TourBookingStat.bookings <= 0
+            )
+        )
+
+    @staticmethod
+    def _upsert(db: AsyncSession, model):
+        """INSERT ... ON CONFLICT for the session's dialect (SQLite or PostgreSQL)."""
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
+    async def _add_daily(self, db: AsyncSession, rows: List[dict]) -> None:
+        stmt = self._upsert(db, BookingDailyStat)
+        set_ = {name: getattr(BookingDailyStat, name) + getattr(stmt.excluded, name) for name in _COUNTERS}
+        set_["country"] = stmt.excluded.country
+        await db.execute(
+            stmt.on_conflict_do_update(index_elements=["day", "country_normalized"], set_=set_),
+            rows,
+        )
+
+    async def _add_tours(self, db: AsyncSession, rows: List[dict]) -> None:
+        stmt = self._upsert(db, TourBookingStat)
+        set_ = {name: getattr(TourBookingStat, name) + getattr(stmt.excluded, name) for name in _COUNTERS}
+        await db.execute(stmt.on_conflict_do_update(index_elements=["tour_id"], set_=set_), rows)
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 5000) -> int:
+        """
+        Recompute the rollups from all bookings.
+
+        Bookings are read in id-ordered batches and each batch is aggregated
+        before being added, so memory is bounded by batch_size. Runs in one
+        transaction: readers see the old rollups until it commits.
+        Returns the number of bookings scanned.
+        """
+        await db.execute(delete(BookingDailyStat))
+        await db.execute(delete(TourBookingStat))
+        processed = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(
+                    Booking.id,
+                    Booking.status,
+                    Booking.created_at,
+                    Booking.booking_date,
+                    Booking.number_of_people,
+                    Booking.total_price,
+                    Tour.id,
+                    Tour.country_normalized,
+                    Tour.country,
+                )
+                .join(Tour, Tour.id == Booking.tour_id)
+                .where(Booking.id > last_id)
+                .order_by(Booking.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            daily: Dict[Tuple[date, str], dict] = {}
+            tours: Dict[int, dict] = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+            for _, status, created_at, booked_at, people, price, tour_id, country_norm, country in rows:
+                if status != "confirmed":
+                    continue
+                day = (created_at or booked_at).date()
+                bucket = daily.setdefault((day, country_norm), {
+                    "day": day,
+                    "country_normalized": country_norm,
+                    "country": country,
+                    **dict.fromkeys(_COUNTERS, 0),
+                })
+                for totals in (bucket, tours[tour_id]):
+                    totals["bookings"] += 1
+                    totals["people"] += people
+                    totals["revenue"] += price
+            if daily:
+                await self._add_daily(db, list(daily.values()))
+                await self._add_tours(
+                    db, [{"tour_id": tour_id, **totals} for tour_id, totals in tours.items()]
+                )
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+        await db.commit()
+        return processed
+
+    async def get_daily(
+        self,
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        country: Optional[str] = None,
+    ) -> List[BookingDailyStat]:
+        """Get rollup rows within a date window, by day then country."""
+        query = (
+            select(BookingDailyStat)
+            .where(BookingDailyStat.day >= start_date, BookingDailyStat.day <= end_date)
+            .order_by(BookingDailyStat.day, BookingDailyStat.country_normalized)
+        )
+        if country:
+            query = query.where(BookingDailyStat.country_normalized == normalize_country(country))
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def get_tour_occupancy(
+        self,
+        db: AsyncSession,
+        limit: int = 10,
+        country: Optional[str] = None,
+    ) -> List[dict]:
+        """Get the most booked tours with occupancy (max_people - available_slots)."""
+        query = (
+            select(Tour, TourBookingStat)
+            .join(TourBookingStat, TourBookingStat.tour_id == Tour.id)
+            .order_by(TourBookingStat.people.desc(), Tour.id)
+            .limit(limit)
+        )
+        if country:
+            query = query.where(Tour.country_normalized == normalize_country(country))
+        result = await db.execute(query)
+        rows = result.all()
+        await slot_crud.apply_shard_totals(db, [tour for tour, _ in rows])
+        occupancy = []
+        for tour, stats in rows:
+            occupied = tour.max_people - tour.available_slots
+            occupancy.append({
+                "tour_id": tour.id,
+                "title": tour.title,
+                "country": tour.country,
+                "max_people": tour.max_people,
+                "available_slots": tour.available_slots,
+                "occupied": occupied,
+                "occupancy_rate": round(occupied / tour.max_people, 4) if tour.max_people else 0.0,
+                "bookings": stats.bookings,
+                "people": stats.people,
+                "revenue": stats.revenue,
+            })
+        return occupancy
+
+
+analytics_crud = AnalyticsCRUD()
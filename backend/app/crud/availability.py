@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, delete, update, insert, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tour import Tour, normalize_country
+from app.models.availability import TourAvailabilityDay
+
+
+def tour_days(tour: Tour) -> List[date]:
+    """Days covered by the tour, start and end inclusive."""
+    first = tour.start_date.date()
+    last = tour.end_date.date()
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+class AvailabilityCRUD:
+    """Maintenance and queries for the day-bucketed availability table."""
+
+    async def sync_tour(self, db: AsyncSession, tour: Tour) -> None:
+        """
+        Rewrite the day buckets of a tour.
+
+        Used when a tour is created or its dates change. Does not commit.
+        """
+        await db.execute(
+            delete(TourAvailabilityDay).where(TourAvailabilityDay.tour_id == tour.id)
+        )
+        rows = [
+            {
+                "tour_id": tour.id,
+                "day": day,
+                "country_normalized": tour.country_normalized,
+                "available_slots": tour.available_slots,
+            }
+            for day in tour_days(tour)
+        ]
+        if rows:
+            await db.execute(insert(TourAvailabilityDay), rows)
+
+    async def update_slots(self, db: AsyncSession, tour_id: int, available_slots: int) -> None:
+        """
+        Propagate the current available slots of a tour to its day buckets.
+
+        Called in the transaction that changed the tour. Does not commit.
+        """
+        await db.execute(
+            update(TourAvailabilityDay)
+            .where(TourAvailabilityDay.tour_id == tour_id)
+            .values(available_slots=available_slots)
+        )
+
+    async def add_slots_bulk(self, db: AsyncSession, deltas: Dict[int, int]) -> None:
+        """
+        Add slot deltas {tour_id: delta} to day buckets with one executemany.
+
+        Does not commit.
+        """
+        if not deltas:
+            return
+        table = TourAvailabilityDay.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.tour_id == bindparam("b_tour_id"))
+            .values(available_slots=table.c.available_slots + bindparam("b_delta")),
+            [{"b_tour_id": tour_id, "b_delta": delta} for tour_id, delta in deltas.items()],
+        )
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """Rebuild the table for all tours in batches. Returns number of tours."""
+        await db.execute(delete(TourAvailabilityDay))
+        processed = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(Tour).where(Tour.id > last_id).order_by(Tour.id).limit(batch_size)
+            )
+            tours = list(result.scalars().all())
+            if not tours:
+                break
+            rows = [
+                {
+                    "tour_id": tour.id,
+                    "day": day,
+                    "country_normalized": tour.country_normalized,
+                    "available_slots": tour.available_slots,
+                }
+                for tour in tours
+                for day in tour_days(tour)
+            ]
+            if rows:
+                await db.execute(insert(TourAvailabilityDay), rows)
+            processed += len(tours)
+            last_id = tours[-1].id
+        await db.commit()
+        return processed
+
+    async def get_calendar(
+        self,
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        country: Optional[str] = None,
+        min_slots: int = 1,
+    ) -> List[dict]:
+        """
+        Get per-day availability within a date window in a single query.
+
+        Returns list of dicts: date, available_slots, tours (tour_id, available_slots).
+        """
+        query = (
+            select(
+                TourAvailabilityDay.day,
+                TourAvailabilityDay.tour_id,
+                TourAvailabilityDay.available_slots,
+            )
+            .where(
+                TourAvailabilityDay.day >= start_date,
+                TourAvailabilityDay.day <= end_date,
+                TourAvailabilityDay.available_slots >= min_slots,
+            )
+            .order_by(TourAvailabilityDay.day, TourAvailabilityDay.tour_id)
+        )
+        if country:
+            query = query.where(
+                TourAvailabilityDay.country_normalized == normalize_country(country)
+            )
+
+        result = await db.execute(query)
+        return self._group_by_day(result.all())
+
+    @staticmethod
+    def _group_by_day(rows: Iterable) -> List[dict]:
+        days: "OrderedDict[date, dict]" = OrderedDict()
+        for day, tour_id, slots in rows:
+            bucket = days.get(day)
+            if bucket is None:
+                bucket = days[day] = {"date": day, "available_slots": 0, "tours": []}
+            bucket["available_slots"] += slots
+            bucket["tours"].append({"tour_id": tour_id, "available_slots": slots})
+        return list(days.values())
+
+
+availability_crud = AvailabilityCRUD()
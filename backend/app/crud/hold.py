@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.analytics import analytics_crud
+from app.crud.slots import slot_crud
+from app.models.hold import SeatHold
+from app.models.tour import Tour, Booking
+from app.pubsub import tour_events
+from app.schemas.tour import HoldCreate, HoldConfirm
+from app.waitlist import waitlist_queue
+
+
+class HoldCRUD:
+    """CRUD operations for SeatHold model."""
+
+    async def create_hold(
+        self, db: AsyncSession, hold_data: HoldCreate, ttl_minutes: int
+    ) -> SeatHold:
+        """
+        Take slots from the tour for ttl_minutes.
+
+        Slots are taken with a conditional UPDATE (see SlotCRUD.reserve), so
+        two concurrent holds can never oversell the tour.
+        """
+        tour = await db.get(Tour, hold_data.tour_id)
+        if not tour:
+            raise ValueError(f"Tour with id {hold_data.tour_id} not found")
+
+        n = hold_data.number_of_people
+        try:
+            remaining = await slot_crud.reserve(db, tour, n)
+        except ValueError:
+            await db.rollback()
+            raise
+
+        hold = SeatHold(
+            tour_id=hold_data.tour_id,
+            number_of_people=n,
+            status="active",
+            expires_at=datetime.utcnow() + timedelta(minutes=ttl_minutes),
+        )
+        db.add(hold)
+        await db.commit()
+        await db.refresh(hold)
+
+        tour_events.publish(hold_data.tour_id, available_slots=remaining)
+        return hold
+
+    async def get_hold(self, db: AsyncSession, hold_id: int) -> Optional[SeatHold]:
+        """Get hold by ID."""
+        query = select(SeatHold).where(SeatHold.id == hold_id)
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def confirm_hold(
+        self, db: AsyncSession, hold_id: int, confirm_data: HoldConfirm
+    ) -> Booking:
+        """
+        Turn an active hold into a confirmed booking.
+
+        The slots were already taken by the hold, so the tour row is only read
+        for the price.
+        """
+        result = await db.execute(
+            update(SeatHold)
+            .where(
+                SeatHold.id == hold_id,
+                SeatHold.status == "active",
+                SeatHold.expires_at > datetime.utcnow(),
+            )
+            .values(status="confirmed")
+            .returning(SeatHold.tour_id, SeatHold.number_of_people)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            raise ValueError(f"Hold with id {hold_id} not found, expired or already used")
+        tour_id, number_of_people = row
+
+        tour = await db.get(Tour, tour_id)
+        booking = Booking(
+            **confirm_data.model_dump(),
+            tour_id=tour_id,
+            number_of_people=number_of_people,
+            total_price=tour.price * number_of_people,
+            status="confirmed",
+        )
+        db.add(booking)
+        await db.flush()
+        await analytics_crud.record_booking(db, tour, booking)
+
+        await db.execute(
+            update(SeatHold).where(SeatHold.id == hold_id).values(booking_id=booking.id)
+        )
+        await db.commit()
+        await db.refresh(booking)
+        return booking
+
+    async def release_hold(self, db: AsyncSession, hold_id: int) -> Optional[SeatHold]:
+        """Release an active hold and return its slots to the tour."""
+        result = await db.execute(
+            update(SeatHold)
+            .where(SeatHold.id == hold_id, SeatHold.status == "active")
+            .values(status="released")
+            .returning(SeatHold.tour_id, SeatHold.number_of_people)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            return None
+
+        await slot_crud.release(db, {row.tour_id: row.number_of_people})
+        await db.commit()
+        waitlist_queue.notify_many([row.tour_id])
+        await self._publish_slots(db, [row.tour_id])
+        return await self.get_hold(db, hold_id)
+
+    async def expire_holds(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Release one batch of expired holds. Returns number of expired holds.
+
+        Expired holds are picked through the partial (status='active',
+        expires_at) index and flipped with one UPDATE ... RETURNING; slots are
+        then returned with one executemany per table, grouped by tour
+        (see SlotCRUD.release).
+        """
+        expired_ids = (
+            select(SeatHold.id)
+            .where(SeatHold.status == "active", SeatHold.expires_at <= datetime.utcnow())
+            .order_by(SeatHold.expires_at)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(SeatHold)
+            .where(SeatHold.id.in_(expired_ids), SeatHold.status == "active")
+            .values(status="expired")
+            .returning(SeatHold.tour_id, SeatHold.number_of_people)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        if not rows:
+            await db.rollback()
+            return 0
+
+        deltas: Dict[int, int] = defaultdict(int)
+        for tour_id, number_of_people in rows:
+            deltas[tour_id] += number_of_people
+
+        await slot_crud.release(db, deltas)
+        await db.commit()
+        waitlist_queue.notify_many(deltas)
+        await self._publish_slots(db, list(deltas))
+        return len(rows)
+
+    async def _publish_slots(self, db: AsyncSession, tour_ids: List[int]) -> None:
+        """Publish current slots of watched tours with a single query."""
+        watched = tour_events.watched(tour_ids)
+        if not watched:
+            return
+        result = await db.execute(select(Tour).where(Tour.id.in_(watched)))
+        tours = list(result.scalars().all())
+        await slot_crud.apply_shard_totals(db, tours)
+        for tour in tours:
+            tour_events.publish(tour.id, available_slots=tour.available_slots)
+
+
+hold_crud = HoldCRUD()
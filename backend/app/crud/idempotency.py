@@ -0,0 +1,58 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+
+
+def hash_request(payload: Any) -> str:
+    """Stable hash of a JSON-serializable request payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyCRUD:
+    """Persistence of idempotency keys and their stored responses."""
+
+    async def get(self, db: AsyncSession, key: str) -> Optional[IdempotencyKey]:
+        """Get a non-expired record by key."""
+        query = select(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.utcnow(),
+        )
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def add(
+        self,
+        db: AsyncSession,
+        key: str,
+        request_hash: str,
+        status_code: int,
+        response_body: Any,
+    ) -> None:
+        """
+        Store response for the key in the current transaction. Does not commit.
+
+        Expired records are purged first so an expired key can be reused.
+        """
+        now = datetime.utcnow()
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+        db.add(
+            IdempotencyKey(
+                key=key,
+                request_hash=request_hash,
+                status_code=status_code,
+                response_body=json.dumps(response_body, default=str),
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds),
+            )
+        )
+
+
+idempotency_crud = IdempotencyCRUD()
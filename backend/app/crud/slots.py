@@ -0,0 +1,247 @@
+import random
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update, delete, insert, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.crud.availability import availability_crud
+from app.models.tour import Tour
+from app.models.slot_shard import TourSlotShard
+from app.pubsub import tour_events
+
+
+class SlotCRUD:
+    """
+    Slot accounting for tours.
+
+    Regular tours keep free slots in Tour.available_slots. Hot tours
+    (Tour.slot_shards > 0) split them across TourSlotShard rows; every
+    reservation is a conditional UPDATE on one shard, so slots can never go
+    negative and concurrent bookings only contend per shard.
+    """
+
+    async def reserve(self, db: AsyncSession, tour: Tour, n: int) -> int:
+        """
+        Take n slots of the tour. Does not commit.
+
+        Returns remaining free slots of the tour; raises ValueError if there
+        are not enough.
+        """
+        if tour.slot_shards:
+            return await self._reserve_sharded(db, tour, n)
+
+        result = await db.execute(
+            update(Tour)
+            .where(Tour.id == tour.id, Tour.available_slots >= n)
+            .values(available_slots=Tour.available_slots - n)
+            .returning(Tour.available_slots)
+        )
+        remaining = result.scalar_one_or_none()
+        if remaining is None:
+            current = await db.scalar(select(Tour.available_slots).where(Tour.id == tour.id))
+            raise ValueError(f"Not enough available slots. Only {current} slots left")
+
+        set_committed_value(tour, "available_slots", remaining)
+        await availability_crud.update_slots(db, tour.id, remaining)
+        return remaining
+
+    async def _reserve_sharded(self, db: AsyncSession, tour: Tour, n: int) -> int:
+        shard = TourSlotShard
+        # Start at a random shard to spread concurrent writers
+        start = random.randrange(tour.slot_shards)
+        for offset in range(tour.slot_shards):
+            shard_no = (start + offset) % tour.slot_shards
+            result = await db.execute(
+                update(shard)
+                .where(
+                    shard.tour_id == tour.id,
+                    shard.shard_no == shard_no,
+                    shard.available_slots >= n,
+                )
+                .values(available_slots=shard.available_slots - n)
+                .returning(shard.shard_no)
+                .execution_options(synchronize_session=False)
+            )
+            if result.first() is not None:
+                return await self._sharded_total(db, tour.id)
+
+        # No single shard has n slots: take from several, largest first
+        result = await db.execute(
+            select(shard.shard_no, shard.available_slots)
+            .where(shard.tour_id == tour.id, shard.available_slots > 0)
+            .order_by(shard.available_slots.desc())
+        )
+        shards = result.all()
+        if sum(slots for _, slots in shards) < n:
+            raise ValueError(
+                f"Not enough available slots. Only {sum(s for _, s in shards)} slots left"
+            )
+        needed = n
+        for shard_no, slots in shards:
+            take = min(slots, needed)
+            result = await db.execute(
+                update(shard)
+                .where(
+                    shard.tour_id == tour.id,
+                    shard.shard_no == shard_no,
+                    shard.available_slots >= take,
+                )
+                .values(available_slots=shard.available_slots - take)
+                .returning(shard.shard_no)
+                .execution_options(synchronize_session=False)
+            )
+            if result.first() is None:
+                # A concurrent booking took these slots; caller rolls back
+                raise ValueError("Not enough available slots. Please retry")
+            needed -= take
+            if not needed:
+                break
+        return await self._sharded_total(db, tour.id)
+
+    async def release(self, db: AsyncSession, deltas: Dict[int, int]) -> None:
+        """
+        Return slots {tour_id: n} to tours. Does not commit.
+
+        Uses one executemany per table regardless of the number of tours.
+        """
+        if not deltas:
+            return
+        result = await db.execute(
+            select(Tour.id, Tour.slot_shards).where(Tour.id.in_(list(deltas)))
+        )
+        shard_counts = dict(result.all())
+
+        plain = {tid: d for tid, d in deltas.items() if not shard_counts.get(tid)}
+        sharded = {tid: d for tid, d in deltas.items() if shard_counts.get(tid)}
+
+        if plain:
+            table = Tour.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_tour_id"))
+                .values(available_slots=table.c.available_slots + bindparam("b_delta")),
+                [{"b_tour_id": tid, "b_delta": d} for tid, d in plain.items()],
+            )
+            await availability_crud.add_slots_bulk(db, plain)
+
+        if sharded:
+            table = TourSlotShard.__table__
+            await db.execute(
+                update(table)
+                .where(
+                    table.c.tour_id == bindparam("b_tour_id"),
+                    table.c.shard_no == bindparam("b_shard_no"),
+                )
+                .values(available_slots=table.c.available_slots + bindparam("b_delta")),
+                [
+                    {
+                        "b_tour_id": tid,
+                        "b_shard_no": random.randrange(shard_counts[tid]),
+                        "b_delta": d,
+                    }
+                    for tid, d in sharded.items()
+                ],
+            )
+
+    async def set_shards(self, db: AsyncSession, tour: Tour, shards: int) -> Tour:
+        """
+        Enable (shards > 0), resize or disable (shards = 0) sharded slots.
+
+        Free slots are gathered and redistributed evenly. Commits.
+        """
+        total = tour.available_slots
+        if tour.slot_shards:
+            total = await self._sharded_total(db, tour.id)
+            await db.execute(delete(TourSlotShard).where(TourSlotShard.tour_id == tour.id))
+
+        if shards:
+            base, extra = divmod(total, shards)
+            await db.execute(
+                insert(TourSlotShard),
+                [
+                    {
+                        "tour_id": tour.id,
+                        "shard_no": i,
+                        "available_slots": base + (1 if i < extra else 0),
+                    }
+                    for i in range(shards)
+                ],
+            )
+
+        # Explicit UPDATE: the loaded value may already hold the shard sum
+        await db.execute(
+            update(Tour)
+            .where(Tour.id == tour.id)
+            .values(slot_shards=shards, available_slots=total)
+            .execution_options(synchronize_session=False)
+        )
+        await availability_crud.update_slots(db, tour.id, total)
+        await db.commit()
+        await db.refresh(tour)
+        tour_events.publish(tour.id, available_slots=total)
+        return tour
+
+    async def apply_shard_totals(self, db: AsyncSession, tours: Iterable[Tour]) -> None:
+        """Replace available_slots of sharded tours with the live shard sum (one query)."""
+        sharded = [tour for tour in tours if tour.slot_shards]
+        if not sharded:
+            return
+        totals = await self.sharded_totals(db, [tour.id for tour in sharded])
+        for tour in sharded:
+            set_committed_value(tour, "available_slots", totals.get(tour.id, 0))
+
+    async def sharded_totals(self, db: AsyncSession, tour_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """Sum of shard slots per tour, for the given tours or all sharded tours."""
+        query = select(
+            TourSlotShard.tour_id, func.sum(TourSlotShard.available_slots)
+        ).group_by(TourSlotShard.tour_id)
+        if tour_ids is not None:
+            query = query.where(TourSlotShard.tour_id.in_(tour_ids))
+        result = await db.execute(query)
+        return {tour_id: int(total) for tour_id, total in result.all()}
+
+    async def sync_sharded_tours(self, db: AsyncSession) -> List[tuple]:
+        """
+        Copy shard sums into Tour.available_slots and day buckets.
+
+        Keeps filters and the availability calendar close to live for hot
+        tours without writing the tours row on every booking.
+        Returns list of (tour_id, available_slots) that changed.
+        """
+        totals = await self.sharded_totals(db)
+        if not totals:
+            return []
+        result = await db.execute(
+            select(Tour.id, Tour.available_slots).where(Tour.id.in_(list(totals)))
+        )
+        changed = [
+            (tour_id, totals[tour_id])
+            for tour_id, slots in result.all()
+            if slots != totals[tour_id]
+        ]
+        if not changed:
+            return []
+
+        table = Tour.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_tour_id"))
+            .values(available_slots=bindparam("b_slots")),
+            [{"b_tour_id": tid, "b_slots": slots} for tid, slots in changed],
+        )
+        for tour_id, slots in changed:
+            await availability_crud.update_slots(db, tour_id, slots)
+        await db.commit()
+        return changed
+
+    async def _sharded_total(self, db: AsyncSession, tour_id: int) -> int:
+        total = await db.scalar(
+            select(func.coalesce(func.sum(TourSlotShard.available_slots), 0)).where(
+                TourSlotShard.tour_id == tour_id
+            )
+        )
+        return int(total)
+
+
+slot_crud = SlotCRUD()
@@ -1,10 +1,21 @@
+import base64
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional, List, Tuple
-from sqlalchemy import select, func
+from typing import Dict, Optional, List, Tuple
+from sqlalchemy import select, update, func, and_, or_, case, cast, true, Numeric, Select, Update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, noload
 
-from app.models.tour import Tour, Booking
-from app.schemas.tour import TourCreate, BookingCreate
+from app.catalogue import tour_catalogue
+from app.crud.analytics import analytics_crud
+from app.crud.availability import availability_crud
+from app.crud.idempotency import idempotency_crud
+from app.crud.slots import slot_crud
+from app.database import engine
+from app.models.tour import Tour, Booking, normalize_country, starts_within_range
+from app.pubsub import tour_events
+from app.similarity import similarity_index
+from app.schemas.tour import TourCreate, TourUpdate, TourReprice, PriceRule, BookingCreate, BookingResponse
 
 
 class TourCRUD:
@@ -40,6 +51,138 @@ class TourCRUD:
             "max_price": max_price,
         }
 
+    async def get_country_counts(self, db: AsyncSession) -> List[Tuple[str, int]]:
+        """Get (normalized country, number of tours) pairs, most tours first."""
+        query = (
+            select(Tour.country_normalized, func.count())
+            .group_by(Tour.country_normalized)
+            .order_by(func.count().desc(), Tour.country_normalized)
+        )
+        result = await db.execute(query)
+        return [(country, count) for country, count in result.all()]
+
+    def build_filter_conditions(
+        self,
+        country: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        date_mode: str = "within",
+        within_days: Optional[int] = None,
+    ) -> list:
+        """
+        Build WHERE conditions for tour filters.
+
+        Country is matched case-insensitively by equality on the normalized
+        column so the composite indexes can be used. Date filters depend on
+        ``date_mode`` (see ``DATE_MODES``); each mode bounds ``start_date``
+        from both sides where it can, so it is a range scan on
+        ix_tours_dates_created_at.
+        """
+        conditions = []
+        if country:
+            conditions.append(Tour.country_normalized == normalize_country(country))
+        if min_price is not None:
+            conditions.append(Tour.price >= min_price)
+        if max_price is not None:
+            conditions.append(Tour.price <= max_price)
+        if date_mode == "overlaps":
+            conditions.extend(self._overlap_conditions(start_date, end_date))
+            return conditions
+        if date_mode == "starts_within":
+            start_date, latest_start = starts_within_range(start_date, within_days)
+            conditions.append(Tour.start_date <= latest_start)
+        elif end_date:
+            # Implied by start_date <= end_date; gives the start_date range an upper bound
+            conditions.append(Tour.start_date <= end_date)
+        if start_date:
+            conditions.append(Tour.start_date >= start_date)
+        if end_date:
+            conditions.append(Tour.end_date <= end_date)
+        return conditions
+
+    def _overlap_conditions(
+        self, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> list:
+        """Tours whose [start_date, end_date] intersects the given window."""
+        conditions = []
+        if end_date:
+            conditions.append(Tour.start_date <= end_date)
+        if start_date:
+            conditions.append(Tour.end_date >= start_date)
+        if not conditions:
+            return conditions
+
+        if engine.dialect.name == "sqlite" and start_date:
+            # A tour ending after start_date began at most one longest span
+            # before it (ix_tours_span_days); one second of slack for rounding
+            longest_span = select(
+                func.max(func.julianday(Tour.end_date) - func.julianday(Tour.start_date))
+            ).scalar_subquery()
+            conditions.append(
+                Tour.start_date
+                >= func.datetime(func.julianday(start_date) - longest_span - 1 / 86400)
+            )
+        elif engine.dialect.name == "postgresql":
+            conditions.append(
+                func.tsrange(Tour.start_date, Tour.end_date, "[]").op("&&")(
+                    func.tsrange(start_date, end_date, "[]")
+                )
+            )
+        return conditions
+
+    def build_filter_queries(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        **filters,
+    ) -> Tuple[Select, Select]:
+        """
+        Build (page ids query, count query) for the given filters.
+
+        Only ids are selected for the page, so filtering, sorting and OFFSET
+        can run on covering index entries; the page rows are then read by id.
+        """
+        conditions = self.build_filter_conditions(**filters)
+        query = (
+            select(Tour.id)
+            .where(*conditions)
+            .order_by(Tour.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        count_query = select(func.count()).select_from(Tour).where(*conditions)
+        return query, count_query
+
+    def build_export_query(self, **filters) -> Select:
+        """
+        Select the public tour columns matching the get_tours filters, in id order.
+
+        Internal columns (country_normalized, slot_shards, version) are not exported.
+        """
+        conditions = self.build_filter_conditions(**filters)
+        return (
+            select(
+                Tour.id,
+                Tour.title,
+                Tour.country,
+                Tour.city,
+                Tour.description,
+                Tour.price,
+                Tour.duration_days,
+                Tour.max_people,
+                Tour.available_slots,
+                Tour.image_url,
+                Tour.start_date,
+                Tour.end_date,
+                Tour.created_at,
+                Tour.updated_at,
+            )
+            .where(*conditions)
+            .order_by(Tour.id)
+        )
+
     async def get_tours(
         self,
         db: AsyncSession,
@@ -50,63 +193,240 @@ class TourCRUD:
         max_price: Optional[float] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        date_mode: str = "within",
+        within_days: Optional[int] = None,
     ) -> Tuple[List[Tour], int]:
         """
         Get list of tours with optional filters.
 
-        Returns tuple of (tours, total_count).
+        Returns tuple of (tours, total_count). When the in-memory catalogue
+        is loaded, filtering, counting and paging run on it and only the page
+        rows are read from SQL.
         """
-        # Build base query
-        query = select(Tour)
+        if tour_catalogue.ready:
+            tour_ids, total = tour_catalogue.query(
+                skip=skip,
+                limit=limit,
+                country=country,
+                min_price=min_price,
+                max_price=max_price,
+                start_date=start_date,
+                end_date=end_date,
+                date_mode=date_mode,
+                within_days=within_days,
+            )
+            return await self.get_tours_by_ids(db, tour_ids), total
 
-        # Apply filters
-        if country:
-            query = query.where(Tour.country.ilike(f"%{country}%"))
-        if min_price is not None:
-            query = query.where(Tour.price >= min_price)
-        if max_price is not None:
-            query = query.where(Tour.price <= max_price)
-        if start_date:
-            query = query.where(Tour.start_date >= start_date)
-        if end_date:
-            query = query.where(Tour.end_date <= end_date)
+        query, count_query = self.build_filter_queries(
+            skip=skip,
+            limit=limit,
+            country=country,
+            min_price=min_price,
+            max_price=max_price,
+            start_date=start_date,
+            end_date=end_date,
+            date_mode=date_mode,
+            within_days=within_days,
+        )
 
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
         result = await db.execute(count_query)
         total = result.scalar() or 0
 
-        # Apply pagination
-        query = query.offset(skip).limit(limit).order_by(Tour.created_at.desc())
-
-        # Execute query
+        # Pick the page ids, then load those rows
         result = await db.execute(query)
-        tours = result.scalars().all()
+        tours = await self.get_tours_by_ids(db, list(result.scalars().all()))
 
-        return list(tours), total
+        return tours, total
 
     async def get_tour(self, db: AsyncSession, tour_id: int) -> Optional[Tour]:
         """Get tour by ID."""
         query = select(Tour).where(Tour.id == tour_id)
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        tour = result.scalar_one_or_none()
+        if tour:
+            await slot_crud.apply_shard_totals(db, [tour])
+        return tour
+
+    async def get_tours_by_ids(self, db: AsyncSession, tour_ids: List[int]) -> List[Tour]:
+        """Get several tours in one query, in the order of ``tour_ids``; unknown ids are skipped."""
+        query = select(Tour).where(Tour.id.in_(tour_ids))
+        result = await db.execute(query)
+        by_id = {tour.id: tour for tour in result.scalars().all()}
+        tours = [by_id[tour_id] for tour_id in tour_ids if tour_id in by_id]
+        await slot_crud.apply_shard_totals(db, tours)
+        return tours
+
+    async def get_tour_states(self, db: AsyncSession, tour_ids: List[int]) -> List[dict]:
+        """Get slots and price of several tours in one query."""
+        query = select(Tour.id, Tour.available_slots, Tour.price).where(Tour.id.in_(tour_ids))
+        result = await db.execute(query)
+        return [
+            {"tour_id": tour_id, "available_slots": slots, "price": price}
+            for tour_id, slots, price in result.all()
+        ]
 
     async def create_tour(self, db: AsyncSession, tour_data: TourCreate) -> Tour:
         """Create new tour."""
         tour = Tour(**tour_data.model_dump())
         db.add(tour)
+        await db.flush()
+        await availability_crud.sync_tour(db, tour)
         await db.commit()
         await db.refresh(tour)
+        tour_catalogue.upsert_tour(tour)
+        similarity_index.upsert_tour(tour)
+        tour_events.publish(tour.id, available_slots=tour.available_slots, price=tour.price)
+        return tour
+
+    async def update_tour(
+        self, db: AsyncSession, tour_id: int, tour_data: TourUpdate
+    ) -> Optional[Tour]:
+        """
+        Apply a partial edit if the tour is still at ``tour_data.version``.
+
+        The edit is one conditional UPDATE ... WHERE version = :expected that
+        bumps the version; no lock is held while the client edits, and slot
+        counters are never written from the request, so concurrent bookings
+        neither wait for nor get overwritten by it. A max_people change is
+        applied to the free slots as a delta (see SlotCRUD). Returns None if
+        the tour does not exist; raises ValueError on a version conflict or
+        when capacity would drop below the booked seats.
+        """
+        tour = await db.get(Tour, tour_id, populate_existing=True)
+        if not tour:
+            return None
+        if tour.version != tour_data.version:
+            raise ValueError(
+                f"Tour {tour_id} was changed (version {tour.version}); reload it and retry"
+            )
+
+        values = tour_data.model_dump(exclude_unset=True, exclude={"version"})
+        start = values.get("start_date", tour.start_date)
+        end = values.get("end_date", tour.end_date)
+        if end < start:
+            raise ValueError("end_date must not be before start_date")
+        if "country" in values:
+            values["country_normalized"] = normalize_country(values["country"])
+        capacity_delta = values.get("max_people", tour.max_people) - tour.max_people
+
+        result = await db.execute(
+            update(Tour)
+            .where(Tour.id == tour_id, Tour.version == tour_data.version)
+            .values(**values, version=Tour.version + 1, updated_at=datetime.utcnow())
+            .returning(Tour.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.first() is None:
+            await db.rollback()
+            raise ValueError(f"Tour {tour_id} was changed concurrently; reload it and retry")
+
+        if capacity_delta > 0:
+            await slot_crud.release(db, {tour_id: capacity_delta})
+        elif capacity_delta < 0:
+            try:
+                await slot_crud.reserve(db, tour, -capacity_delta)
+            except ValueError as e:
+                await db.rollback()
+                raise ValueError(
+                    f"Cannot reduce max_people by {-capacity_delta}: {e}"
+                ) from None
+
+        tour = await db.get(Tour, tour_id, populate_existing=True)
+        if {"start_date", "end_date", "country"} & values.keys():
+            await availability_crud.sync_tour(db, tour)
+        await db.commit()
+        await slot_crud.apply_shard_totals(db, [tour])
+
+        tour_catalogue.upsert_tour(tour)
+        similarity_index.upsert_tour(tour)
+        tour_events.publish(tour.id, available_slots=tour.available_slots, price=tour.price)
         return tour
 
+    async def reprice_tours(self, db: AsyncSession, reprice: TourReprice) -> int:
+        """
+        Change prices of all selected tours with one set-based UPDATE.
+
+        The new price is computed in SQL (a CASE over the rules, first match
+        wins), rounded to cents, and every changed row gets a new version and
+        updated_at, which also changes its ETag. Caches are invalidated once
+        for the whole batch (``tour_events.publish_many``). Returns the
+        number of tours changed.
+        """
+        conditions = self.build_filter_conditions(
+            country=reprice.country,
+            min_price=reprice.min_price,
+            max_price=reprice.max_price,
+            start_date=reprice.start_date,
+            end_date=reprice.end_date,
+        )
+        if reprice.tour_ids:
+            conditions.append(Tour.id.in_(reprice.tour_ids))
+
+        if reprice.percent is not None:
+            factor = 1 + reprice.percent / 100
+        else:
+            matches = [and_(true(), *self._rule_conditions(rule)) for rule in reprice.rules]
+            conditions.append(or_(*matches))
+            factor = case(
+                *[(match, 1 + rule.percent / 100) for match, rule in zip(matches, reprice.rules)]
+            )
+
+        result = await db.execute(
+            update(Tour)
+            .where(*conditions)
+            .values(
+                price=cast(func.round(cast(Tour.price * factor, Numeric), 2), Tour.price.type),
+                version=Tour.version + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Tour.id, Tour.price)
+            .execution_options(synchronize_session=False)
+        )
+        prices = dict(result.all())
+        if not prices:
+            await db.rollback()
+            return 0
+        await db.commit()
+
+        if tour_catalogue.ready:
+            await tour_catalogue.refresh(db)
+        tour_events.publish_many({tour_id: {"price": price} for tour_id, price in prices.items()})
+        return len(prices)
+
+    @staticmethod
+    def _rule_conditions(rule: PriceRule) -> list:
+        conditions = []
+        if rule.country:
+            conditions.append(Tour.country_normalized == normalize_country(rule.country))
+        if rule.min_price is not None:
+            conditions.append(Tour.price >= rule.min_price)
+        if rule.max_price is not None:
+            conditions.append(Tour.price <= rule.max_price)
+        if rule.start_from:
+            conditions.append(Tour.start_date >= rule.start_from)
+        if rule.start_to:
+            conditions.append(Tour.start_date < rule.start_to)
+        return conditions
+
 
 class BookingCRUD:
     """CRUD operations for Booking model."""
 
     async def create_booking(
-        self, db: AsyncSession, booking_data: BookingCreate
+        self,
+        db: AsyncSession,
+        booking_data: BookingCreate,
+        idempotency_key: Optional[str] = None,
+        request_hash: Optional[str] = None,
     ) -> Booking:
-        """Create new booking."""
+        """
+        Create new booking.
+
+        When idempotency_key is given, the serialized response is stored under
+        the key in the same transaction as the booking, so a concurrent request
+        with the same key fails on commit instead of booking twice.
+        """
         # Get tour to calculate total price
         tour_query = select(Tour).where(Tour.id == booking_data.tour_id)
         result = await db.execute(tour_query)
@@ -115,10 +435,8 @@ class BookingCRUD:
         if not tour:
             raise ValueError(f"Tour with id {booking_data.tour_id} not found")
 
-        if tour.available_slots < booking_data.number_of_people:
-            raise ValueError(
-                f"Not enough available slots. Only {tour.available_slots} slots left"
-            )
+        # Take slots atomically (raises ValueError if not enough)
+        remaining = await slot_crud.reserve(db, tour, booking_data.number_of_people)
 
         # Calculate total price
         total_price = tour.price * booking_data.number_of_people
@@ -130,13 +448,23 @@ class BookingCRUD:
             status="confirmed",
         )
 
-        # Update available slots
-        tour.available_slots -= booking_data.number_of_people
-
         db.add(booking)
+        await db.flush()
+        await analytics_crud.record_booking(db, tour, booking)
+        if idempotency_key:
+            await idempotency_crud.add(
+                db,
+                key=idempotency_key,
+                request_hash=request_hash,
+                status_code=201,
+                response_body=BookingResponse.model_validate(booking).model_dump(mode="json"),
+            )
         await db.commit()
         await db.refresh(booking)
 
+        tour_events.publish(tour.id, available_slots=remaining, price=tour.price)
+        tour_catalogue.update_slots(tour.id, remaining)
+
         return booking
 
     async def get_booking(self, db: AsyncSession, booking_id: int) -> Optional[Booking]:
@@ -145,17 +473,180 @@ class BookingCRUD:
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_bookings_by_email(
-        self, db: AsyncSession, email: str
-    ) -> List[Booking]:
-        """Get all bookings by customer email."""
-        query = (
-            select(Booking)
-            .where(Booking.customer_email == email)
-            .order_by(Booking.created_at.desc())
+    def build_cancel_query(
+        self,
+        tour_id: Optional[int] = None,
+        booking_ids: Optional[List[int]] = None,
+    ) -> Update:
+        """
+        Flip confirmed bookings (of a tour and/or with given ids) to cancelled.
+
+        The status condition makes the UPDATE the point of atomicity: a
+        booking is returned, and its slots released, by one cancel only.
+        """
+        query = update(Booking).where(Booking.status == "confirmed")
+        if tour_id is not None:
+            query = query.where(Booking.tour_id == tour_id)
+        if booking_ids is not None:
+            query = query.where(Booking.id.in_(booking_ids))
+        return (
+            query.values(status="cancelled")
+            .returning(
+                Booking.id,
+                Booking.tour_id,
+                Booking.number_of_people,
+                Booking.total_price,
+                Booking.created_at,
+                Booking.booking_date,
+            )
+            .execution_options(synchronize_session=False)
         )
+
+    async def cancel_booking(self, db: AsyncSession, booking_id: int) -> Optional[Booking]:
+        """
+        Cancel a confirmed booking and return its slots to the tour.
+
+        Returns None if the booking does not exist; raises ValueError if it
+        is not confirmed.
+        """
+        rows = await self._cancel(db, self.build_cancel_query(booking_ids=[booking_id]))
+        booking = await db.get(Booking, booking_id, populate_existing=True)
+        if booking is not None and not rows:
+            raise ValueError(f"Booking with id {booking_id} is already {booking.status}")
+        return booking
+
+    async def cancel_tour_bookings(
+        self,
+        db: AsyncSession,
+        tour_id: int,
+        booking_ids: Optional[List[int]] = None,
+    ) -> Tuple[List[int], Optional[Tour]]:
+        """
+        Cancel all confirmed bookings of a tour (or those of ``booking_ids``).
+
+        Runs in one transaction whatever the number of bookings: one UPDATE
+        for the bookings, one slot release and one rollup update for the
+        tour. Returns (cancelled booking ids, tour with current slots);
+        the tour is None if it does not exist.
+        """
+        rows = await self._cancel(db, self.build_cancel_query(tour_id=tour_id, booking_ids=booking_ids))
+        tour = await tour_crud.get_tour(db, tour_id)
+        return sorted(row.id for row in rows), tour
+
+    async def _cancel(self, db: AsyncSession, query: Update) -> List[tuple]:
+        """Run a cancel query, release slots and subtract rollups per tour, commit and publish."""
+        result = await db.execute(query)
+        rows = result.all()
+        if not rows:
+            await db.rollback()
+            return rows
+
+        deltas: Dict[int, int] = defaultdict(int)
+        cancelled: Dict[int, list] = defaultdict(list)
+        for row in rows:
+            deltas[row.tour_id] += row.number_of_people
+            day = (row.created_at or row.booking_date).date()
+            cancelled[row.tour_id].append((day, row.number_of_people, row.total_price))
+        await slot_crud.release(db, deltas)
+
+        result = await db.execute(
+            select(Tour)
+            .where(Tour.id.in_(list(deltas)))
+            .execution_options(populate_existing=True)
+        )
+        tours = list(result.scalars().all())
+        for tour in tours:
+            await analytics_crud.record_cancellations(db, tour, cancelled[tour.id])
+        await db.commit()
+
+        await slot_crud.apply_shard_totals(db, tours)
+        for tour in tours:
+            tour_events.publish(tour.id, available_slots=tour.available_slots, price=tour.price)
+            tour_catalogue.update_slots(tour.id, tour.available_slots)
+        return rows
+
+    async def get_bookings_by_email(
+        self,
+        db: AsyncSession,
+        email: str,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include_tour: bool = False,
+    ) -> Tuple[List[Booking], Optional[str]]:
+        """
+        Get bookings by customer email, newest first, with cursor pagination.
+
+        Walks the (customer_email, created_at) index using a keyset cursor,
+        so deep pages cost the same as the first one. When include_tour is
+        set, tours are loaded in the same query via a join.
+
+        Returns tuple of (bookings, next_cursor).
+        """
+        query = select(Booking).where(Booking.customer_email == email)
+
+        if status:
+            query = query.where(Booking.status == status)
+        if cursor:
+            created_at, booking_id = decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    Booking.created_at < created_at,
+                    and_(Booking.created_at == created_at, Booking.id < booking_id),
+                )
+            )
+
+        query = query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(limit + 1)
+        if include_tour:
+            query = query.options(joinedload(Booking.tour))
+        else:
+            query = query.options(noload(Booking.tour))
+
         result = await db.execute(query)
-        return list(result.scalars().all())
+        bookings = list(result.scalars().all())
+
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            last = bookings[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return bookings, next_cursor
+
+    def build_export_query(
+        self,
+        status: Optional[str] = None,
+        tour_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> Select:
+        """Select all booking columns filtered by status, tour and created_at range, in id order."""
+        query = select(*Booking.__table__.c)
+        if status:
+            query = query.where(Booking.status == status)
+        if tour_id is not None:
+            query = query.where(Booking.tour_id == tour_id)
+        if date_from:
+            query = query.where(Booking.created_at >= date_from)
+        if date_to:
+            query = query.where(Booking.created_at < date_to)
+        return query.order_by(Booking.id)
+
+
+def encode_cursor(created_at: datetime, booking_id: int) -> str:
+    """Encode keyset pagination position into an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{booking_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, booking_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor") from None
 
 
 # Create singleton instances
@@ -0,0 +1,248 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, insert, func, or_, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.catalogue import tour_catalogue
+from app.crud.analytics import analytics_crud
+from app.crud.slots import slot_crud
+from app.models.tour import Tour, Booking
+from app.models.waitlist import WaitlistEntry
+from app.pubsub import tour_events
+from app.schemas.tour import WaitlistCreate
+
+# Customer columns copied from an entry into its booking
+_CUSTOMER_COLUMNS = (
+    WaitlistEntry.customer_name,
+    WaitlistEntry.customer_email,
+    WaitlistEntry.customer_phone,
+    WaitlistEntry.number_of_people,
+    WaitlistEntry.notes,
+)
+
+
+class WaitlistCRUD:
+    """
+    Waitlist of sold-out tours.
+
+    Parties queue per tour in arrival (id) order and are promoted strictly
+    in that order. When slots free up, one transaction per tour promotes
+    waiting parties from the head of the queue while they fit: the
+    entries are claimed with one UPDATE ... RETURNING, their slots are taken
+    with a single conditional reservation, and their bookings are inserted
+    with one multi-row INSERT, so cost per promoted party is a row write
+    rather than a round of queries.
+    """
+
+    async def create_entry(
+        self, db: AsyncSession, entry_data: WaitlistCreate
+    ) -> Optional[WaitlistEntry]:
+        """
+        Put a party on the waitlist. Returns None if the tour does not exist.
+
+        Raises ValueError when the party is larger than the tour (it could
+        never be promoted), or when the tour still has enough free slots:
+        such a party should book directly.
+        """
+        tour = await db.get(Tour, entry_data.tour_id)
+        if not tour:
+            return None
+        if entry_data.number_of_people > tour.max_people:
+            raise ValueError(
+                f"Party of {entry_data.number_of_people} exceeds tour capacity of {tour.max_people}"
+            )
+        await slot_crud.apply_shard_totals(db, [tour])
+        if tour.available_slots >= entry_data.number_of_people:
+            raise ValueError(
+                f"Tour has {tour.available_slots} available slots; book it directly"
+            )
+
+        entry = WaitlistEntry(**entry_data.model_dump(), status="waiting")
+        db.add(entry)
+        await db.commit()
+        return await self.get_entry(db, entry.id)
+
+    async def get_entry(self, db: AsyncSession, entry_id: int) -> Optional[WaitlistEntry]:
+        """Get entry by ID; waiting entries get ``position`` and ``people_ahead``."""
+        entry = await db.get(WaitlistEntry, entry_id)
+        if entry is None:
+            return None
+        entry.position = entry.people_ahead = None
+        if entry.status == "waiting":
+            ahead, people = (await db.execute(
+                select(func.count(), func.coalesce(func.sum(WaitlistEntry.number_of_people), 0))
+                .where(
+                    WaitlistEntry.tour_id == entry.tour_id,
+                    WaitlistEntry.status == "waiting",
+                    WaitlistEntry.id < entry.id,
+                )
+            )).one()
+            entry.position = ahead + 1
+            entry.people_ahead = int(people)
+        return entry
+
+    async def cancel_entry(self, db: AsyncSession, entry_id: int) -> Optional[WaitlistEntry]:
+        """Leave the waitlist. Returns None if there is no waiting entry with this ID."""
+        result = await db.execute(
+            update(WaitlistEntry)
+            .where(WaitlistEntry.id == entry_id, WaitlistEntry.status == "waiting")
+            .values(status="cancelled")
+            .returning(WaitlistEntry.id)
+        )
+        if result.first() is None:
+            await db.rollback()
+            return None
+        await db.commit()
+        return await self.get_entry(db, entry_id)
+
+    async def get_demand(self, db: AsyncSession, tour: Tour) -> dict:
+        """Waiting parties and people of a tour (read through the partial index)."""
+        parties, people = (await db.execute(
+            select(func.count(), func.coalesce(func.sum(WaitlistEntry.number_of_people), 0))
+            .where(WaitlistEntry.tour_id == tour.id, WaitlistEntry.status == "waiting")
+        )).one()
+        return {
+            "tour_id": tour.id,
+            "available_slots": tour.available_slots,
+            "waiting_parties": parties,
+            "waiting_people": int(people),
+        }
+
+    async def get_promotable_tours(self, db: AsyncSession) -> List[int]:
+        """Tours whose first waiting party fits into their free slots (sharded tours always)."""
+        # Parties larger than the tour (max_people lowered after they queued) never block
+        heads = (
+            select(func.min(WaitlistEntry.id).label("id"))
+            .join(Tour, Tour.id == WaitlistEntry.tour_id)
+            .where(WaitlistEntry.status == "waiting", WaitlistEntry.number_of_people <= Tour.max_people)
+            .group_by(WaitlistEntry.tour_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(WaitlistEntry.tour_id)
+            .join(heads, heads.c.id == WaitlistEntry.id)
+            .join(Tour, Tour.id == WaitlistEntry.tour_id)
+            .where(or_(
+                WaitlistEntry.number_of_people <= Tour.available_slots,
+                Tour.slot_shards > 0,
+            ))
+        )
+        return list(result.scalars().all())
+
+    async def promote_tour(self, db: AsyncSession, tour_id: int, batch_size: int = 500) -> int:
+        """
+        Promote waiting parties of a tour into bookings in one transaction.
+
+        Up to ``batch_size`` waiting entries are read in arrival order and
+        taken strictly FIFO: promotion stops at the first party larger than
+        the slots left, so smaller parties behind it cannot overtake it and
+        it is promoted as soon as enough slots are free. Returns the number
+        of parties promoted; call again while it equals ``batch_size``.
+        """
+        # The session is reused across batches: re-read slots, not the identity map
+        tour = await db.get(Tour, tour_id, populate_existing=True)
+        if tour is None:
+            return 0
+        await slot_crud.apply_shard_totals(db, [tour])
+        free = tour.available_slots
+        if free <= 0:
+            await db.rollback()
+            return 0
+
+        result = await db.execute(
+            select(WaitlistEntry.id, WaitlistEntry.number_of_people)
+            .where(
+                WaitlistEntry.tour_id == tour_id,
+                WaitlistEntry.status == "waiting",
+                # A party larger than the tour could never fit and would block the queue
+                WaitlistEntry.number_of_people <= tour.max_people,
+            )
+            .order_by(WaitlistEntry.id)
+            .limit(batch_size)
+        )
+        chosen, taken = [], 0
+        for entry_id, people in result.all():
+            if taken + people > free:
+                break
+            chosen.append(entry_id)
+            taken += people
+        if not chosen:
+            await db.rollback()
+            return 0
+
+        # Claim the entries; concurrently cancelled ones drop out here
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(WaitlistEntry)
+            .where(WaitlistEntry.id.in_(chosen), WaitlistEntry.status == "waiting")
+            .values(status="promoted", promoted_at=now)
+            .returning(WaitlistEntry.id, *_CUSTOMER_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = sorted(result.all())
+        if not claimed:
+            await db.rollback()
+            return 0
+        people = sum(row.number_of_people for row in claimed)
+        try:
+            remaining = await slot_crud.reserve(db, tour, people)
+        except ValueError:
+            # Slots were taken since they were read; the next wake-up retries
+            await db.rollback()
+            return 0
+
+        booking_ids = await self._insert_bookings(db, tour, claimed, now)
+        table = WaitlistEntry.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_entry_id"))
+            .values(booking_id=bindparam("b_booking_id")),
+            [
+                {"b_entry_id": row.id, "b_booking_id": booking_id}
+                for row, booking_id in zip(claimed, booking_ids)
+            ],
+        )
+        await analytics_crud.record_bookings(
+            db, tour, now.date(), len(claimed), people, tour.price * people
+        )
+        await db.commit()
+
+        tour_events.publish(tour_id, available_slots=remaining, price=tour.price)
+        tour_catalogue.update_slots(tour_id, remaining)
+        return len(claimed)
+
+    @staticmethod
+    async def _insert_bookings(
+        db: AsyncSession, tour: Tour, rows: List[Tuple], created_at: datetime
+    ) -> List[int]:
+        """
+        Insert confirmed bookings for claimed entries; returns ids in ``rows`` order.
+
+        Batched multi-row INSERTs (insertmanyvalues). Ids are assigned in row
+        order within the statement, so sorting them restores the mapping;
+        ``sort_by_parameter_order`` would fall back to one INSERT per row on SQLite.
+        """
+        table = Booking.__table__
+        result = await db.execute(
+            insert(table).returning(table.c.id),
+            [
+                {
+                    "tour_id": tour.id,
+                    "customer_name": row.customer_name,
+                    "customer_email": row.customer_email,
+                    "customer_phone": row.customer_phone,
+                    "number_of_people": row.number_of_people,
+                    "notes": row.notes,
+                    "total_price": tour.price * row.number_of_people,
+                    "status": "confirmed",
+                    "booking_date": created_at,
+                    "created_at": created_at,
+                }
+                for row in rows
+            ],
+        )
+        return sorted(result.scalars().all())
+
+
+waitlist_crud = WaitlistCRUD()
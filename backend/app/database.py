@@ -1,3 +1,5 @@
+import os
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
@@ -10,6 +12,12 @@ engine = create_async_engine(
     future=True,
 )
 
+# A child forked from a process that already used the engine (e.g. gunicorn
+# --preload) must not share its pooled connections: start with an empty pool
+# without closing the parent's sockets.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: engine.sync_engine.dispose(close=False))
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
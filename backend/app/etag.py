@@ -0,0 +1,59 @@
+"""Strong ETags for tour responses and conditional GET handling.
+
+Validators are derived from the rows a response is built from rather than
+from the serialized body: every tour write bumps ``updated_at`` and slot
+counters are hashed explicitly (sharded tours change slots without
+touching the tour row), so the ETag changes exactly when the payload does.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from app.models import Tour
+
+
+def tour_etag(tours: Iterable[Tour], *extra: object) -> str:
+    """Strong ETag over the version-relevant columns of ``tours``.
+
+    ``extra`` carries response-level values that are not part of any row,
+    e.g. the total count of a paginated list.
+    """
+    digest = hashlib.sha256()
+    for tour in tours:
+        updated_at = tour.updated_at.isoformat() if tour.updated_at else ""
+        digest.update(
+            f"{tour.id}:{updated_at}:{tour.available_slots}:{tour.slot_shards};".encode()
+        )
+    for value in extra:
+        digest.update(f"{value};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == opaque for candidate in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has ``etag``.
+
+    Otherwise set the validator headers on ``response`` and return None,
+    letting the route render the full body.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
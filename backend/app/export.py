@@ -0,0 +1,69 @@
+"""Streaming CSV / NDJSON export of whole tables.
+
+Rows are read through a server-side cursor in partitions of
+``settings.export_batch_size`` plain column tuples (no ORM objects, no
+identity map), and each partition is encoded into one chunk, so memory
+stays constant regardless of table size. The export opens its own session:
+the request-scoped one is closed before a streaming body is sent.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(columns: Sequence[str], rows: Iterable[tuple]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows: Iterable[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def stream_rows(query: Select, fmt: str) -> AsyncIterator[bytes]:
+    """Yield ``query`` results encoded as ``fmt``, one chunk per cursor partition."""
+    columns: List[str] = [column.key for column in query.selected_columns]
+    if fmt == "csv":
+        # Header goes out before the query runs
+        yield _encode_csv([columns])
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            query.execution_options(yield_per=settings.export_batch_size)
+        )
+        async for rows in result.partitions():
+            yield _encode_csv(rows) if fmt == "csv" else _encode_ndjson(columns, rows)
+
+
+def export_response(query: Select, fmt: str, name: str) -> StreamingResponse:
+    """Streaming attachment response for ``query`` in ``fmt`` (ndjson or csv)."""
+    return StreamingResponse(
+        stream_rows(query, fmt),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
@@ -0,0 +1,231 @@
+"""Result cache for GET /tours listing pages.
+
+Listing traffic concentrates on a few filter combinations (no filters,
+one country, first page), so rendered pages are cached under a normalized
+key of (filters, sort, page). Every published tour change (bookings,
+holds, new tours, shard changes) bumps a catalogue version counter, which
+drops all entries and discards pages rendered concurrently with the write;
+a short TTL bounds staleness from writes made by other worker processes. The cache is an LRU bounded by the
+total size of cached bodies rather than by entry count.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import tour_crud
+from app.etag import tour_etag
+from app.metrics import registry
+from app.models.tour import normalize_country
+from app.pubsub import tour_events
+from app.schemas.tour import TourListResponse
+
+# The only listing order today; part of the key so new sorts cannot collide
+DEFAULT_SORT = "created_at_desc"
+# Rough per-entry bookkeeping cost on top of the body (key tuple, dict slot)
+_ENTRY_OVERHEAD = 256
+
+ListingKey = Tuple
+
+
+@dataclass
+class CachedPage:
+    """Rendered listing page: JSON body and its ETag."""
+    etag: str
+    body: bytes
+    stored_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.etag) + _ENTRY_OVERHEAD
+
+
+def make_key(
+    page: int,
+    page_size: int,
+    country: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    date_mode: str = "within",
+    within_days: Optional[int] = None,
+    sort: str = DEFAULT_SORT,
+) -> ListingKey:
+    """Normalized key: equivalent requests (case, 0 vs no min price, 10 vs 10.0) share it."""
+    return (
+        normalize_country(country) or None,
+        float(min_price) if min_price else None,
+        float(max_price) if max_price is not None else None,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        date_mode,
+        within_days if date_mode == "starts_within" else None,
+        sort,
+        page,
+        page_size,
+    )
+
+
+async def render_tour_list(db: AsyncSession, key: ListingKey) -> CachedPage:
+    """Run the listing query for ``key`` and render the response body."""
+    (country, min_price, max_price, start_date, end_date,
+     date_mode, within_days, _, page, page_size) = key
+    tours, total = await tour_crud.get_tours(
+        db=db,
+        skip=(page - 1) * page_size,
+        limit=page_size,
+        country=country,
+        min_price=min_price,
+        max_price=max_price,
+        start_date=datetime.fromisoformat(start_date) if start_date else None,
+        end_date=datetime.fromisoformat(end_date) if end_date else None,
+        date_mode=date_mode,
+        within_days=within_days,
+    )
+    body = TourListResponse(
+        tours=tours,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=math.ceil(total / page_size) if total > 0 else 0,
+    ).model_dump_json()
+    return CachedPage(etag=tour_etag(tours, total), body=body.encode())
+
+
+class ListingCache:
+    """Byte-bounded LRU of rendered listing pages, invalidated by a version counter."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[ListingKey, CachedPage]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def bump_version(self, *args, **kwargs) -> None:
+        """Invalidate every cached page (fits both ``tour_events.add_listener`` callbacks)."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key: ListingKey) -> Optional[CachedPage]:
+        """Cached page for ``key`` unless it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.stored_at > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: ListingKey, version: int, entry: CachedPage) -> None:
+        """Store a page rendered at catalogue ``version`` (dropped if a write happened since)."""
+        if not self.enabled or entry.size > self.max_bytes:
+            return
+        entry.stored_at = time.monotonic()
+        with self._lock:
+            # A write bumped the version while the page was rendered
+            if version != self.version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: ListingKey) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    async def load(self, db: AsyncSession, key: ListingKey) -> CachedPage:
+        """Return the cached page for ``key``, rendering and storing it on a miss."""
+        entry = self.get(key)
+        if entry is None:
+            version = self.version
+            entry = await render_tour_list(db, key)
+            self.put(key, version, entry)
+        return entry
+
+    async def warm(self, db: AsyncSession, top_n: int, page_sizes: List[int]) -> int:
+        """
+        Pre-render the first page of the ``top_n`` most likely combinations.
+
+        Candidates are no filters and then each country by number of tours,
+        for every page size in ``page_sizes``. Returns the number of pages stored.
+        """
+        countries = await tour_crud.get_country_counts(db)
+        keys = [
+            make_key(page=1, page_size=page_size, country=country)
+            for country in [None] + [name for name, _ in countries]
+            for page_size in page_sizes
+        ][:top_n]
+        for key in keys:
+            version = self.version
+            self.put(key, version, await render_tour_list(db, key))
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+listing_cache = ListingCache(
+    max_bytes=settings.listing_cache_max_bytes if settings.listing_cache_enabled else 0,
+    ttl_seconds=settings.listing_cache_ttl_seconds,
+)
+tour_events.add_listener(listing_cache.bump_version, listing_cache.bump_version)
+
+
+def _collect_listing_cache() -> List[str]:
+    stats = listing_cache.stats()
+    return [
+        "# HELP listing_cache_requests_total Tour listing cache lookups by result.",
+        "# TYPE listing_cache_requests_total counter",
+        f'listing_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'listing_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        "# HELP listing_cache_evictions_total Listing pages evicted to stay within the size bound.",
+        "# TYPE listing_cache_evictions_total counter",
+        f"listing_cache_evictions_total {stats['evictions']}",
+        "# HELP listing_cache_bytes Size of cached listing pages.",
+        "# TYPE listing_cache_bytes gauge",
+        f"listing_cache_bytes {stats['bytes']}",
+        "# HELP listing_cache_entries Cached listing pages.",
+        "# TYPE listing_cache_entries gauge",
+        f"listing_cache_entries {stats['entries']}",
+        "# HELP listing_cache_version Catalogue version (bumped by tour and booking writes).",
+        "# TYPE listing_cache_version gauge",
+        f"listing_cache_version {stats['version']}",
+    ]
+
+
+registry.register_collector(_collect_listing_cache)
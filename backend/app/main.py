@@ -1,8 +1,82 @@
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.config import settings
+from app.database import engine
 from app.api.v1 import api_router
+from app.metrics import MetricsMiddleware, instrument_engine, registry
+from app.catalogue import tour_catalogue
+from app.listing_cache import listing_cache
+from app.similarity import similarity_index
+from app.tasks import (
+    run_hold_sweeper,
+    run_index_refresh,
+    run_shard_sync,
+    run_waitlist_promoter,
+    warm_listing_cache,
+)
+
+logger = logging.getLogger("app.main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop background tasks.
+
+    Shutdown runs after the server has stopped accepting connections and
+    in-flight requests (bookings included) have finished or hit the
+    graceful-shutdown timeout; then the pool is closed.
+    """
+    tasks = [
+        asyncio.create_task(
+            run_hold_sweeper(
+                settings.hold_sweep_interval_seconds, settings.hold_sweep_batch_size
+            )
+        ),
+        asyncio.create_task(run_shard_sync(settings.shard_sync_interval_seconds)),
+        asyncio.create_task(
+            run_waitlist_promoter(
+                settings.waitlist_promote_interval_seconds, settings.waitlist_promote_batch_size
+            )
+        ),
+    ]
+    if settings.catalogue_enabled:
+        if tour_catalogue.available():
+            tasks.append(asyncio.create_task(
+                run_index_refresh(
+                    tour_catalogue, "tour catalogue", settings.catalogue_refresh_interval_seconds
+                )
+            ))
+        else:
+            logger.warning("CATALOGUE_ENABLED is set but numpy is not installed; using SQL filtering")
+    if settings.similar_tours_enabled:
+        tasks.append(asyncio.create_task(
+            run_index_refresh(
+                similarity_index,
+                "similar tours index",
+                settings.similar_tours_refresh_interval_seconds,
+            )
+        ))
+    if listing_cache.enabled and settings.listing_cache_warm_top_n:
+        tasks.append(asyncio.create_task(
+            warm_listing_cache(
+                settings.listing_cache_warm_top_n, settings.listing_cache_warm_page_sizes
+            )
+        ))
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await engine.dispose()
 
 
 def create_app() -> FastAPI:
@@ -11,6 +85,7 @@ def create_app() -> FastAPI:
         title=settings.app_name,
         version=settings.app_version,
         debug=settings.debug,
+        lifespan=lifespan,
     )
 
     # Configure CORS
@@ -22,6 +97,11 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Collect request latency, response size and DB usage metrics
+    if settings.metrics_enabled:
+        instrument_engine(engine, settings.slow_query_threshold_ms)
+        app.add_middleware(MetricsMiddleware)
+
     # Include API router
     app.include_router(api_router, prefix="/api/v1")
 
@@ -30,6 +110,13 @@ def create_app() -> FastAPI:
         """Health check endpoint."""
         return {"status": "ok", "version": settings.app_version}
 
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus metrics endpoint."""
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
     return app
 
 
@@ -1,3 +1,19 @@
 from app.models.tour import Tour, Booking
+from app.models.availability import TourAvailabilityDay
+from app.models.idempotency import IdempotencyKey
+from app.models.hold import SeatHold
+from app.models.slot_shard import TourSlotShard
+from app.models.analytics import BookingDailyStat, TourBookingStat
+from app.models.waitlist import WaitlistEntry
 
-__all__ = ["Tour", "Booking"]
+__all__ = [
+    "Tour",
+    "Booking",
+    "TourAvailabilityDay",
+    "IdempotencyKey",
+    "SeatHold",
+    "TourSlotShard",
+    "BookingDailyStat",
+    "TourBookingStat",
+    "WaitlistEntry",
+]
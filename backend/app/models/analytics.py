@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+
+from app.database import Base
+
+
+class BookingDailyStat(Base):
+    """
+    Confirmed bookings rolled up per day and country.
+
+    Updated in the transaction that creates a booking, so dashboards read
+    one row per (day, country) instead of scanning bookings.
+    """
+
+    __tablename__ = "booking_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    country_normalized = Column(String(100), primary_key=True)
+    # Display name of the country (as written on the most recent tour)
+    country = Column(String(100), nullable=False)
+    bookings = Column(Integer, nullable=False, default=0)
+    people = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<BookingDailyStat(day={self.day}, country='{self.country}', bookings={self.bookings})>"
+
+
+class TourBookingStat(Base):
+    """Confirmed bookings rolled up per tour."""
+
+    __tablename__ = "tour_booking_stats"
+
+    tour_id = Column(Integer, ForeignKey("tours.id"), primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0)
+    people = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_tour_booking_stats_people", "people"),
+    )
+
+    def __repr__(self):
+        return f"<TourBookingStat(tour_id={self.tour_id}, bookings={self.bookings})>"
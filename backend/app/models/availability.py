@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
+
+from app.database import Base
+
+
+class TourAvailabilityDay(Base):
+    """
+    Day-bucketed tour availability.
+
+    One row per tour per day the tour runs (start_date..end_date inclusive),
+    kept in sync with Tour.available_slots so calendar queries read a single
+    indexed range instead of filtering tours.
+    """
+
+    __tablename__ = "tour_availability_days"
+
+    tour_id = Column(Integer, ForeignKey("tours.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    country_normalized = Column(String(100), nullable=False)
+    available_slots = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_tour_availability_days_country_day", "country_normalized", "day"),
+        Index("ix_tour_availability_days_day", "day"),
+    )
+
+    def __repr__(self):
+        return f"<TourAvailabilityDay(tour_id={self.tour_id}, day={self.day}, slots={self.available_slots})>"
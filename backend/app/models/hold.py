@@ -0,0 +1,36 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class SeatHold(Base):
+    """Time-limited reservation of tour slots before a booking is confirmed."""
+
+    __tablename__ = "seat_holds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tour_id = Column(Integer, ForeignKey("tours.id"), nullable=False, index=True)
+    number_of_people = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="active")  # active, confirmed, released, expired
+    expires_at = Column(DateTime, nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    tour = relationship("Tour")
+
+    __table_args__ = (
+        # Partial index: the sweeper only ever reads active holds by expiry,
+        # so finished holds do not grow the index it scans.
+        Index(
+            "ix_seat_holds_active_expires_at",
+            "expires_at",
+            sqlite_where=text("status = 'active'"),
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<SeatHold(id={self.id}, tour_id={self.tour_id}, status='{self.status}')>"
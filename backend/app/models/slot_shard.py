@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, ForeignKey
+
+from app.database import Base
+
+
+class TourSlotShard(Base):
+    """
+    Part of a hot tour's capacity.
+
+    When Tour.slot_shards > 0 the free slots of the tour live in these rows
+    instead of Tour.available_slots, so concurrent bookings contend per shard
+    rather than on the single tours row.
+    """
+
+    __tablename__ = "tour_slot_shards"
+
+    tour_id = Column(Integer, ForeignKey("tours.id"), primary_key=True)
+    shard_no = Column(Integer, primary_key=True)
+    available_slots = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<TourSlotShard(tour_id={self.tour_id}, shard_no={self.shard_no}, slots={self.available_slots})>"
@@ -1,10 +1,31 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import DDL, Column, Integer, String, Float, Text, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm import relationship, validates
 
 from app.database import Base
 
 
+def normalize_country(country: Optional[str]) -> Optional[str]:
+    """Normalize country name for case-insensitive equality lookups."""
+    if country is None:
+        return None
+    return country.strip().lower()
+
+
+# Date filter modes of TourCRUD.get_tours:
+# within - tour lies inside [start_date, end_date];
+# overlaps - tour runs at any point of [start_date, end_date];
+# starts_within - tour starts within within_days days from start_date (default: today)
+DATE_MODES = ("within", "overlaps", "starts_within")
+
+
+def starts_within_range(start_date: Optional[datetime], within_days: int) -> Tuple[datetime, datetime]:
+    """Start-date window of the starts_within mode; defaults to today 00:00 UTC."""
+    origin = start_date or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return origin, origin + timedelta(days=within_days)
+
+
 class Tour(Base):
     """Tour model."""
 
@@ -13,25 +34,82 @@ class Tour(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
     country = Column(String(100), nullable=False, index=True)
+    country_normalized = Column(String(100), nullable=False)
     city = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     price = Column(Float, nullable=False, index=True)
     duration_days = Column(Integer, nullable=False)
     max_people = Column(Integer, nullable=False)
     image_url = Column(String(500))
-    start_date = Column(DateTime, nullable=False, index=True)
+    start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False, index=True)
     available_slots = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Number of slot counter shards (0 = slots are kept in available_slots)
+    slot_shards = Column(Integer, nullable=False, default=0, server_default="0")
+    # Optimistic concurrency for edits (PATCH, repricing); bookings do not bump it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     bookings = relationship("Booking", back_populates="tour")
 
+    # Composite indexes matching TourCRUD.get_tours filter + sort combinations
+    __table_args__ = (
+        # country filter, ORDER BY created_at DESC
+        Index("ix_tours_country_norm_created_at", "country_normalized", "created_at"),
+        # country + price/date filters; covers the COUNT(*) query
+        Index(
+            "ix_tours_country_norm_price_dates",
+            "country_normalized",
+            "price",
+            "start_date",
+            "end_date",
+        ),
+        # country + date filters (any date_mode): count and page ids index-only
+        Index(
+            "ix_tours_country_norm_dates_created_at",
+            "country_normalized",
+            "start_date",
+            "end_date",
+            "created_at",
+        ),
+        # date filters without country; created_at makes paging index-only
+        Index("ix_tours_dates_created_at", "start_date", "end_date", "created_at"),
+    )
+
+    @validates("country")
+    def _sync_country_normalized(self, key, value):
+        self.country_normalized = normalize_country(value)
+        return value
+
     def __repr__(self):
         return f"<Tour(id={self.id}, title='{self.title}', country='{self.country}')>"
 
 
+# Interval support for date_mode=overlaps (tour runs at any point of [A, B]).
+# SQLite: an expression index on the tour span, so the longest span is one
+# index lookup and the overlap becomes the bounded range scan
+# start_date BETWEEN A - longest span AND B on ix_tours_dates_created_at.
+# PostgreSQL: a GiST index on the timestamp range. Created here for
+# create_all and by migration 0008 for existing databases.
+SQLITE_SPAN_INDEX_DDL = (
+    "CREATE INDEX ix_tours_span_days ON tours (julianday(end_date) - julianday(start_date))"
+)
+POSTGRESQL_PERIOD_INDEX_DDL = (
+    "CREATE INDEX ix_tours_period_gist ON tours USING gist (tsrange(start_date, end_date, '[]'))"
+)
+
+event.listen(
+    Tour.__table__, "after_create", DDL(SQLITE_SPAN_INDEX_DDL).execute_if(dialect="sqlite")
+)
+event.listen(
+    Tour.__table__,
+    "after_create",
+    DDL(POSTGRESQL_PERIOD_INDEX_DDL).execute_if(dialect="postgresql"),
+)
+
+
 class Booking(Base):
     """Booking model."""
 
@@ -40,7 +118,7 @@ class Booking(Base):
     id = Column(Integer, primary_key=True, index=True)
     tour_id = Column(Integer, ForeignKey("tours.id"), nullable=False, index=True)
     customer_name = Column(String(100), nullable=False)
-    customer_email = Column(String(100), nullable=False, index=True)
+    customer_email = Column(String(100), nullable=False)
     customer_phone = Column(String(20), nullable=False)
     number_of_people = Column(Integer, nullable=False)
     total_price = Column(Float, nullable=False)
@@ -52,5 +130,10 @@ class Booking(Base):
     # Relationships
     tour = relationship("Tour", back_populates="bookings")
 
+    __table_args__ = (
+        # Booking history by email, newest first (cursor pagination)
+        Index("ix_bookings_customer_email_created_at", "customer_email", "created_at"),
+    )
+
     def __repr__(self):
         return f"<Booking(id={self.id}, customer_name='{self.customer_name}', tour_id={self.tour_id})>"
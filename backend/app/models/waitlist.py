@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class WaitlistEntry(Base):
+    """A party waiting for slots of a sold-out tour; promoted into a booking in arrival order."""
+
+    __tablename__ = "waitlist_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tour_id = Column(Integer, ForeignKey("tours.id"), nullable=False)
+    customer_name = Column(String(100), nullable=False)
+    customer_email = Column(String(100), nullable=False)
+    customer_phone = Column(String(20), nullable=False)
+    number_of_people = Column(Integer, nullable=False)
+    notes = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default="waiting")  # waiting, promoted, cancelled
+    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    promoted_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    tour = relationship("Tour")
+
+    __table_args__ = (
+        # Partial index: promotion and queue positions only read waiting
+        # entries of one tour in id (arrival) order.
+        Index(
+            "ix_waitlist_entries_waiting_tour_id",
+            "tour_id",
+            "id",
+            sqlite_where=text("status = 'waiting'"),
+            postgresql_where=text("status = 'waiting'"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<WaitlistEntry(id={self.id}, tour_id={self.tour_id}, status='{self.status}')>"
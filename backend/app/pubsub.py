@@ -0,0 +1,142 @@
+"""In-process pub/sub for tour slot and price changes.
+
+Writers publish the new state of a tour after commit; subscribers (SSE
+connections) receive it, and listeners (in-process caches) are called
+synchronously so they can invalidate. Each subscription keeps only the latest pending
+state per tour, so slow clients never build up a backlog and a publish is
+O(subscribers of that tour) with a single JSON encoding.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.metrics import registry
+
+
+class Subscription:
+    """Set of tour ids watched by one client with coalesced pending updates."""
+
+    def __init__(self, tour_ids: Iterable[int]):
+        self.tour_ids = frozenset(tour_ids)
+        self._pending: Dict[int, str] = {}
+        self._event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def _push(self, tour_id: int, message: str) -> None:
+        self._pending[tour_id] = message
+        self._event.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[int, str]:
+        """Wait for updates and return {tour_id: message}; empty on timeout."""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        self._event.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class TourEventBroker:
+    """Fans out tour state changes to subscriptions."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._listeners: List[Tuple[Callable[..., None], Optional[Callable[..., None]]]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(
+        self,
+        callback: Callable[..., None],
+        batch_callback: Optional[Callable[[Dict[int, dict]], None]] = None,
+    ) -> None:
+        """
+        Call ``callback(tour_id, **state)`` on every publish.
+
+        ``publish_many`` calls ``batch_callback({tour_id: state})`` once per
+        batch instead when given (e.g. caches that drop everything anyway).
+        """
+        self._listeners.append((callback, batch_callback))
+
+    def subscribe(self, tour_ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(tour_ids)
+        with self._lock:
+            for tour_id in subscription.tour_ids:
+                self._subscribers[tour_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for tour_id in subscription.tour_ids:
+                subscribers = self._subscribers.get(tour_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[tour_id]
+
+    def publish(self, tour_id: int, **state) -> None:
+        """Publish new state (e.g. available_slots, price) of a tour."""
+        for callback, _ in self._listeners:
+            callback(tour_id, **state)
+        self._fan_out(tour_id, state)
+
+    def publish_many(self, states: Dict[int, dict]) -> None:
+        """Publish new state of many tours (bulk writes); batch listeners run once."""
+        if not states:
+            return
+        for callback, batch_callback in self._listeners:
+            if batch_callback is not None:
+                batch_callback(states)
+            else:
+                for tour_id, state in states.items():
+                    callback(tour_id, **state)
+        for tour_id in self.watched(states):
+            self._fan_out(tour_id, states[tour_id])
+
+    def _fan_out(self, tour_id: int, state: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(tour_id, ()))
+        if not subscribers:
+            return
+        message = json.dumps({"tour_id": tour_id, **state}, default=str)
+        for subscription in subscribers:
+            # Writers may run outside the subscriber's event loop thread
+            if _in_loop(subscription._loop):
+                subscription._push(tour_id, message)
+            else:
+                subscription._loop.call_soon_threadsafe(subscription._push, tour_id, message)
+
+    def watched(self, tour_ids: Iterable[int]) -> List[int]:
+        """Return those of tour_ids that have at least one subscriber."""
+        with self._lock:
+            return [tour_id for tour_id in tour_ids if tour_id in self._subscribers]
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+tour_events = TourEventBroker()
+
+
+def _collect_subscribers() -> List[str]:
+    return [
+        "# HELP tour_event_subscribers Connected tour update subscribers.",
+        "# TYPE tour_event_subscribers gauge",
+        f"tour_event_subscribers {tour_events.subscriber_count}",
+    ]
+
+
+registry.register_collector(_collect_subscribers)
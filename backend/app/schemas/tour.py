@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime, timezone
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator, model_validator
 
 
 # Tour Schemas
@@ -26,16 +26,129 @@ class TourCreate(TourBase):
     pass
 
 
+class TourUpdate(BaseModel):
+    """
+    Schema for editing a tour (only the fields sent are changed).
+
+    ``version`` is the version the edit is based on; the update is
+    rejected if the tour was changed since. Changing ``max_people``
+    adds or removes the difference to the free slots.
+    """
+
+    version: int = Field(..., ge=1, description="Version of the tour the edit is based on")
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    country: Optional[str] = Field(None, min_length=1, max_length=100)
+    city: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = Field(None, min_length=1)
+    price: Optional[float] = Field(None, gt=0)
+    duration_days: Optional[int] = Field(None, gt=0)
+    max_people: Optional[int] = Field(None, gt=0)
+    image_url: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def _to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored dates are naive UTC; an offset in the request is converted, not dropped
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def _check_values(self):
+        # Omitted fields stay unchanged; only image_url may be cleared with null
+        nulls = sorted(
+            name for name in self.model_fields_set - {"image_url"}
+            if getattr(self, name) is None
+        )
+        if nulls:
+            raise ValueError(f"Fields cannot be null: {', '.join(nulls)}")
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
+class PriceRule(BaseModel):
+    """Price change for tours matching all given conditions (none: every tour)."""
+
+    percent: float = Field(..., gt=-100, le=1000, description="Change in percent, e.g. -10 for 10% off")
+    country: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0, description="Current price at least")
+    max_price: Optional[float] = Field(None, ge=0, description="Current price at most")
+    start_from: Optional[datetime] = Field(None, description="Tour starts at or after")
+    start_to: Optional[datetime] = Field(None, description="Tour starts before")
+
+
+class TourReprice(BaseModel):
+    """
+    Schema for bulk repricing.
+
+    Tours are selected by the list filters and/or ``tour_ids``. Either
+    ``percent`` applies to all of them, or ``rules`` are checked in order
+    and the first matching rule applies (tours matching no rule are kept).
+    """
+
+    percent: Optional[float] = Field(None, gt=-100, le=1000, description="Change in percent for all selected tours")
+    rules: Optional[List[PriceRule]] = Field(None, min_length=1, max_length=50)
+    tour_ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    country: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def _one_change(self):
+        if (self.percent is None) == (self.rules is None):
+            raise ValueError("Provide either percent or rules")
+        return self
+
+
+class TourRepriceResponse(BaseModel):
+    """Result of a bulk repricing."""
+
+    updated: int
+
+
 class TourResponse(TourBase):
     """Schema for tour response."""
 
     id: int
+    slot_shards: int = 0
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class TourBatchResponse(BaseModel):
+    """Schema for bulk tour lookup; tours keep the order of requested ids."""
+
+    tours: List[TourResponse]
+    missing_ids: List[int] = []
+
+
+class SimilarTour(TourResponse):
+    """Tour recommended as similar, with its similarity score (0..1)."""
+
+    score: float
+
+
+class SimilarToursResponse(BaseModel):
+    """Schema for similar tours of a tour, most similar first."""
+
+    tour_id: int
+    tours: List[SimilarTour]
+
+
+class SlotShardsUpdate(BaseModel):
+    """Schema for enabling or disabling sharded slot counters of a tour."""
+
+    shards: int = Field(..., ge=0, le=64, description="Number of shards, 0 disables")
+
+
 class TourListResponse(BaseModel):
     """Schema for list of tours with pagination."""
 
@@ -82,3 +195,182 @@ class BookingResponse(BookingBase):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BookingBulkCancel(BaseModel):
+    """Schema for cancelling bookings of one tour."""
+
+    tour_id: int = Field(..., gt=0)
+    booking_ids: Optional[List[int]] = Field(
+        None, min_length=1, description="Only these bookings; all confirmed bookings of the tour if omitted"
+    )
+
+
+class BookingBulkCancelResponse(BaseModel):
+    """Result of a bulk cancellation."""
+
+    tour_id: int
+    cancelled: int
+    booking_ids: List[int]
+    available_slots: int
+
+
+class TourSummary(BaseModel):
+    """Short tour info embedded into booking history."""
+
+    id: int
+    title: str
+    country: str
+    city: str
+    price: float
+    start_date: datetime
+    end_date: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BookingHistoryItem(BookingResponse):
+    """Booking in history list with optional tour summary."""
+
+    tour: Optional[TourSummary] = None
+
+
+class BookingListResponse(BaseModel):
+    """Schema for cursor-paginated booking history."""
+
+    bookings: List[BookingHistoryItem]
+    next_cursor: Optional[str] = None
+
+
+# Hold Schemas
+class HoldCreate(BaseModel):
+    """Schema for holding tour slots."""
+
+    tour_id: int = Field(..., gt=0)
+    number_of_people: int = Field(..., gt=0)
+    ttl_minutes: Optional[int] = Field(None, gt=0, description="Hold duration in minutes")
+
+
+class HoldConfirm(BaseModel):
+    """Schema for confirming a hold into a booking."""
+
+    customer_name: str = Field(..., min_length=1, max_length=100)
+    customer_email: EmailStr
+    customer_phone: str = Field(..., min_length=1, max_length=20)
+    notes: Optional[str] = None
+
+
+class HoldResponse(BaseModel):
+    """Schema for hold response."""
+
+    id: int
+    tour_id: int
+    number_of_people: int
+    status: str
+    expires_at: datetime
+    booking_id: Optional[int] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Waitlist Schemas
+class WaitlistCreate(BookingCreate):
+    """Schema for joining the waitlist of a sold-out tour."""
+
+
+class WaitlistEntryResponse(BookingBase):
+    """Schema for waitlist entry response."""
+
+    id: int
+    tour_id: int
+    status: str
+    booking_id: Optional[int] = None
+    position: Optional[int] = Field(None, description="1-based place in the queue while waiting")
+    people_ahead: Optional[int] = Field(None, description="People queued ahead while waiting")
+    created_at: datetime
+    promoted_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WaitlistDemandResponse(BaseModel):
+    """Waiting demand for one tour."""
+
+    tour_id: int
+    available_slots: int
+    waiting_parties: int
+    waiting_people: int
+
+
+# Availability Schemas
+class TourDayAvailability(BaseModel):
+    """Available slots of a single tour on a day."""
+
+    tour_id: int
+    available_slots: int
+
+
+class DayAvailability(BaseModel):
+    """Availability summary for a single day."""
+
+    date: date
+    available_slots: int
+    tours: List[TourDayAvailability]
+
+
+class AvailabilityCalendarResponse(BaseModel):
+    """Schema for per-day availability calendar."""
+
+    country: Optional[str] = None
+    start_date: date
+    end_date: date
+    days: List[DayAvailability]
+
+
+# Analytics Schemas
+class RevenueTotals(BaseModel):
+    """Confirmed bookings, travellers and revenue over a period."""
+
+    bookings: int = 0
+    people: int = 0
+    revenue: float = 0.0
+
+
+class CountryRevenue(RevenueTotals):
+    """Totals of one country over the requested window."""
+
+    country: str
+
+
+class DailyRevenue(CountryRevenue):
+    """Totals of one country on one day."""
+
+    date: date
+
+
+class TourOccupancy(BaseModel):
+    """Current occupancy and booking totals of a tour."""
+
+    tour_id: int
+    title: str
+    country: str
+    max_people: int
+    available_slots: int
+    occupied: int
+    occupancy_rate: float
+    bookings: int
+    people: int
+    revenue: float
+
+
+class AnalyticsResponse(BaseModel):
+    """Schema for revenue, volume and occupancy dashboards."""
+
+    start_date: date
+    end_date: date
+    country: Optional[str] = None
+    totals: RevenueTotals
+    countries: List[CountryRevenue]
+    daily: List[DailyRevenue]
+    tours: List[TourOccupancy]
@@ -0,0 +1,357 @@
+"""Precomputed "similar tours" neighbours.
+
+Each tour is described by a feature set: country, city, log price,
+duration, start date and hashed TF-IDF terms of title and description.
+The similarity of two tours is a weighted sum of per-feature similarities
+(equality for country/city, exponential decay of the difference for
+numbers and dates, cosine for terms). All pairs are scored block by block
+with NumPy and only the top ``settings.similar_tours_k`` neighbours of
+every tour are kept, so a request is a dict lookup.
+
+When a tour is added or its features change, only that tour's row is
+scored against the catalogue; other tours' neighbour lists are patched
+where the tour enters them, and recomputed where it was already present.
+A refresh that brings many changed tours at once (bulk repricing) updates
+the features and re-scores every list in a worker thread instead.
+
+Work done in a worker thread (the initial build, bulk refreshes) runs on a
+copy of the index; the live index keeps answering and taking single-tour
+upserts on the event loop meanwhile. Back on the loop, those upserts are
+replayed on the copy and it replaces the live state in one step, so a
+reader never sees arrays from two different states.
+"""
+
+import asyncio
+import math
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.tour import Tour
+
+# Feature weights (sum to 1, so scores are in [0, 1])
+W_COUNTRY = 0.30
+W_CITY = 0.15
+W_TERMS = 0.25
+W_PRICE = 0.15
+W_DURATION = 0.05
+W_DATES = 0.10
+# Difference at which a numeric similarity falls to 1/e
+PRICE_SCALE = 0.5  # in log price: ~1.65x more expensive
+DURATION_SCALE = 3.0  # days
+DATES_SCALE = 30.0  # days between start dates
+
+TERM_DIMS = 256
+BLOCK_SIZE = 256
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+_COLUMNS = (
+    Tour.id,
+    Tour.country_normalized,
+    Tour.city,
+    Tour.price,
+    Tour.duration_days,
+    Tour.start_date,
+    Tour.title,
+    Tour.description,
+    Tour.updated_at,
+)
+
+# Everything build/upsert write; swapped as a whole after off-loop work
+_STATE = (
+    "ready", "watermark", "_rows", "_features", "_idf", "_default_idf", "_codes",
+    "ids", "country", "city", "price", "duration", "start", "terms", "top_ids", "top_scores",
+)
+
+Neighbours = List[Tuple[int, float]]
+
+
+def _terms(title: str, description: str) -> List[str]:
+    return _TOKEN_RE.findall(f"{title} {description}".lower())
+
+
+def _features(row: tuple) -> tuple:
+    """The columns similarity depends on (used to skip unchanged tours)."""
+    return tuple(row[1:8])
+
+
+class SimilarityIndex:
+    """Feature matrix of all tours and the top-K neighbours of each."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        self._rows: Dict[int, int] = {}
+        self._features: Dict[int, tuple] = {}
+        self._idf: Dict[str, float] = {}
+        self._default_idf = 1.0
+        self._codes: Dict[str, int] = {}
+        # Serializes off-loop jobs and refreshes; rows upserted meanwhile go to _pending
+        self._job_lock = asyncio.Lock()
+        self._pending: Optional[List[tuple]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # Feature encoding
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._codes)
+        return code
+
+    def _term_vector(self, terms: List[str]) -> np.ndarray:
+        vector = np.zeros(TERM_DIMS, dtype=np.float32)
+        for term, count in Counter(terms).items():
+            # crc32, not hash(): stable across processes
+            vector[zlib.crc32(term.encode()) % TERM_DIMS] += count * self._idf.get(term, self._default_idf)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _encode(self, row: tuple) -> tuple:
+        _, country, city, price, duration, start_date, title, description = row[:8]
+        return (
+            self._code(country),
+            self._code((city or "").strip().lower()),
+            math.log(max(price, 1.0)),
+            float(duration),
+            start_date.toordinal() + start_date.hour / 24,
+            self._term_vector(_terms(title, description or "")),
+        )
+
+    # Scoring
+
+    def _scores(self, rows: np.ndarray) -> np.ndarray:
+        """Similarity of tours at ``rows`` to every tour, shape (len(rows), N)."""
+        return (
+            W_COUNTRY * (self.country[rows, None] == self.country[None, :])
+            + W_CITY * (self.city[rows, None] == self.city[None, :])
+            + W_TERMS * (self.terms[rows] @ self.terms.T)
+            + W_PRICE * np.exp(-np.abs(self.price[rows, None] - self.price[None, :]) / PRICE_SCALE)
+            + W_DURATION * np.exp(-np.abs(self.duration[rows, None] - self.duration[None, :]) / DURATION_SCALE)
+            + W_DATES * np.exp(-np.abs(self.start[rows, None] - self.start[None, :]) / DATES_SCALE)
+        )
+
+    def _top_k(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``k`` other tours for each of ``rows``, best first; padded with -1 / -inf."""
+        scores = self._scores(rows)
+        scores[np.arange(len(rows)), rows] = -np.inf
+        k = min(self.k, scores.shape[1] - 1)
+        ids = np.full((len(rows), self.k), -1, dtype=np.int64)
+        best = np.full((len(rows), self.k), -np.inf, dtype=np.float64)
+        if k > 0:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            part_scores = np.take_along_axis(scores, part, axis=1)
+            order = np.argsort(-part_scores, axis=1, kind="stable")
+            ids[:, :k] = self.ids[np.take_along_axis(part, order, axis=1)]
+            best[:, :k] = np.take_along_axis(part_scores, order, axis=1)
+        return ids, best
+
+    def _recompute(self, rows: np.ndarray) -> None:
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            self.top_ids[block], self.top_scores[block] = self._top_k(block)
+
+    # Building and maintenance
+
+    def build(self, rows: Iterable[tuple]) -> None:
+        """Replace the index with ``rows`` (tuples in ``_COLUMNS`` order)."""
+        rows = list(rows)
+        documents = [set(_terms(row[6], row[7] or "")) for row in rows]
+        frequency = Counter(term for terms in documents for term in terms)
+        self._default_idf = math.log(len(rows) + 1) + 1
+        self._idf = {term: math.log((len(rows) + 1) / (df + 1)) + 1 for term, df in frequency.items()}
+        self._codes = {}
+        self.watermark = None
+
+        encoded = [self._encode(row) for row in rows]
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.country = np.array([e[0] for e in encoded], dtype=np.int32)
+        self.city = np.array([e[1] for e in encoded], dtype=np.int32)
+        self.price = np.array([e[2] for e in encoded], dtype=np.float64)
+        self.duration = np.array([e[3] for e in encoded], dtype=np.float64)
+        self.start = np.array([e[4] for e in encoded], dtype=np.float64)
+        self.terms = np.array([e[5] for e in encoded], dtype=np.float32).reshape(len(rows), TERM_DIMS)
+        self._rows = {int(tour_id): i for i, tour_id in enumerate(self.ids)}
+        self._features = {row[0]: _features(row) for row in rows}
+        for row in rows:
+            if row[8] is not None and (self.watermark is None or row[8] > self.watermark):
+                self.watermark = row[8]
+
+        self.top_ids = np.empty((len(rows), self.k), dtype=np.int64)
+        self.top_scores = np.empty((len(rows), self.k), dtype=np.float64)
+        self._recompute(np.arange(len(rows)))
+        self.ready = True
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        Build the index from the tours table. Returns the number of tours.
+
+        Scoring is O(N^2), so it runs in a worker thread (NumPy releases the
+        GIL) instead of blocking the event loop.
+        """
+        async with self._job_lock:
+            result = await db.execute(select(*_COLUMNS))
+            await self._off_loop(SimilarityIndex.build, result.all())
+        return len(self)
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply tours changed since the watermark. Returns the number of tours re-scored."""
+        async with self._job_lock:
+            query = select(*_COLUMNS)
+            if self.watermark is not None:
+                query = query.where(Tour.updated_at >= self.watermark)
+            result = await db.execute(query)
+            rows = result.all()
+            if len(rows) > BLOCK_SIZE:
+                return await self._off_loop(SimilarityIndex._upsert_many, rows)
+            return sum(self._upsert(row) for row in rows)
+
+    async def _off_loop(self, work, rows: List[tuple]):
+        """
+        Run ``work(copy, rows)`` on a copy of the index in a worker thread.
+
+        Tours upserted on the loop meanwhile are applied to the live index
+        and recorded; they are replayed on the copy before it is swapped in.
+        Must be called with ``_job_lock`` held.
+        """
+        copy = self._copy()
+        self._pending = []
+        try:
+            result = await asyncio.to_thread(work, copy, rows)
+        finally:
+            pending, self._pending = self._pending, None
+        for row in pending:
+            copy._upsert(row)
+        self.__dict__.update({name: getattr(copy, name) for name in _STATE if hasattr(copy, name)})
+        return result
+
+    def _copy(self) -> "SimilarityIndex":
+        """Index with its own copies of the arrays and lookup dicts."""
+        copy = SimilarityIndex(self.k)
+        for name in _STATE:
+            if hasattr(self, name):
+                value = getattr(self, name)
+                setattr(copy, name, value.copy() if isinstance(value, (np.ndarray, dict)) else value)
+        return copy
+
+    def upsert_tour(self, tour: Tour) -> None:
+        """Add a new tour or re-score one whose features changed."""
+        row = tuple(getattr(tour, column.key) for column in _COLUMNS)
+        if self._pending is not None:
+            self._pending.append(row)
+        if self.ready:
+            self._upsert(row)
+
+    def _upsert(self, row: tuple) -> bool:
+        tour_id = row[0]
+        if row[8] is not None and (self.watermark is None or row[8] > self.watermark):
+            self.watermark = row[8]
+        features = _features(row)
+        if self._features.get(tour_id) == features:
+            return False
+        self._features[tour_id] = features
+
+        country, city, price, duration, start, terms = self._encode(row)
+        r = self._rows.get(tour_id)
+        if r is None:
+            r = self._rows[tour_id] = len(self.ids)
+            self.ids = np.append(self.ids, tour_id)
+            self.country = np.append(self.country, country)
+            self.city = np.append(self.city, city)
+            self.price = np.append(self.price, price)
+            self.duration = np.append(self.duration, duration)
+            self.start = np.append(self.start, start)
+            self.terms = np.vstack([self.terms, terms[None, :]])
+            self.top_ids = np.vstack([self.top_ids, np.full((1, self.k), -1, dtype=np.int64)])
+            self.top_scores = np.vstack([self.top_scores, np.full((1, self.k), -np.inf)])
+        else:
+            self.country[r], self.city[r], self.price[r] = country, city, price
+            self.duration[r], self.start[r], self.terms[r] = duration, start, terms
+
+        rows = np.array([r])
+        scores = self._scores(rows)[0]
+        scores[r] = -np.inf
+        self.top_ids[rows], self.top_scores[rows] = self._top_k(rows)
+
+        # Lists that already hold the tour may need their (K+1)-th best: recompute them
+        holding = np.flatnonzero((self.top_ids == tour_id).any(axis=1))
+        self._recompute(holding)
+        # Lists the tour now enters: replace the worst entry and re-sort the row
+        entering = np.flatnonzero(scores > self.top_scores[:, -1])
+        for j in np.setdiff1d(entering, holding):
+            self.top_ids[j, -1], self.top_scores[j, -1] = tour_id, scores[j]
+            order = np.argsort(-self.top_scores[j], kind="stable")
+            self.top_ids[j], self.top_scores[j] = self.top_ids[j, order], self.top_scores[j, order]
+        return True
+
+    def _upsert_many(self, rows: List[tuple]) -> int:
+        """
+        Apply many changed tours and re-score all neighbour lists.
+
+        Patching lists tour by tour costs O(N) per tour plus recomputing
+        every list that held it; past a block of changes one full pass is
+        cheaper. Returns the number of tours whose features changed.
+        """
+        changed = []
+        for row in rows:
+            if row[8] is not None and (self.watermark is None or row[8] > self.watermark):
+                self.watermark = row[8]
+            features = _features(row)
+            if self._features.get(row[0]) != features:
+                self._features[row[0]] = features
+                changed.append(row)
+        if not changed:
+            return 0
+
+        added = []
+        for row in changed:
+            country, city, price, duration, start, terms = self._encode(row)
+            r = self._rows.get(row[0])
+            if r is None:
+                added.append((row[0], country, city, price, duration, start, terms))
+                continue
+            self.country[r], self.city[r], self.price[r] = country, city, price
+            self.duration[r], self.start[r], self.terms[r] = duration, start, terms
+        if added:
+            for tour_id, *_ in added:
+                self._rows[tour_id] = len(self._rows)
+            columns = list(zip(*added))
+            self.ids = np.append(self.ids, np.array(columns[0], dtype=np.int64))
+            self.country = np.append(self.country, np.array(columns[1], dtype=np.int32))
+            self.city = np.append(self.city, np.array(columns[2], dtype=np.int32))
+            self.price = np.append(self.price, columns[3])
+            self.duration = np.append(self.duration, columns[4])
+            self.start = np.append(self.start, columns[5])
+            self.terms = np.vstack([self.terms, np.array(columns[6], dtype=np.float32)])
+            self.top_ids = np.vstack([self.top_ids, np.full((len(added), self.k), -1, dtype=np.int64)])
+            self.top_scores = np.vstack([self.top_scores, np.full((len(added), self.k), -np.inf)])
+        self._recompute(np.arange(len(self.ids)))
+        return len(changed)
+
+    def contains(self, tour_id: int) -> bool:
+        return tour_id in self._rows
+
+    def similar(self, tour_id: int, limit: Optional[int] = None) -> Optional[Neighbours]:
+        """Precomputed (tour_id, score) neighbours, best first; None for unknown tours."""
+        r = self._rows.get(tour_id)
+        if r is None:
+            return None
+        neighbours = [
+            (int(other), round(float(score), 4))
+            for other, score in zip(self.top_ids[r], self.top_scores[r])
+            if other >= 0
+        ]
+        return neighbours[:limit] if limit is not None else neighbours
+
+
+similarity_index = SimilarityIndex(k=settings.similar_tours_k)
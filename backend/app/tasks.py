@@ -0,0 +1,129 @@
+"""Background maintenance tasks run inside the API process."""
+
+import asyncio
+import logging
+
+from app.database import AsyncSessionLocal
+from app.listing_cache import listing_cache
+from app.crud import hold_crud, slot_crud, waitlist_crud
+from app.pubsub import tour_events
+from app.waitlist import waitlist_queue
+
+logger = logging.getLogger("app.tasks")
+
+
+async def sweep_expired_holds(batch_size: int) -> int:
+    """Release all currently expired holds batch by batch. Returns total released."""
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            released = await hold_crud.expire_holds(db, batch_size=batch_size)
+        total += released
+        if released < batch_size:
+            return total
+
+
+async def run_hold_sweeper(interval_seconds: float, batch_size: int) -> None:
+    """Periodically release expired seat holds until cancelled."""
+    while True:
+        try:
+            released = await sweep_expired_holds(batch_size)
+            if released:
+                logger.info("Released %d expired seat holds", released)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Seat hold sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+async def run_shard_sync(interval_seconds: float) -> None:
+    """Periodically roll sharded slot counters up into the tours table."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                changed = await slot_crud.sync_sharded_tours(db)
+            for tour_id, available_slots in changed:
+                tour_events.publish(tour_id, available_slots=available_slots)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Slot shard sync failed")
+        await asyncio.sleep(interval_seconds)
+
+
+async def promote_waitlists(tour_ids, batch_size: int) -> int:
+    """Promote waitlisted parties of the given tours (all promotable tours if None)."""
+    total = 0
+    async with AsyncSessionLocal() as db:
+        if tour_ids is None:
+            tour_ids = await waitlist_crud.get_promotable_tours(db)
+        for tour_id in sorted(tour_ids):
+            while True:
+                promoted = await waitlist_crud.promote_tour(db, tour_id, batch_size)
+                total += promoted
+                if promoted < batch_size:
+                    break
+    waitlist_queue.promoted += total
+    return total
+
+
+async def run_waitlist_promoter(interval_seconds: float, batch_size: int) -> None:
+    """
+    Promote waitlisted parties when slots free up, until cancelled.
+
+    Wakes on tours marked by ``waitlist_queue``; every ``interval_seconds``
+    without a wake-up (and once at startup) scans all tours instead.
+    """
+    tour_ids = None
+    while True:
+        try:
+            promoted = await promote_waitlists(tour_ids, batch_size)
+            if promoted:
+                logger.info("Promoted %d waitlisted parties", promoted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Waitlist promotion failed")
+        tour_ids = await waitlist_queue.wait(interval_seconds)
+
+
+async def run_index_refresh(index, name: str, interval_seconds: float) -> None:
+    """
+    Load an in-memory tour index, then keep applying changed tours until cancelled.
+
+    ``index`` provides ``ready``, ``load(db)`` and ``refresh(db)`` (see
+    TourCatalogue and SimilarityIndex).
+    """
+    while not index.ready:
+        try:
+            async with AsyncSessionLocal() as db:
+                count = await index.load(db)
+            logger.info("Loaded %d tours into the %s", count, name)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Loading the %s failed", name)
+            await asyncio.sleep(interval_seconds)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                await index.refresh(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Refreshing the %s failed", name)
+
+
+async def warm_listing_cache(top_n: int, page_sizes: list) -> None:
+    """Pre-render the most popular tour listing pages once at startup."""
+    try:
+        async with AsyncSessionLocal() as db:
+            warmed = await listing_cache.warm(db, top_n, page_sizes)
+        logger.info("Pre-rendered %d tour listing pages", warmed)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Tour listing cache warm-up failed")
@@ -0,0 +1,92 @@
+"""Wake-up queue for the waitlist promoter.
+
+Every published tour change with free slots, and every batch of released
+holds, marks the tour as pending; the promoter drains the pending set and
+promotes waitlisted parties of those tours only. When nothing is pending
+for a whole interval it falls back to a full scan, which also covers
+writes made by other worker processes.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.metrics import registry
+from app.pubsub import tour_events
+
+
+class PromotionQueue:
+    """Set of tour ids whose waitlist should be re-checked, with an async wake-up."""
+
+    def __init__(self):
+        self.promoted = 0
+        self._pending: Set[int] = set()
+        self._event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def notify(self, tour_id: int, **state) -> None:
+        """Mark a tour pending if it has free slots (signature fits ``tour_events.add_listener``)."""
+        if state.get("available_slots", 0) > 0:
+            self.notify_many([tour_id])
+
+    def notify_states(self, states: Dict[int, dict]) -> None:
+        """Batch form of ``notify`` for ``tour_events.publish_many``."""
+        self.notify_many(
+            tour_id for tour_id, state in states.items() if state.get("available_slots", 0) > 0
+        )
+
+    def notify_many(self, tour_ids: Iterable[int]) -> None:
+        """Mark tours pending, e.g. after slots were returned to them."""
+        with self._lock:
+            size = len(self._pending)
+            self._pending.update(tour_ids)
+            added = len(self._pending) > size
+        if not added or self._event is None:
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> Optional[Set[int]]:
+        """Wait for pending tours and return them; None on timeout (time for a full scan)."""
+        if self._event is None:
+            self._event = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._event.clear()
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+waitlist_queue = PromotionQueue()
+tour_events.add_listener(waitlist_queue.notify, waitlist_queue.notify_states)
+
+
+def _collect_waitlist() -> List[str]:
+    return [
+        "# HELP waitlist_promoted_total Waitlist entries promoted into bookings.",
+        "# TYPE waitlist_promoted_total counter",
+        f"waitlist_promoted_total {waitlist_queue.promoted}",
+        "# HELP waitlist_pending_tours Tours queued for a waitlist check.",
+        "# TYPE waitlist_pending_tours gauge",
+        f"waitlist_pending_tours {waitlist_queue.pending_count}",
+    ]
+
+
+registry.register_collector(_collect_waitlist)
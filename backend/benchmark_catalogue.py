@@ -0,0 +1,141 @@
+"""Compare SQL and in-memory catalogue filtering for GET /tours.
+
+Builds a throwaway SQLite database with N synthetic tours, then times
+TourCRUD.get_tours for common filter combinations twice: through SQL
+(count + page query) and through the columnar catalogue (mask + slice +
+page lookup by id). Also checks that both paths return the same page.
+
+Usage: python benchmark_catalogue.py [N ...]   (default: 100000 1000000)
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.catalogue import tour_catalogue
+from app.crud.tour import tour_crud
+from app.database import Base
+from app.models import Tour  # noqa: F401  (registers the tables)
+
+COUNTRIES = ["Италия", "Франция", "Испания", "Греция", "Турция", "Египет",
+             "Таиланд", "Япония", "Грузия", "Португалия", "Черногория", "Вьетнам"]
+BASE_DATE = datetime(2026, 1, 1)
+# Same text format SQLAlchemy writes, so SQLite's string comparisons agree
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+REPEAT = 20
+
+CASES = {
+    "no filters": {},
+    "country": {"country": "италия"},
+    "price": {"min_price": 300, "max_price": 900},
+    "country + price": {"country": "Греция", "min_price": 300, "max_price": 900},
+    "dates": {"start_date": datetime(2026, 6, 1), "end_date": datetime(2026, 6, 30)},
+    "country + price + dates": {
+        "country": "Испания", "min_price": 200, "max_price": 1500,
+        "start_date": datetime(2026, 5, 1), "end_date": datetime(2026, 8, 31),
+    },
+    "overlaps": {"date_mode": "overlaps",
+                 "start_date": datetime(2026, 6, 1), "end_date": datetime(2026, 6, 14)},
+    "country + overlaps": {"country": "Греция", "date_mode": "overlaps",
+                           "start_date": datetime(2026, 6, 1), "end_date": datetime(2026, 6, 14)},
+    "starts within": {"date_mode": "starts_within", "within_days": 14,
+                      "start_date": datetime(2026, 6, 1)},
+    "deep page": {"country": "Турция", "skip": 500},
+}
+
+
+def populate(path: str, n: int) -> None:
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+
+    def rows():
+        for i in range(n):
+            country = rng.choice(COUNTRIES)
+            start = BASE_DATE + timedelta(days=rng.randrange(365), hours=rng.randrange(24))
+            days = rng.randrange(3, 15)
+            # Unique, increasing with id, like real inserts
+            created = (BASE_DATE - timedelta(seconds=n - i)).strftime(DATETIME_FORMAT)
+            yield (
+                f"Tour {i}", country, country.lower(), "City", "Synthetic tour",
+                round(rng.uniform(100, 3000), 2), days, 20, None,
+                start.strftime(DATETIME_FORMAT),
+                (start + timedelta(days=days)).strftime(DATETIME_FORMAT),
+                rng.randrange(21), 0, created, created,
+            )
+
+    conn.executemany(
+        "INSERT INTO tours (title, country, country_normalized, city, description, price, "
+        "duration_days, max_people, image_url, start_date, end_date, available_slots, "
+        "slot_shards, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows(),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+async def timed(db: AsyncSession, filters: dict) -> tuple:
+    filters = {"limit": 10, **filters}
+    samples = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        tours, total = await tour_crud.get_tours(db, **filters)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, [t.id for t in tours], total
+
+
+async def run(n: int) -> bool:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"\n=== {n:,} tours ===")
+    started = time.perf_counter()
+    populate(path, n)
+    print(f"populate: {time.perf_counter() - started:.1f}s")
+
+    ok = True
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session() as db:
+        tour_catalogue.ready = False
+        sql = {name: await timed(db, filters) for name, filters in CASES.items()}
+
+        started = time.perf_counter()
+        await tour_catalogue.load(db)
+        print(f"catalogue load: {time.perf_counter() - started:.1f}s, "
+              f"{tour_catalogue.memory_bytes() / 2**20:.1f} MiB")
+        mem = {name: await timed(db, filters) for name, filters in CASES.items()}
+        tour_catalogue.ready = False
+
+        print(f"{'case':<26}{'total':>9}{'sql ms':>10}{'catalogue ms':>14}{'speedup':>9}")
+        for name in CASES:
+            sql_ms, sql_ids, sql_total = sql[name]
+            mem_ms, mem_ids, mem_total = mem[name]
+            same = sql_total == mem_total and sql_ids == mem_ids
+            ok &= same
+            print(f"{name:<26}{sql_total:>9}{sql_ms:>10.2f}{mem_ms:>14.2f}{sql_ms / mem_ms:>8.1f}x"
+                  + ("" if same else "  MISMATCH"))
+    await engine.dispose()
+    os.remove(path)
+    return ok
+
+
+def main() -> int:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    ok = True
+    for n in sizes:
+        ok &= asyncio.run(run(n))
+    print("\n[OK] Catalogue results match SQL" if ok else "\n[ERROR] Catalogue results differ from SQL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Measure booking throughput on one hot tour and check it is never oversold.
+
+Builds a throwaway SQLite database with one tour of CAPACITY seats and, for
+each shard count (0 = plain tours row), lets WORKERS concurrent sessions
+book random parties of 1-4 through BookingCRUD.create_booking until the
+tour is sold out. While they run, the shard sync (slot_crud.sync_sharded_tours,
+what run_shard_sync does) copies shard sums into the tours row in a loop.
+
+Checks after every sync and at the end:
+  - booked people + free slots == capacity (nothing lost or invented)
+  - booked people <= max_people and no counter below zero (no oversell)
+  - after the final sync the tours row and day buckets agree with the shards
+  - the analytics rollup counts every booking once
+
+SQLite serializes all writers, so throughput here does not grow with the
+shard count; on a server database shards cut row-lock waits per booking.
+The check is the point on SQLite: random shard choice, the multi-shard
+fallback and the sync all race real concurrent sessions.
+
+Usage: python benchmark_contention.py [SHARDS ...]   (default: 0 1 4 16)
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.availability import availability_crud
+from app.crud.slots import slot_crud
+from app.crud.tour import booking_crud
+from app.database import Base
+from app.models import Booking, Tour, TourAvailabilityDay, TourBookingStat, TourSlotShard
+from app.schemas.tour import BookingCreate
+
+CAPACITY = 2000
+WORKERS = 32
+SYNC_INTERVAL_SECONDS = 0.005
+# Same text format SQLAlchemy writes
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def populate(path: str) -> None:
+    """One tour with CAPACITY free seats."""
+    now = datetime.utcnow()
+    start = now + timedelta(days=30)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO tours (id, title, country, country_normalized, city, description, price, "
+        "duration_days, max_people, start_date, end_date, available_slots, slot_shards, "
+        "created_at, updated_at) VALUES (1, 'Tour', 'Италия', 'италия', 'Рим', 'Synthetic tour', "
+        "500.0, 7, ?, ?, ?, ?, 0, ?, ?)",
+        (
+            CAPACITY,
+            start.strftime(DATETIME_FORMAT),
+            (start + timedelta(days=7)).strftime(DATETIME_FORMAT),
+            CAPACITY,
+            now.strftime(DATETIME_FORMAT),
+            now.strftime(DATETIME_FORMAT),
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def reset(session: async_sessionmaker, shards: int) -> None:
+    """Drop all bookings, free every seat and split them into ``shards`` shards."""
+    async with session() as db:
+        await db.execute(Booking.__table__.delete())
+        await db.execute(TourBookingStat.__table__.delete())
+        await db.execute(TourSlotShard.__table__.delete())
+        await db.execute(
+            Tour.__table__.update().where(Tour.id == 1).values(available_slots=CAPACITY, slot_shards=0)
+        )
+        tour = await db.get(Tour, 1, populate_existing=True)
+        await availability_crud.sync_tour(db, tour)
+        await db.commit()
+        await slot_crud.set_shards(db, tour, shards)
+
+
+async def free_slots(db: AsyncSession) -> int:
+    tour = await db.get(Tour, 1, populate_existing=True)
+    await slot_crud.apply_shard_totals(db, [tour])
+    return tour.available_slots
+
+
+def _booked_people():
+    return (
+        select(func.coalesce(func.sum(Booking.number_of_people), 0))
+        .where(Booking.tour_id == 1, Booking.status == "confirmed")
+    )
+
+
+async def booked_people(db: AsyncSession) -> int:
+    return int(await db.scalar(_booked_people()))
+
+
+async def book_until_sold_out(session: async_sessionmaker, rng: random.Random, counts: dict) -> None:
+    """One client: book random parties until no seat is left."""
+    async with session() as db:
+        while True:
+            people = rng.randint(1, 4)
+            try:
+                await booking_crud.create_booking(db, BookingCreate(
+                    tour_id=1,
+                    customer_name="Customer",
+                    customer_email="customer@example.com",
+                    customer_phone="+70000000000",
+                    number_of_people=people,
+                ))
+                counts["bookings"] += 1
+                # A broken guard would let counters go negative: stop, check() reports it
+                if counts["bookings"] > CAPACITY:
+                    return
+                continue
+            except ValueError:
+                counts["rejected"] += 1
+            except OperationalError:
+                # SQLite busy timeout under load: the transaction did nothing
+                counts["busy"] += 1
+            await db.rollback()
+            if await free_slots(db) <= 0:
+                return
+
+
+async def sync_and_check(session: async_sessionmaker, done: asyncio.Event, errors: list) -> int:
+    """Run the shard sync in a loop, checking the invariants after each pass."""
+    passes = 0
+    async with session() as db:
+        while not done.is_set():
+            try:
+                await slot_crud.sync_sharded_tours(db)
+            except OperationalError:
+                await db.rollback()
+                continue
+            passes += 1
+            # One statement, so one snapshot (pysqlite runs lone SELECTs outside a transaction)
+            booked, free, synced, negative = (await db.execute(select(
+                _booked_people().scalar_subquery(),
+                select(func.coalesce(func.sum(TourSlotShard.available_slots), Tour.available_slots))
+                .select_from(Tour)
+                .outerjoin(TourSlotShard, TourSlotShard.tour_id == Tour.id)
+                .where(Tour.id == 1)
+                .group_by(Tour.id)
+                .scalar_subquery(),
+                select(Tour.available_slots).where(Tour.id == 1).scalar_subquery(),
+                select(func.count()).select_from(TourSlotShard)
+                .where(TourSlotShard.available_slots < 0)
+                .scalar_subquery(),
+            ))).one()
+            await db.rollback()
+            if booked + free != CAPACITY or booked > CAPACITY or negative or synced < 0:
+                errors.append(f"sync pass {passes}: booked={booked} free={free} synced={synced}")
+            await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+    return passes
+
+
+async def check(session: async_sessionmaker, counts: dict, errors: list) -> bool:
+    async with session() as db:
+        await slot_crud.sync_sharded_tours(db)
+        booked = await booked_people(db)
+        bookings = await db.scalar(select(func.count()).select_from(Booking))
+        free = await free_slots(db)
+        row = await db.scalar(select(Tour.available_slots).where(Tour.id == 1))
+        days = (await db.execute(
+            select(func.min(TourAvailabilityDay.available_slots), func.max(TourAvailabilityDay.available_slots))
+            .where(TourAvailabilityDay.tour_id == 1)
+        )).one()
+        stats = await db.get(TourBookingStat, 1, populate_existing=True)
+    if booked > CAPACITY:
+        errors.append(f"oversold: {booked} people booked on {CAPACITY} seats")
+    if booked + free != CAPACITY or free != 0 or row != 0:
+        errors.append(f"counters: booked={booked} shards={free} tours row={row}")
+    if days != (0, 0):
+        errors.append(f"day buckets not synced: {days}")
+    if bookings != counts["bookings"] or stats is None or stats.bookings != bookings or stats.people != booked:
+        errors.append(f"rollups: bookings={bookings} counted={counts['bookings']}")
+    return not errors
+
+
+async def run(shards_list: list) -> bool:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    populate(path)
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"=== {CAPACITY:,} seats, {WORKERS} concurrent clients ===")
+    print(f"{'shards':<8}{'seconds':>9}{'bookings/s':>12}{'rejected':>10}{'busy':>6}{'syncs':>7}  ok")
+    ok = True
+    for shards in shards_list:
+        await reset(session, shards)
+        counts = {"bookings": 0, "rejected": 0, "busy": 0}
+        errors: list = []
+        done = asyncio.Event()
+        sync = asyncio.create_task(sync_and_check(session, done, errors))
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            book_until_sold_out(session, random.Random(shards * 1000 + i), counts)
+            for i in range(WORKERS)
+        ))
+        elapsed = time.perf_counter() - started
+        done.set()
+        passes = await sync
+        same = await check(session, counts, errors)
+        ok &= same
+        print(f"{shards:<8}{elapsed:>9.2f}{counts['bookings'] / elapsed:>12.0f}"
+              f"{counts['rejected']:>10}{counts['busy']:>6}{passes:>7}  {'yes' if same else 'NO'}")
+        for error in errors[:5]:
+            print(f"  {error}")
+    await engine.dispose()
+    os.remove(path)
+    return ok
+
+
+def main() -> int:
+    shards_list = [int(arg) for arg in sys.argv[1:]] or [0, 1, 4, 16]
+    ok = asyncio.run(run(shards_list))
+    print("\n[OK] Never oversold" if ok else "\n[ERROR] Slot counters are inconsistent")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Compare request throughput of the default uvicorn setup and serve.py.
+
+Starts the API in each configuration against the configured database, drives
+it with keep-alive HTTP/1.1 connections for a fixed time and reports
+requests per second and latency percentiles per endpoint:
+
+  uvicorn default   uvicorn app.main:app (1 worker, access log on)
+  asyncio + h11     the same with the pure-Python loop and parser
+  serve.py          python serve.py (workers, uvloop, httptools, no access log)
+
+Usage: python benchmark_server.py [--seconds 10] [--connections 64]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+PORT = 8801
+ENDPOINTS = ["/health", "/api/v1/tours/?page_size=10"]
+STARTUP_TIMEOUT = 60.0
+
+SETUPS = {
+    "uvicorn default": ["-m", "uvicorn", "app.main:app", "--port", str(PORT)],
+    "asyncio + h11": ["-m", "uvicorn", "app.main:app", "--port", str(PORT),
+                      "--loop", "asyncio", "--http", "h11"],
+    "serve.py": ["serve.py", "--host", "127.0.0.1", "--port", str(PORT)],
+}
+
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> None:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = head[9:12]
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    if status != b"200":
+        raise RuntimeError(f"GET {path} returned {status.decode()}")
+
+
+async def _connection(path: str, deadline: float, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await _get(reader, writer, path)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def load(path: str, seconds: float, connections: int) -> tuple:
+    """Returns (requests per second, p50 ms, p99 ms)."""
+    latencies: list = []
+    started = time.perf_counter()
+    deadline = started + seconds
+    await asyncio.gather(*(_connection(path, deadline, latencies) for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def wait_until_up() -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{PORT}/health", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(args: list, seconds: float, connections: int) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "DEBUG": "false"},
+    )
+    try:
+        wait_until_up()
+        # Let startup tasks (cache warm-up, index loads) settle
+        time.sleep(2)
+        asyncio.run(load(ENDPOINTS[0], 1, connections))
+        return {path: asyncio.run(load(path, seconds, connections)) for path in ENDPOINTS}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=STARTUP_TIMEOUT)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per endpoint")
+    parser.add_argument("--connections", type=int, default=64, help="concurrent keep-alive connections")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU core(s), {args.connections} connections, {args.seconds:g}s per endpoint")
+    results = {}
+    for name, setup in SETUPS.items():
+        try:
+            results[name] = run(setup, args.seconds, args.connections)
+        except (RuntimeError, OSError) as e:
+            print(f"[ERROR] {name}: {e}")
+            return 1
+
+    for path in ENDPOINTS:
+        print(f"\n{path}")
+        print(f"{'setup':<18}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, result in results.items():
+            rps, p50, p99 = result[path]
+            print(f"{name:<18}{rps:>10.0f}{p50:>10.2f}{p99:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
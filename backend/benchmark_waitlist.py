@@ -0,0 +1,176 @@
+"""Measure waitlist promotion throughput.
+
+Builds a throwaway SQLite database with one sold-out tour and N queued
+waitlist entries, frees enough slots for all of them and times:
+
+  per entry   one transaction per party (reserve, insert booking, rollups,
+              mark entry), i.e. what calling the booking path in a loop does
+  batched     WaitlistCRUD.promote_tour with each batch size
+
+Then checks that every entry was promoted exactly once, each got its own
+booking with its customer, and the tour's slots and rollups add up.
+
+Usage: python benchmark_waitlist.py [N ...]   (default: 1000 10000)
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.analytics import analytics_crud
+from app.crud.slots import slot_crud
+from app.crud.waitlist import waitlist_crud
+from app.database import Base
+from app.models import Booking, Tour, TourBookingStat, WaitlistEntry
+
+BATCH_SIZES = [100, 500, 2000]
+# Same text format SQLAlchemy writes
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def populate(path: str, n: int) -> int:
+    """One sold-out tour with n waiting parties; returns the people waiting."""
+    rng = random.Random(42)
+    now = datetime.utcnow().strftime(DATETIME_FORMAT)
+    sizes = [rng.randint(1, 4) for _ in range(n)]
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO tours (id, title, country, country_normalized, city, description, price, "
+        "duration_days, max_people, start_date, end_date, available_slots, slot_shards, "
+        "created_at, updated_at) VALUES (1, 'Tour', 'Италия', 'италия', 'Рим', 'Synthetic tour', "
+        "500.0, 7, ?, ?, ?, 0, 0, ?, ?)",
+        (sum(sizes), now, now, now, now),
+    )
+    conn.executemany(
+        "INSERT INTO waitlist_entries (tour_id, customer_name, customer_email, customer_phone, "
+        "number_of_people, status, created_at) VALUES (1, ?, ?, '+70000000000', ?, 'waiting', ?)",
+        [(f"Customer {i}", f"c{i}@example.com", size, now) for i, size in enumerate(sizes)],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return sum(sizes)
+
+
+async def reset(db: AsyncSession, people: int) -> None:
+    """Put every entry back in the queue and free ``people`` slots."""
+    await db.execute(
+        update(WaitlistEntry).values(status="waiting", booking_id=None, promoted_at=None)
+    )
+    await db.execute(Booking.__table__.delete())
+    await db.execute(TourBookingStat.__table__.delete())
+    await db.execute(update(Tour).where(Tour.id == 1).values(available_slots=people))
+    await db.commit()
+
+
+async def promote_per_entry(db: AsyncSession) -> int:
+    """Baseline: one transaction per waiting party, in queue order."""
+    result = await db.execute(
+        select(WaitlistEntry).where(WaitlistEntry.status == "waiting").order_by(WaitlistEntry.id)
+    )
+    entries = list(result.scalars().all())
+    for entry in entries:
+        tour = await db.get(Tour, entry.tour_id)
+        await slot_crud.reserve(db, tour, entry.number_of_people)
+        booking = Booking(
+            tour_id=tour.id,
+            customer_name=entry.customer_name,
+            customer_email=entry.customer_email,
+            customer_phone=entry.customer_phone,
+            number_of_people=entry.number_of_people,
+            total_price=tour.price * entry.number_of_people,
+            status="confirmed",
+        )
+        db.add(booking)
+        await db.flush()
+        await analytics_crud.record_booking(db, tour, booking)
+        entry.status, entry.booking_id, entry.promoted_at = "promoted", booking.id, datetime.utcnow()
+        await db.commit()
+    return len(entries)
+
+
+async def promote_batched(db: AsyncSession, batch_size: int) -> int:
+    total = 0
+    while True:
+        promoted = await waitlist_crud.promote_tour(db, 1, batch_size)
+        total += promoted
+        if promoted < batch_size:
+            return total
+
+
+async def check(db: AsyncSession, n: int, people: int) -> bool:
+    promoted, bookings, distinct = (await db.execute(
+        select(
+            func.count(),
+            func.count(WaitlistEntry.booking_id),
+            func.count(func.distinct(WaitlistEntry.booking_id)),
+        ).where(WaitlistEntry.status == "promoted")
+    )).one()
+    # Each entry's booking carries that entry's customer and party size
+    matched = await db.scalar(
+        select(func.count())
+        .select_from(WaitlistEntry)
+        .join(Booking, Booking.id == WaitlistEntry.booking_id)
+        .where(
+            Booking.customer_email == WaitlistEntry.customer_email,
+            Booking.number_of_people == WaitlistEntry.number_of_people,
+        )
+    )
+    slots = await db.scalar(select(Tour.available_slots).where(Tour.id == 1))
+    stats = await db.get(TourBookingStat, 1, populate_existing=True)
+    return (
+        promoted == bookings == distinct == matched == n
+        and await db.scalar(select(func.count()).select_from(Booking)) == n
+        and slots == 0
+        and stats is not None and stats.bookings == n and stats.people == people
+    )
+
+
+async def run(n: int) -> bool:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    people = populate(path, n)
+
+    print(f"\n=== {n:,} waiting parties, {people:,} people ===")
+    print(f"{'mode':<18}{'seconds':>9}{'parties/s':>11}{'  ok'}")
+    ok = True
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    modes = [("per entry", promote_per_entry)] + [
+        (f"batched {size}", lambda db, size=size: promote_batched(db, size)) for size in BATCH_SIZES
+    ]
+    for name, promote in modes:
+        async with session() as db:
+            await reset(db, people)
+        async with session() as db:
+            started = time.perf_counter()
+            promoted = await promote(db)
+            elapsed = time.perf_counter() - started
+        async with session() as db:
+            same = promoted == n and await check(db, n, people)
+        ok &= same
+        print(f"{name:<18}{elapsed:>9.2f}{promoted / elapsed:>11.0f}  {'yes' if same else 'NO'}")
+    await engine.dispose()
+    os.remove(path)
+    return ok
+
+
+def main() -> int:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    ok = True
+    for n in sizes:
+        ok &= asyncio.run(run(n))
+    print("\n[OK] Every party promoted once" if ok else "\n[ERROR] Promotion results are inconsistent")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,14 @@
 """Initialize database and create sample data."""
 
 import asyncio
+import os
 from datetime import datetime, timedelta
 
+from alembic import command
+from alembic.config import Config
+
 from app.database import init_db, AsyncSessionLocal
+from app.crud.availability import availability_crud
 from app.models.tour import Tour
 
 
@@ -151,6 +156,15 @@ async def create_sample_tours():
         await db.commit()
         print(f"[OK] Created {len(tours_data)} sample tours")
 
+        await availability_crud.rebuild(db)
+        print("[OK] Availability calendar built")
+
+
+def stamp_migrations():
+    """Mark the freshly created schema as up to date with Alembic migrations."""
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    command.stamp(config, "head")
+
 
 async def main():
     """Main initialization function."""
@@ -160,6 +174,10 @@ async def main():
     await init_db()
     print("[OK] Database tables created")
 
+    # Alembic env runs its own event loop, so stamp from a worker thread
+    await asyncio.to_thread(stamp_migrations)
+    print("[OK] Migrations stamped to head")
+
     # Create sample data
     await create_sample_tours()
 
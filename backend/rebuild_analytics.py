@@ -0,0 +1,30 @@
+"""Rebuild booking revenue and occupancy rollups from booking history.
+
+Usage: python rebuild_analytics.py [--batch-size N]
+
+Needed once after migrating to the rollup tables (alembic revision 0007)
+and whenever bookings were changed outside the API.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.database import AsyncSessionLocal
+from app.crud.analytics import analytics_crud
+
+
+async def main(batch_size: int) -> None:
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        processed = await analytics_crud.rebuild(db, batch_size=batch_size)
+    print(
+        f"[OK] Rollups rebuilt from {processed} bookings "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=5000, help="bookings per batch")
+    asyncio.run(main(parser.parse_args().batch_size))
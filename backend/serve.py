@@ -0,0 +1,78 @@
+"""Production server entrypoint.
+
+Runs uvicorn with SERVER_WORKERS worker processes (one by default), the
+uvloop event loop and the httptools HTTP parser when installed (both come
+with ``uvicorn[standard]``), a tuned keep-alive timeout and listen backlog,
+and no access log. On SIGTERM / Ctrl+C the server stops accepting connections and
+waits up to SERVER_GRACEFUL_TIMEOUT_SECONDS for in-flight requests (bookings
+included) to finish before the lifespan shutdown closes the pool.
+
+The app is imported once here first so configuration and import errors fail
+before any worker starts. Workers are spawned, not forked: each one imports
+the app again and creates its own engine and connection pool.
+
+Several components are per process, with no fan-out between workers: the
+tour change stream (pubsub.py, so an SSE client on one worker never sees
+bookings made on another), the listing cache, /metrics and the slot-shard
+sync. Every worker also runs its own background loops (hold sweeper,
+waitlist promoter, index refreshes). Run more than one worker only behind
+a setup that tolerates this, e.g. without live slot counts.
+
+Usage: python serve.py [--host HOST] [--port PORT] [--workers N]
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+import uvicorn
+
+from app.config import settings
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the Tour Booking API in production mode")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.server_workers or os.cpu_count() or 1,
+        help="worker processes (default: SERVER_WORKERS, 1; 0 = one per CPU core)",
+    )
+    args = parser.parse_args()
+
+    try:
+        import app.main  # noqa: F401
+    except Exception as e:
+        print(f"[ERROR] Cannot import app.main: {e}")
+        return 1
+
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    print(f"[INFO] Serving on http://{args.host}:{args.port} "
+          f"with {args.workers} worker(s), loop={loop}, http={http}")
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keepalive_seconds,
+        timeout_graceful_shutdown=settings.server_graceful_timeout_seconds,
+        access_log=settings.server_access_log,
+        proxy_headers=True,
+        server_header=False,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Shared fixtures.
+
+DATABASE_URL points at a throwaway SQLite file before the app is imported,
+and the schema is built once per session the way a deployed database got
+it: the original ``create_all`` tables (revision 0001 starts from them),
+then ``alembic upgrade head``. Tests thus run against the migrated indexes,
+not against ``Base.metadata``.
+
+The app is driven without its lifespan: no background tasks run, and the
+in-memory catalogue and similarity index stay unloaded unless a test loads them.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="tours-test-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from migrations import alembic_upgrade  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_db():
+    alembic_upgrade(DB_PATH)
+    return DB_PATH
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+async def db():
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_tour(db):
+    """Create a tour through TourCRUD; keyword arguments override the defaults."""
+    from app.crud import tour_crud
+    from app.schemas.tour import TourCreate
+
+    async def make(**overrides):
+        start = datetime(2030, 6, 1)
+        data = {
+            "title": "Test tour",
+            "country": "Италия",
+            "city": "Рим",
+            "description": "Tour created by tests",
+            "price": 500.0,
+            "duration_days": 7,
+            "max_people": 10,
+            "available_slots": 10,
+            "start_date": start,
+            "end_date": start + timedelta(days=7),
+        }
+        data.update(overrides)
+        return await tour_crud.create_tour(db, TourCreate(**data))
+
+    return make
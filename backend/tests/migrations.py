@@ -0,0 +1,62 @@
+"""Build a database the way deployed ones were built: original tables, then migrations."""
+
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def create_base_schema(path: str) -> None:
+    """Create the tours and bookings tables as they were before the first migration."""
+    metadata = sa.MetaData()
+    sa.Table(
+        "tours", metadata,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("title", sa.String(200), nullable=False, index=True),
+        sa.Column("country", sa.String(100), nullable=False, index=True),
+        sa.Column("city", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text, nullable=False),
+        sa.Column("price", sa.Float, nullable=False, index=True),
+        sa.Column("duration_days", sa.Integer, nullable=False),
+        sa.Column("max_people", sa.Integer, nullable=False),
+        sa.Column("image_url", sa.String(500)),
+        sa.Column("start_date", sa.DateTime, nullable=False, index=True),
+        sa.Column("end_date", sa.DateTime, nullable=False, index=True),
+        sa.Column("available_slots", sa.Integer, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    sa.Table(
+        "bookings", metadata,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("tour_id", sa.Integer, sa.ForeignKey("tours.id"), nullable=False, index=True),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("customer_email", sa.String(100), nullable=False, index=True),
+        sa.Column("customer_phone", sa.String(20), nullable=False),
+        sa.Column("number_of_people", sa.Integer, nullable=False),
+        sa.Column("total_price", sa.Float, nullable=False),
+        sa.Column("booking_date", sa.DateTime),
+        sa.Column("status", sa.String(20), index=True),
+        sa.Column("notes", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime),
+    )
+    engine = sa.create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    engine.dispose()
+
+
+def alembic_upgrade(path: str) -> None:
+    """Create the pre-migration schema at ``path`` and migrate it to the latest revision."""
+    from app.config import settings
+
+    create_base_schema(path)
+    database_url = f"sqlite+aiosqlite:///{path}"
+
+    previous, settings.database_url = settings.database_url, database_url
+    try:
+        command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
+    finally:
+        settings.database_url = previous
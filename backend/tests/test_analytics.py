@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.crud import analytics_crud
+from app.models.analytics import BookingDailyStat, TourBookingStat
+
+pytestmark = pytest.mark.anyio
+
+
+def book(client, tour_id: int, people: int):
+    response = client.post("/api/v1/bookings/", json={
+        "tour_id": tour_id,
+        "customer_name": "Customer",
+        "customer_email": "analytics@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": people,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def rollups(db):
+    daily = (await db.execute(
+        select(BookingDailyStat.day, BookingDailyStat.country_normalized, BookingDailyStat.country,
+               BookingDailyStat.bookings, BookingDailyStat.people, BookingDailyStat.revenue)
+        .order_by(BookingDailyStat.day, BookingDailyStat.country_normalized)
+    )).all()
+    tours = (await db.execute(
+        select(TourBookingStat.tour_id, TourBookingStat.bookings, TourBookingStat.people, TourBookingStat.revenue)
+        .order_by(TourBookingStat.tour_id)
+    )).all()
+    return daily, tours
+
+
+async def test_report_for_country(client, make_tour):
+    big = await make_tour(country="Албания", price=100.0, max_people=10, available_slots=10)
+    small = await make_tour(country="Албания", price=50.0, max_people=4, available_slots=4)
+    book(client, big.id, 3)
+    book(client, big.id, 2)
+    cancelled = book(client, small.id, 2)
+    book(client, small.id, 1)
+    assert client.post(f"/api/v1/bookings/{cancelled}/cancel").status_code == 200
+
+    today = datetime.utcnow().date().isoformat()
+    response = client.get("/api/v1/analytics", params={"country": "албания", "start_date": today})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totals"] == {"bookings": 3, "people": 6, "revenue": 550.0}
+    assert data["countries"] == [{"country": "Албания", "bookings": 3, "people": 6, "revenue": 550.0}]
+    assert [(day["date"], day["bookings"]) for day in data["daily"]] == [(today, 3)]
+
+    big_stats, small_stats = data["tours"]
+    assert (big_stats["tour_id"], big_stats["occupied"], big_stats["occupancy_rate"]) == (big.id, 5, 0.5)
+    assert (small_stats["tour_id"], small_stats["bookings"], small_stats["revenue"]) == (small.id, 1, 50.0)
+
+
+async def test_incremental_rollups_match_rebuild(client, db, make_tour):
+    tour = await make_tour(country="Сербия", price=80.0, max_people=10, available_slots=10)
+    booking_ids = [book(client, tour.id, people) for people in (1, 2, 3)]
+    assert client.post("/api/v1/bookings/cancel", json={
+        "tour_id": tour.id, "booking_ids": booking_ids[:2],
+    }).status_code == 200
+    hold_id = client.post("/api/v1/holds/", json={"tour_id": tour.id, "number_of_people": 2}).json()["id"]
+    assert client.post(f"/api/v1/holds/{hold_id}/confirm", json={
+        "customer_name": "Customer", "customer_email": "analytics@example.com", "customer_phone": "+70000000000",
+    }).status_code == 201
+
+    # Everything written so far in this session went through the incremental path
+    incremental = await rollups(db)
+    await analytics_crud.rebuild(db, batch_size=7)
+    assert await rollups(db) == incremental
+
+
+def test_window_is_validated(client):
+    assert client.get("/api/v1/analytics", params={
+        "start_date": "2030-01-02", "end_date": "2030-01-01",
+    }).status_code == 400
+    assert client.get("/api/v1/analytics", params={
+        "start_date": "2030-01-01", "end_date": "2032-01-01",
+    }).status_code == 400
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2031, 3, 10)
+
+
+def calendar(client, country: str, start: str, end: str, **params):
+    return client.get("/api/v1/tours/availability", params={
+        "country": country, "start_date": start, "end_date": end, **params,
+    })
+
+
+async def test_tour_fills_every_day_of_its_span(client, make_tour):
+    tour = await make_tour(
+        country="Норвегия", available_slots=6, start_date=START, end_date=START + timedelta(days=2)
+    )
+
+    response = calendar(client, "норвегия", "2031-03-09", "2031-03-14")
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert [day["date"] for day in days] == ["2031-03-10", "2031-03-11", "2031-03-12"]
+    for day in days:
+        assert day["available_slots"] == 6
+        assert day["tours"] == [{"tour_id": tour.id, "available_slots": 6}]
+
+
+async def test_booking_updates_day_buckets_and_min_slots(client, make_tour):
+    tour = await make_tour(
+        country="Исландия", available_slots=5, start_date=START, end_date=START + timedelta(days=1)
+    )
+    response = client.post("/api/v1/bookings/", json={
+        "tour_id": tour.id,
+        "customer_name": "Customer",
+        "customer_email": "calendar@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": 3,
+    })
+    assert response.status_code == 201
+
+    days = calendar(client, "Исландия", "2031-03-10", "2031-03-11").json()["days"]
+    assert [day["available_slots"] for day in days] == [2, 2]
+    assert calendar(client, "Исландия", "2031-03-10", "2031-03-11", min_slots=3).json()["days"] == []
+
+
+def test_window_is_validated(client):
+    assert calendar(client, "Италия", "2031-03-10", "2031-03-09").status_code == 400
+    assert calendar(client, "Италия", "2031-01-01", "2031-12-31").status_code == 400
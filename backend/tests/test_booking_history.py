@@ -0,0 +1,57 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "history@example.com"
+
+
+def book(client, tour_id: int, people: int = 1):
+    response = client.post("/api/v1/bookings/", json={
+        "tour_id": tour_id,
+        "customer_name": "Customer",
+        "customer_email": EMAIL,
+        "customer_phone": "+70000000000",
+        "number_of_people": people,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def history(client, **params):
+    response = client.get("/api/v1/bookings/", params={"email": EMAIL, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_cursor_pages_walk_history_newest_first(client, make_tour):
+    tour = await make_tour(max_people=20, available_slots=20)
+    booking_ids = [book(client, tour.id) for _ in range(7)]
+
+    pages, cursor = [], None
+    while True:
+        page = history(client, limit=3, **({"cursor": cursor} if cursor else {}))
+        pages.append([booking["id"] for booking in page["bookings"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [booking_id for page in pages for booking_id in page] == booking_ids[::-1]
+
+
+async def test_status_filter_and_embedded_tour(client, make_tour):
+    tour = await make_tour(title="History tour", max_people=20, available_slots=20)
+    cancelled = book(client, tour.id)
+    assert client.post(f"/api/v1/bookings/{cancelled}/cancel").status_code == 200
+
+    bookings = history(client, status="cancelled", include_tour="true")["bookings"]
+    assert [booking["id"] for booking in bookings] == [cancelled]
+    assert bookings[0]["status"] == "cancelled"
+    assert bookings[0]["tour"]["title"] == "History tour"
+
+    assert history(client)["bookings"][0].get("tour") is None
+
+
+def test_invalid_cursor(client):
+    response = client.get("/api/v1/bookings/", params={"email": EMAIL, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
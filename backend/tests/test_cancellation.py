@@ -0,0 +1,104 @@
+import pytest
+
+from app.crud import waitlist_crud
+
+pytestmark = pytest.mark.anyio
+
+
+def book(client, tour_id: int, people: int):
+    response = client.post("/api/v1/bookings/", json={
+        "tour_id": tour_id,
+        "customer_name": "Customer",
+        "customer_email": "cancel@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": people,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def slots(client, tour_id: int) -> int:
+    return client.get(f"/api/v1/tours/{tour_id}").json()["available_slots"]
+
+
+def bulk_cancel(client, tour_id: int, booking_ids=None):
+    body = {"tour_id": tour_id}
+    if booking_ids is not None:
+        body["booking_ids"] = booking_ids
+    return client.post("/api/v1/bookings/cancel", json=body)
+
+
+async def test_cancel_releases_slots_once(client, make_tour):
+    tour_id = (await make_tour(max_people=10, available_slots=10)).id
+    booking_id = book(client, tour_id, 4)
+    assert slots(client, tour_id) == 6
+
+    response = client.post(f"/api/v1/bookings/{booking_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert slots(client, tour_id) == 10
+
+    response = client.post(f"/api/v1/bookings/{booking_id}/cancel")
+    assert response.status_code == 409
+    assert "already cancelled" in response.json()["detail"]
+    assert slots(client, tour_id) == 10
+
+
+def test_cancel_unknown_booking(client):
+    assert client.post("/api/v1/bookings/999999/cancel").status_code == 404
+
+
+async def test_bulk_cancel_whole_tour(client, make_tour):
+    tour_id = (await make_tour(max_people=10, available_slots=10)).id
+    other_id = (await make_tour(max_people=10, available_slots=10)).id
+    booking_ids = [book(client, tour_id, people) for people in (1, 2, 3)]
+    other_booking = book(client, other_id, 2)
+    client.post(f"/api/v1/bookings/{booking_ids[0]}/cancel")
+
+    response = bulk_cancel(client, tour_id)
+    assert response.status_code == 200
+    assert response.json() == {
+        "tour_id": tour_id, "cancelled": 2, "booking_ids": booking_ids[1:], "available_slots": 10,
+    }
+    assert client.get(f"/api/v1/bookings/{other_booking}").json()["status"] == "confirmed"
+    assert slots(client, other_id) == 8
+
+    # Nothing left to cancel: the seats are not released twice
+    assert bulk_cancel(client, tour_id).json()["cancelled"] == 0
+    assert slots(client, tour_id) == 10
+
+
+async def test_bulk_cancel_listed_bookings(client, make_tour):
+    tour_id = (await make_tour(max_people=10, available_slots=10)).id
+    other_id = (await make_tour(max_people=10, available_slots=10)).id
+    kept, first, second = (book(client, tour_id, people) for people in (1, 2, 3))
+    foreign = book(client, other_id, 2)
+
+    response = bulk_cancel(client, tour_id, [first, second, foreign, 999999])
+    assert response.json()["booking_ids"] == [first, second]
+    assert response.json()["available_slots"] == 9
+    assert client.get(f"/api/v1/bookings/{kept}").json()["status"] == "confirmed"
+    assert client.get(f"/api/v1/bookings/{foreign}").json()["status"] == "confirmed"
+
+
+async def test_bulk_cancel_validation(client, make_tour):
+    assert bulk_cancel(client, 999999).status_code == 404
+    tour_id = (await make_tour()).id
+    assert bulk_cancel(client, tour_id, []).status_code == 422
+
+
+async def test_cancel_frees_seats_for_waitlist(client, db, make_tour):
+    tour_id = (await make_tour(max_people=4, available_slots=4)).id
+    booking_id = book(client, tour_id, 4)
+    response = client.post("/api/v1/waitlist/", json={
+        "tour_id": tour_id,
+        "customer_name": "Waiting",
+        "customer_email": "waiting@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": 3,
+    })
+    assert response.status_code == 201
+    assert tour_id not in await waitlist_crud.get_promotable_tours(db)
+
+    client.post(f"/api/v1/bookings/{booking_id}/cancel")
+    assert tour_id in await waitlist_crud.get_promotable_tours(db)
@@ -0,0 +1,90 @@
+import itertools
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+_countries = itertools.count()
+# name -> (start, end); the query window below is 2034-03-03 .. 2034-03-12
+SPANS = {
+    "covers_start": (datetime(2034, 3, 1), datetime(2034, 3, 10)),
+    "inside": (datetime(2034, 3, 5), datetime(2034, 3, 8)),
+    "long": (datetime(2034, 2, 1), datetime(2034, 4, 30)),
+    "after": (datetime(2034, 3, 20), datetime(2034, 3, 25)),
+    "before": (datetime(2034, 2, 20), datetime(2034, 3, 2)),
+}
+
+
+@pytest.fixture
+async def tours(make_tour):
+    """The SPANS tours by name, under a country of their own ("country" key)."""
+    country = f"Бутан-{next(_countries)}"
+    ids = {}
+    for name, (start, end) in SPANS.items():
+        ids[name] = (await make_tour(country=country, start_date=start, end_date=end)).id
+    return {"country": country, **ids}
+
+
+def listed(client, tours, **params) -> set:
+    response = client.get("/api/v1/tours/", params={"country": tours["country"], "page_size": 100, **params})
+    assert response.status_code == 200
+    names = {tour_id: name for name, tour_id in tours.items()}
+    return {names[tour["id"]] for tour in response.json()["tours"]}
+
+
+async def test_within_is_the_default(client, tours):
+    window = {"start_date": "2034-03-03T00:00:00", "end_date": "2034-03-12T00:00:00"}
+    assert listed(client, tours, **window) == {"inside"}
+    assert listed(client, tours, **window, date_mode="within") == {"inside"}
+
+
+async def test_overlaps(client, tours):
+    assert listed(
+        client, tours, start_date="2034-03-03T00:00:00", end_date="2034-03-12T00:00:00", date_mode="overlaps"
+    ) == {"covers_start", "inside", "long"}
+
+
+async def test_overlaps_with_one_bound(client, tours):
+    # Still running on or after the date: the long tour started weeks before it
+    assert listed(client, tours, start_date="2034-03-12T00:00:00", date_mode="overlaps") == {"long", "after"}
+    # Started by the date
+    assert listed(client, tours, end_date="2034-03-01T00:00:00", date_mode="overlaps") == {
+        "covers_start", "long", "before",
+    }
+
+
+async def test_starts_within(client, tours):
+    params = {"start_date": "2034-03-01T00:00:00", "date_mode": "starts_within", "within_days": 5}
+    assert listed(client, tours, **params) == {"covers_start", "inside"}
+    # end_date still limits the tour end
+    assert listed(client, tours, **params, end_date="2034-03-09T00:00:00") == {"inside"}
+
+
+async def test_starts_within_defaults_to_today(client, make_tour):
+    start = datetime.utcnow() + timedelta(days=2)
+    soon = await make_tour(country="Непал", start_date=start, end_date=start + timedelta(days=7))
+    await make_tour(country="Непал", start_date=start + timedelta(days=30), end_date=start + timedelta(days=37))
+
+    response = client.get("/api/v1/tours/", params={"country": "Непал", "date_mode": "starts_within", "within_days": 5})
+    assert [tour["id"] for tour in response.json()["tours"]] == [soon.id]
+
+
+async def test_export_uses_date_mode(client, tours):
+    response = client.get("/api/v1/tours/export", params={
+        "country": tours["country"], "start_date": "2034-03-12T00:00:00", "date_mode": "overlaps",
+    })
+    exported = {json.loads(line)["id"] for line in response.text.splitlines()}
+    assert exported == {tours["long"], tours["after"]}
+
+
+@pytest.mark.parametrize("path", ["/api/v1/tours/", "/api/v1/tours/export"])
+def test_starts_within_requires_within_days(client, path):
+    response = client.get(path, params={"date_mode": "starts_within"})
+    assert response.status_code == 400
+    assert "within_days" in response.json()["detail"]
+
+
+def test_unknown_date_mode(client):
+    assert client.get("/api/v1/tours/", params={"date_mode": "during"}).status_code == 422
@@ -0,0 +1,53 @@
+import pytest
+
+from app.etag import etag_matches
+
+pytestmark = pytest.mark.anyio
+
+
+def test_if_none_match_parsing():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+async def test_tour_revalidation(client, make_tour):
+    tour = await make_tour(available_slots=10)
+    url = f"/api/v1/tours/{tour.id}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    booked = client.post("/api/v1/bookings/", json={
+        "tour_id": tour.id,
+        "customer_name": "Customer",
+        "customer_email": "etag@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": 1,
+    })
+    assert booked.status_code == 201
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["available_slots"] == 9
+
+
+async def test_batch_revalidation(client, make_tour):
+    first, second = await make_tour(), await make_tour()
+    params = {"ids": f"{first.id},{second.id},999999"}
+    response = client.get("/api/v1/tours/batch", params=params)
+    assert response.json()["missing_ids"] == [999999]
+
+    etag = response.headers["ETag"]
+    assert client.get("/api/v1/tours/batch", params=params, headers={"If-None-Match": etag}).status_code == 304
+    other = client.get("/api/v1/tours/batch", params={"ids": f"{first.id}"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.config import settings
+from app.models import Booking, Tour
+
+pytestmark = pytest.mark.anyio
+
+
+def book(client, tour_id: int, people: int):
+    response = client.post("/api/v1/bookings/", json={
+        "tour_id": tour_id,
+        "customer_name": "Иван, \"Клиент\"",
+        "customer_email": "export@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": people,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    # Several cursor partitions even for a handful of rows
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+
+async def test_bookings_ndjson(client, make_tour):
+    tour = await make_tour(price=100.0, max_people=20, available_slots=20)
+    booking_ids = [book(client, tour.id, people) for people in (1, 2, 3, 4, 5)]
+
+    response = client.get("/api/v1/bookings/export", params={"tour_id": tour.id})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="bookings.ndjson"' in response.headers["content-disposition"]
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == booking_ids
+    assert list(rows[0]) == [column.key for column in Booking.__table__.c]
+    assert [row["total_price"] for row in rows] == [100.0, 200.0, 300.0, 400.0, 500.0]
+    assert rows[0]["customer_name"] == "Иван, \"Клиент\""
+
+
+async def test_bookings_csv_with_status_filter(client, make_tour):
+    tour = await make_tour(max_people=20, available_slots=20)
+    kept, cancelled = book(client, tour.id, 1), book(client, tour.id, 2)
+    assert client.post(f"/api/v1/bookings/{cancelled}/cancel").status_code == 200
+
+    response = client.get(
+        "/api/v1/bookings/export", params={"tour_id": tour.id, "status": "confirmed", "format": "csv"}
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == [column.key for column in Booking.__table__.c]
+    assert [int(row[header.index("id")]) for row in rows] == [kept]
+    assert rows[0][header.index("customer_name")] == "Иван, \"Клиент\""
+
+
+async def test_tours_export_uses_list_filters(client, make_tour):
+    tours = [await make_tour(country="Черногория", price=price) for price in (100.0, 200.0, 300.0)]
+
+    response = client.get(
+        "/api/v1/tours/export", params={"country": "черногория", "min_price": 150, "format": "csv"}
+    )
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    internal = {"country_normalized", "slot_shards", "version"}
+    assert set(header) == {column.key for column in Tour.__table__.c} - internal
+    assert [int(row[0]) for row in rows] == [tour.id for tour in tours[1:]]
+
+
+def test_unknown_format(client):
+    assert client.get("/api/v1/bookings/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models import Tour
+from app.models.hold import SeatHold
+from app.tasks import sweep_expired_holds
+
+pytestmark = pytest.mark.anyio
+
+CUSTOMER = {
+    "customer_name": "Customer",
+    "customer_email": "hold@example.com",
+    "customer_phone": "+70000000000",
+}
+
+
+def hold(client, tour_id: int, people: int):
+    return client.post("/api/v1/holds/", json={"tour_id": tour_id, "number_of_people": people})
+
+
+async def free_slots(db, tour_id: int) -> int:
+    return (await db.get(Tour, tour_id, populate_existing=True)).available_slots
+
+
+async def test_hold_takes_slots_and_release_returns_them(client, db, make_tour):
+    tour_id = (await make_tour(available_slots=5)).id
+    response = hold(client, tour_id, 3)
+    assert response.status_code == 201
+    assert response.json()["status"] == "active"
+    assert await free_slots(db, tour_id) == 2
+    assert hold(client, tour_id, 3).status_code == 400
+
+    hold_id = response.json()["id"]
+    released = client.delete(f"/api/v1/holds/{hold_id}")
+    assert released.status_code == 200
+    assert released.json()["status"] == "released"
+    assert client.delete(f"/api/v1/holds/{hold_id}").status_code == 404
+    assert await free_slots(db, tour_id) == 5
+
+
+async def test_confirm_turns_hold_into_booking_once(client, db, make_tour):
+    tour_id = (await make_tour(price=300.0, available_slots=5)).id
+    hold_id = hold(client, tour_id, 2).json()["id"]
+
+    booking = client.post(f"/api/v1/holds/{hold_id}/confirm", json=CUSTOMER)
+    assert booking.status_code == 201
+    assert booking.json()["number_of_people"] == 2
+    assert booking.json()["total_price"] == 600.0
+    assert client.get(f"/api/v1/holds/{hold_id}").json()["booking_id"] == booking.json()["id"]
+
+    assert client.post(f"/api/v1/holds/{hold_id}/confirm", json=CUSTOMER).status_code == 409
+    assert await free_slots(db, tour_id) == 3
+
+
+async def test_sweeper_releases_expired_holds_in_batches(client, db, make_tour):
+    tour_id = (await make_tour(available_slots=6)).id
+    hold_ids = [hold(client, tour_id, 2).json()["id"] for _ in range(3)]
+    assert await free_slots(db, tour_id) == 0
+    await db.execute(update(SeatHold).where(SeatHold.id.in_(hold_ids)).values(expires_at=datetime(2000, 1, 1)))
+    await db.commit()
+
+    assert await sweep_expired_holds(batch_size=2) == 3
+    assert await free_slots(db, tour_id) == 6
+    assert {client.get(f"/api/v1/holds/{hold_id}").json()["status"] for hold_id in hold_ids} == {"expired"}
+    assert client.post(f"/api/v1/holds/{hold_ids[0]}/confirm", json=CUSTOMER).status_code == 409
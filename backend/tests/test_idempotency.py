@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models import Tour
+from app.models.idempotency import IdempotencyKey
+
+pytestmark = pytest.mark.anyio
+
+
+def book(client, tour_id: int, key: str, people: int = 2):
+    return client.post(
+        "/api/v1/bookings/",
+        json={
+            "tour_id": tour_id,
+            "customer_name": "Customer",
+            "customer_email": "idempotent@example.com",
+            "customer_phone": "+70000000000",
+            "number_of_people": people,
+        },
+        headers={"Idempotency-Key": key},
+    )
+
+
+async def free_slots(db, tour_id: int) -> int:
+    return (await db.get(Tour, tour_id, populate_existing=True)).available_slots
+
+
+async def test_retry_replays_the_original_booking(client, db, make_tour):
+    tour_id = (await make_tour(available_slots=10)).id
+    first = book(client, tour_id, "key-replay")
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = book(client, tour_id, "key-replay")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert await free_slots(db, tour_id) == 8
+
+
+async def test_key_reused_with_other_body_is_rejected(client, db, make_tour):
+    tour_id = (await make_tour(available_slots=10)).id
+    assert book(client, tour_id, "key-mismatch", people=2).status_code == 201
+
+    response = book(client, tour_id, "key-mismatch", people=3)
+    assert response.status_code == 422
+    assert "different request body" in response.json()["detail"]
+    assert await free_slots(db, tour_id) == 8
+
+
+async def test_expired_key_books_again(client, db, make_tour):
+    tour_id = (await make_tour(available_slots=10)).id
+    first = book(client, tour_id, "key-expired").json()
+    await db.execute(
+        update(IdempotencyKey).where(IdempotencyKey.key == "key-expired").values(expires_at=datetime(2000, 1, 1))
+    )
+    await db.commit()
+
+    second = book(client, tour_id, "key-expired")
+    assert second.status_code == 201
+    assert second.json()["id"] != first["id"]
+    assert await free_slots(db, tour_id) == 6
@@ -0,0 +1,85 @@
+import pytest
+
+from app.listing_cache import CachedPage, ListingCache, _ENTRY_OVERHEAD, listing_cache, make_key
+from app.pubsub import TourEventBroker, tour_events
+
+pytestmark = pytest.mark.anyio
+
+
+def page(size: int) -> CachedPage:
+    return CachedPage(etag='"e"', body=b"x" * (size - 3 - _ENTRY_OVERHEAD))
+
+
+def test_equivalent_filters_share_a_key():
+    assert make_key(1, 10, country=" Италия ", min_price=0, max_price=10) == \
+        make_key(1, 10, country="италия", max_price=10.0)
+    assert make_key(1, 10, within_days=7) == make_key(1, 10)
+    assert make_key(1, 10, date_mode="starts_within", within_days=7) != \
+        make_key(1, 10, date_mode="starts_within", within_days=14)
+    assert make_key(1, 10) != make_key(2, 10)
+
+
+def test_tour_events_bump_version_and_drop_pages():
+    cache = ListingCache(max_bytes=10_000, ttl_seconds=60)
+    events = TourEventBroker()
+    events.add_listener(cache.bump_version, cache.bump_version)
+    key = make_key(1, 10)
+    version = cache.version
+    cache.put(key, version, page(1000))
+    assert cache.get(key) is not None
+
+    events.publish(1, available_slots=3)
+    assert cache.version == version + 1
+    assert cache.get(key) is None
+
+    events.publish_many({1: {"price": 10.0}, 2: {"price": 20.0}})
+    assert cache.version == version + 2
+    # A page rendered before the write is not stored
+    cache.put(key, version, page(1000))
+    assert cache.get(key) is None
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = ListingCache(max_bytes=2500, ttl_seconds=60)
+    first, second, third = make_key(1, 10), make_key(2, 10), make_key(3, 10)
+    cache.put(first, 0, page(1000))
+    cache.put(second, 0, page(1000))
+    cache.get(first)
+    cache.put(third, 0, page(1000))
+
+    assert cache.get(second) is None
+    assert cache.get(first) is not None and cache.get(third) is not None
+    assert cache.stats()["bytes"] == 2000
+    assert cache.stats()["evictions"] == 1
+    cache.put(make_key(4, 10), 0, page(3000))
+    assert cache.get(make_key(4, 10)) is None
+
+
+def test_expired_pages_are_dropped():
+    cache = ListingCache(max_bytes=10_000, ttl_seconds=-1)
+    cache.put(make_key(1, 10), 0, page(1000))
+    assert cache.get(make_key(1, 10)) is None
+    assert cache.stats()["entries"] == 0
+
+
+async def test_listing_is_served_from_cache_until_a_booking(client, make_tour):
+    tour = await make_tour(country="Мальта", available_slots=10)
+    params = {"country": "мальта"}
+    assert client.get("/api/v1/tours/", params=params).json()["tours"][0]["available_slots"] == 10
+    hits = listing_cache.hits
+    assert client.get("/api/v1/tours/", params={"country": "Мальта "}).status_code == 200
+    assert listing_cache.hits == hits + 1
+
+    tour_events.publish(tour.id, price=500.0)
+    assert listing_cache.stats()["entries"] == 0
+
+    version = listing_cache.version
+    assert client.post("/api/v1/bookings/", json={
+        "tour_id": tour.id,
+        "customer_name": "Customer",
+        "customer_email": "listing@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": 4,
+    }).status_code == 201
+    assert listing_cache.version > version
+    assert client.get("/api/v1/tours/", params=params).json()["tours"][0]["available_slots"] == 6
@@ -0,0 +1,52 @@
+import pytest
+
+from app.metrics import Histogram, format_labels
+
+pytestmark = pytest.mark.anyio
+
+
+def sample(client, series: str) -> float:
+    """Current value of one exposition line, 0 if the series is not there yet."""
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/")
+
+    lines = histogram.collect()
+    assert 'latency_bucket{route="/",le="0.1"} 2' in lines
+    assert 'latency_bucket{route="/",le="1"} 3' in lines
+    assert 'latency_bucket{route="/",le="+Inf"} 4' in lines
+    assert 'latency_sum{route="/"} 3.65' in lines
+    assert 'latency_count{route="/"} 4' in lines
+
+
+def test_label_values_are_escaped():
+    assert format_labels(("path",), ('a"b\\c\nd',)) == '{path="a\\"b\\\\c\\nd"}'
+
+
+async def test_request_metrics_use_route_template(client, make_tour):
+    tour = await make_tour()
+    route = 'method="GET",route="/api/v1/tours/{tour_id}"'
+    requests_before = sample(client, f'http_requests_total{{{route},status="200"}}')
+    queries_before = sample(client, f"db_queries_per_request_count{{{route}}}")
+
+    assert client.get(f"/api/v1/tours/{tour.id}").status_code == 200
+
+    assert sample(client, f'http_requests_total{{{route},status="200"}}') == requests_before + 1
+    assert sample(client, f"db_queries_per_request_count{{{route}}}") == queries_before + 1
+    assert sample(client, f"db_queries_per_request_sum{{{route}}}") >= 1
+    assert sample(client, f"http_response_size_bytes_sum{{{route}}}") > 0
+
+
+def test_unknown_paths_share_one_label(client):
+    series = 'http_requests_total{method="GET",route="unmatched",status="404"}'
+    before = sample(client, series)
+    client.get("/no-such-path/1")
+    client.get("/no-such-path/2")
+    assert sample(client, series) == before + 2
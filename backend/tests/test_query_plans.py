@@ -0,0 +1,66 @@
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import benchmark_catalogue
+from migrations import alembic_upgrade
+from verify_indexes import CANCEL_CASES, CASES, check, explain
+
+TOURS = 2000
+BOOKINGS = 5000
+
+
+@pytest.fixture(scope="module")
+def cursor(tmp_path_factory):
+    """A migrated database with synthetic tours and bookings, analyzed."""
+    path = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    alembic_upgrade(path)
+    benchmark_catalogue.populate(path, TOURS)
+
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    now = datetime(2026, 1, 1)
+    conn.executemany(
+        "INSERT INTO bookings (tour_id, customer_name, customer_email, customer_phone, "
+        "number_of_people, total_price, booking_date, status, created_at) "
+        "VALUES (?, 'Customer', ?, '+70000000000', 2, 1000.0, ?, ?, ?)",
+        [
+            (
+                rng.randint(1, TOURS),
+                f"c{i % 500}@example.com",
+                (now + timedelta(minutes=i)).isoformat(" "),
+                "cancelled" if i % 10 == 0 else "confirmed",
+                (now + timedelta(minutes=i)).isoformat(" "),
+            )
+            for i in range(BOOKINGS)
+        ],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    yield conn.cursor()
+    conn.close()
+    os.remove(path)
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_tour_filters_use_indexes(cursor, name):
+    from app.crud.tour import tour_crud
+
+    filters, expected_index = CASES[name]
+    query, count_query = tour_crud.build_filter_queries(**filters)
+    page_plan = explain(cursor, query)
+    assert check(page_plan, expected_index) == [], page_plan
+    count_plan = explain(cursor, count_query)
+    assert check(count_plan, "ix_tours_") == [], count_plan
+
+
+@pytest.mark.parametrize("name", list(CANCEL_CASES))
+def test_cancel_updates_use_indexes(cursor, name):
+    from app.crud.tour import booking_crud
+
+    filters, expected_index = CANCEL_CASES[name]
+    plan = explain(cursor, booking_crud.build_cancel_query(**filters))
+    assert check(plan, expected_index) == [], plan
@@ -0,0 +1,70 @@
+import pytest
+
+import serve
+from app.config import settings
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """Call serve.main() with the given argv; returns (exit code, uvicorn.run kwargs)."""
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda target, **kwargs: calls.append((target, kwargs)))
+
+    def main(*argv):
+        monkeypatch.setattr("sys.argv", ["serve.py", *argv])
+        code = serve.main()
+        if not calls:
+            return code, None
+        target, kwargs = calls.pop()
+        assert target == "app.main:app"
+        return code, kwargs
+
+    return main
+
+
+def test_defaults_come_from_settings(run):
+    code, options = run()
+    assert code == 0
+    assert options["host"] == settings.server_host
+    assert options["port"] == settings.server_port
+    assert options["workers"] == settings.server_workers
+    assert options["backlog"] == settings.server_backlog
+    assert options["timeout_keep_alive"] == settings.server_keepalive_seconds
+    assert options["timeout_graceful_shutdown"] == settings.server_graceful_timeout_seconds
+    assert options["access_log"] == settings.server_access_log
+    assert options["server_header"] is False
+
+
+def test_command_line_overrides(run):
+    _, options = run("--host", "127.0.0.1", "--port", "9001", "--workers", "3")
+    assert (options["host"], options["port"], options["workers"]) == ("127.0.0.1", 9001, 3)
+
+
+def test_zero_workers_means_one_per_core(run, monkeypatch):
+    monkeypatch.setattr(settings, "server_workers", 0)
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 6)
+    assert run()[1]["workers"] == 6
+
+
+def test_optional_loop_and_parser(run, monkeypatch):
+    monkeypatch.setattr(serve, "_installed", lambda module: False)
+    options = run()[1]
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+    monkeypatch.setattr(serve, "_installed", lambda module: True)
+    options = run()[1]
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+
+
+def test_import_error_stops_before_serving(run, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def failing_import(name, *args, **kwargs):
+        if name == "app.main":
+            raise RuntimeError("bad config")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", failing_import)
+    assert run() == (1, None)
@@ -0,0 +1,147 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Tour
+from app.similarity import SimilarityIndex, _COLUMNS, similarity_index
+
+pytestmark = pytest.mark.anyio
+
+K = 4
+
+
+@pytest.fixture
+async def index(db):
+    await similarity_index.load(db)
+    yield similarity_index
+    similarity_index.ready = False
+
+
+async def make_tours(make_tour, n: int, seed: int) -> list:
+    """Tours with the default title and description, so only numeric features and places differ."""
+    rng = random.Random(seed)
+    ids = []
+    for _ in range(n):
+        start = datetime(2033, 1, 1) + timedelta(days=rng.randint(0, 300), hours=rng.randint(0, 23))
+        tour = await make_tour(
+            country=rng.choice(["Марокко", "Тунис"]),
+            city=rng.choice(["Фес", "Сус", "Танжер"]),
+            price=round(rng.uniform(200, 3000), 2),
+            duration_days=rng.randint(2, 14),
+            start_date=start,
+            end_date=start + timedelta(days=7),
+        )
+        ids.append(tour.id)
+    return ids
+
+
+async def fetch_rows(db, ids: list) -> list:
+    result = await db.execute(select(*_COLUMNS).where(Tour.id.in_(ids)).order_by(Tour.id))
+    return [tuple(row) for row in result.all()]
+
+
+def changed(row: tuple, **values) -> tuple:
+    """Row with new price/city and a later updated_at."""
+    row = list(row)
+    if "price" in values:
+        row[3] = values["price"]
+    if "city" in values:
+        row[2] = values["city"]
+    row[8] = row[8] + timedelta(seconds=1)
+    return tuple(row)
+
+
+def neighbours(index: SimilarityIndex, ids: list) -> dict:
+    return {tour_id: index.similar(tour_id) for tour_id in ids}
+
+
+def rebuilt(rows: list) -> SimilarityIndex:
+    index = SimilarityIndex(K)
+    index.build(rows)
+    return index
+
+
+async def incremental_case(db, make_tour, seed: int):
+    """Index of the first rows, plus the new rows and edits to apply; and the final rows."""
+    ids = await make_tours(make_tour, 14, seed)
+    rows = await fetch_rows(db, ids)
+    initial, added = rows[:9], rows[9:]
+    edits = [changed(initial[0], price=initial[0][3] * 3), changed(initial[4], city="Касабланка")]
+    final = {row[0]: row for row in rows}
+    final.update({row[0]: row for row in edits})
+    return initial, added + edits, sorted(final.values()), ids
+
+
+async def test_upsert_matches_rebuild(db, make_tour):
+    initial, updates, final, ids = await incremental_case(db, make_tour, seed=45)
+    index = rebuilt(initial)
+    for row in updates:
+        assert index._upsert(row)
+
+    assert neighbours(index, ids) == neighbours(rebuilt(final), ids)
+    assert index.watermark == max(row[8] for row in final)
+
+
+async def test_upsert_many_matches_rebuild(db, make_tour):
+    initial, updates, final, ids = await incremental_case(db, make_tour, seed=46)
+    index = rebuilt(initial)
+    assert index._upsert_many(updates) == len(updates)
+
+    assert neighbours(index, ids) == neighbours(rebuilt(final), ids)
+
+
+async def test_unchanged_features_are_skipped(db, make_tour):
+    ids = await make_tours(make_tour, 5, seed=47)
+    rows = await fetch_rows(db, ids)
+    index = rebuilt(rows)
+    before = neighbours(index, ids)
+
+    touched = changed(rows[2])
+    assert not index._upsert(touched)
+    assert index._upsert_many(rows + [touched]) == 0
+    assert neighbours(index, ids) == before
+    assert index.watermark == touched[8]
+
+
+async def test_similar_is_best_first_and_excludes_the_tour(db, make_tour):
+    ids = await make_tours(make_tour, 8, seed=48)
+    index = rebuilt(await fetch_rows(db, ids))
+    for tour_id in ids:
+        result = index.similar(tour_id)
+        assert len(result) == K
+        assert tour_id not in [other for other, _ in result]
+        assert [score for _, score in result] == sorted((score for _, score in result), reverse=True)
+    assert index.similar(ids[0], limit=2) == index.similar(ids[0])[:2]
+    assert index.similar(999999) is None
+
+
+def test_endpoint_503_until_index_is_built(client):
+    similarity_index.ready = False
+    response = client.get("/api/v1/tours/1/similar")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+async def test_endpoint_returns_neighbours(client, make_tour, index):
+    twin = {"country": "Лаос", "city": "Вьентьян", "title": "Меконг", "description": "Храмы и водопады"}
+    tour_id = (await make_tour(**twin)).id
+    twin_id = (await make_tour(**twin, price=520.0)).id
+    sold_out_id = (await make_tour(**twin, price=510.0, available_slots=0)).id
+
+    response = client.get(f"/api/v1/tours/{tour_id}/similar", params={"limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+    returned = [tour["id"] for tour in data["tours"]]
+    assert data["tour_id"] == tour_id
+    assert returned[0] == twin_id
+    assert tour_id not in returned and sold_out_id not in returned
+    assert len(returned) == 3
+
+    response = client.get(f"/api/v1/tours/{tour_id}/similar", params={"limit": 3, "only_available": "false"})
+    assert [tour["id"] for tour in response.json()["tours"]][:2] == [sold_out_id, twin_id]
+
+
+async def test_endpoint_unknown_tour(client, index):
+    assert client.get("/api/v1/tours/999999/similar").status_code == 404
@@ -0,0 +1,13 @@
+import asyncio
+
+import pytest
+
+import benchmark_contention
+
+
+@pytest.mark.parametrize("shards", [0, 1, 4, 16])
+def test_concurrent_bookings_never_oversell(monkeypatch, shards):
+    # A small tour keeps the run short; invariants are checked after every shard sync too
+    monkeypatch.setattr(benchmark_contention, "CAPACITY", 150)
+    monkeypatch.setattr(benchmark_contention, "WORKERS", 16)
+    assert asyncio.run(benchmark_contention.run([shards]))
@@ -0,0 +1,30 @@
+import pytest
+
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sharding_is_off_on_sqlite_by_default(client, make_tour):
+    tour = await make_tour(max_people=20, available_slots=20)
+    assert settings.slot_shards_allowed is False
+
+    response = client.put(f"/api/v1/tours/{tour.id}/shards", json={"shards": 4})
+    assert response.status_code == 409
+    assert "SLOT_SHARDS_ENABLED" in response.json()["detail"]
+    # Gathering slots back stays allowed
+    assert client.put(f"/api/v1/tours/{tour.id}/shards", json={"shards": 0}).status_code == 200
+
+
+async def test_sharding_can_be_enabled(client, make_tour, monkeypatch):
+    monkeypatch.setattr(settings, "slot_shards_enabled", True)
+    tour = await make_tour(max_people=20, available_slots=20)
+
+    response = client.put(f"/api/v1/tours/{tour.id}/shards", json={"shards": 4})
+    assert response.status_code == 200
+    assert response.json()["slot_shards"] == 4
+    assert response.json()["available_slots"] == 20
+
+    gathered = client.put(f"/api/v1/tours/{tour.id}/shards", json={"shards": 0}).json()
+    assert gathered["slot_shards"] == 0
+    assert gathered["available_slots"] == 20
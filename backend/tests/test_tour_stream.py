@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.api.v1.tours import stream_tour_updates
+from app.config import settings
+from app.crud import booking_crud
+from app.pubsub import TourEventBroker, tour_events
+from app.schemas.tour import BookingCreate
+
+pytestmark = pytest.mark.anyio
+
+
+def parse(chunk: str):
+    event, data = chunk.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+async def test_subscription_keeps_latest_state_per_tour():
+    broker = TourEventBroker()
+    subscription = broker.subscribe([1, 2])
+    broker.publish(1, available_slots=5)
+    broker.publish(1, available_slots=4)
+    broker.publish(2, price=100.0)
+    broker.publish(3, available_slots=1)
+
+    pending = await subscription.get(timeout=1)
+    assert {tour_id: json.loads(message) for tour_id, message in pending.items()} == {
+        1: {"tour_id": 1, "available_slots": 4},
+        2: {"tour_id": 2, "price": 100.0},
+    }
+    assert await subscription.get(timeout=0.01) == {}
+
+    broker.unsubscribe(subscription)
+    assert broker.watched([1, 2]) == []
+
+
+async def test_stream_sends_snapshot_then_updates(db, make_tour, monkeypatch):
+    monkeypatch.setattr(settings, "stream_keepalive_seconds", 0.01)
+    tour = await make_tour(price=250.0, available_slots=10)
+    tour_id = tour.id
+    response = await stream_tour_updates(ids=f"{tour_id}, {tour_id}")
+    events = response.body_iterator
+
+    assert parse(await anext(events)) == (
+        "snapshot", {"tour_id": tour_id, "available_slots": 10, "price": 250.0}
+    )
+    assert await anext(events) == ": keepalive\n\n"
+
+    await booking_crud.create_booking(db, BookingCreate(
+        tour_id=tour_id,
+        customer_name="Customer",
+        customer_email="stream@example.com",
+        customer_phone="+70000000000",
+        number_of_people=2,
+    ))
+    event, state = parse(await anext(events))
+    assert event == "update"
+    assert state["tour_id"] == tour_id
+    assert state["available_slots"] == 8
+
+    await events.aclose()
+    assert tour_events.watched([tour_id]) == []
+
+
+def test_stream_rejects_bad_ids(client):
+    assert client.get("/api/v1/tours/stream", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/api/v1/tours/stream", params={"ids": ","}).status_code == 400
+    too_many = ",".join(str(i) for i in range(settings.stream_max_tours + 1))
+    assert client.get("/api/v1/tours/stream", params={"ids": too_many}).status_code == 400
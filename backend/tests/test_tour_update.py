@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.main import app
+from app.schemas.tour import TourUpdate
+
+NOT_NULL_FIELDS = [
+    "title", "country", "city", "description", "price",
+    "duration_days", "max_people", "start_date", "end_date",
+]
+
+
+@pytest.mark.parametrize("field", NOT_NULL_FIELDS)
+def test_tour_update_rejects_null(field):
+    with pytest.raises(ValidationError, match=field):
+        TourUpdate(version=1, **{field: None})
+
+
+def test_tour_update_allows_clearing_image_url():
+    update = TourUpdate(version=1, image_url=None)
+    assert update.model_dump(exclude_unset=True) == {"version": 1, "image_url": None}
+
+
+def test_tour_update_omitted_fields_are_unset():
+    update = TourUpdate(version=1, title="New title")
+    assert update.model_dump(exclude_unset=True) == {"version": 1, "title": "New title"}
+
+
+@pytest.mark.parametrize("field", NOT_NULL_FIELDS)
+def test_patch_tour_with_null_returns_422(field):
+    # Validation fails before the handler runs, so no database is touched
+    response = TestClient(app).patch("/api/v1/tours/1", json={"version": 1, field: None})
+    assert response.status_code == 422
+
+
+def test_tour_update_converts_aware_dates_to_naive_utc():
+    update = TourUpdate(
+        version=1,
+        start_date="2099-01-01T03:00:00+03:00",
+        end_date="2099-01-02T00:00:00Z",
+    )
+    assert update.start_date == datetime(2099, 1, 1, 0, 0)
+    assert update.end_date == datetime(2099, 1, 2, 0, 0)
+    assert update.start_date.tzinfo is None and update.end_date.tzinfo is None
+
+
+@pytest.mark.anyio
+async def test_patch_tour_with_aware_end_date(client, make_tour):
+    tour = await make_tour()
+    response = client.patch(
+        f"/api/v1/tours/{tour.id}",
+        json={"version": tour.version, "end_date": "2099-01-01T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    assert response.json()["end_date"] == "2099-01-01T00:00:00"
+    assert response.json()["version"] == tour.version + 1
+
+
+@pytest.mark.anyio
+async def test_patch_tour_rejects_end_before_stored_start(client, make_tour):
+    tour = await make_tour()
+    response = client.patch(
+        f"/api/v1/tours/{tour.id}",
+        json={"version": tour.version, "end_date": "2000-01-01T00:00:00+02:00"},
+    )
+    assert response.status_code == 409
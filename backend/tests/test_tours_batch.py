@@ -0,0 +1,27 @@
+import pytest
+
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def batch(client, ids: str):
+    return client.get("/api/v1/tours/batch", params={"ids": ids})
+
+
+async def test_batch_keeps_requested_order(client, make_tour):
+    first = await make_tour(title="First")
+    second = await make_tour(title="Second")
+
+    response = batch(client, f"{second.id}, {first.id},{second.id},999999")
+    assert response.status_code == 200
+    data = response.json()
+    assert [tour["id"] for tour in data["tours"]] == [second.id, first.id]
+    assert [tour["title"] for tour in data["tours"]] == ["Second", "First"]
+    assert data["missing_ids"] == [999999]
+
+
+def test_batch_rejects_bad_ids(client):
+    assert batch(client, "1,two").status_code == 400
+    assert batch(client, " , ").status_code == 400
+    assert batch(client, ",".join(str(i) for i in range(1, settings.tours_batch_max_ids + 2))).status_code == 400
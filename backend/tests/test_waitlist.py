@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import update
+
+from app.crud import waitlist_crud
+from app.crud.slots import slot_crud
+from app.models import Tour, WaitlistEntry
+
+pytestmark = pytest.mark.anyio
+
+
+def join(client, tour_id: int, people: int, name: str = "Customer"):
+    return client.post("/api/v1/waitlist/", json={
+        "tour_id": tour_id,
+        "customer_name": name,
+        "customer_email": f"{name.lower()}@example.com",
+        "customer_phone": "+70000000000",
+        "number_of_people": people,
+    })
+
+
+async def free_slots(db, tour_id: int, n: int) -> None:
+    await slot_crud.release(db, {tour_id: n})
+    await db.commit()
+
+
+async def statuses(db, entry_ids):
+    entries = [await db.get(WaitlistEntry, entry_id, populate_existing=True) for entry_id in entry_ids]
+    return [entry.status for entry in entries]
+
+
+async def test_join_sold_out_tour(client, make_tour):
+    tour = await make_tour(max_people=15, available_slots=0)
+    response = join(client, tour.id, 3)
+    assert response.status_code == 201
+    entry = response.json()
+    assert entry["status"] == "waiting"
+    assert entry["position"] == 1
+    assert entry["people_ahead"] == 0
+
+
+async def test_join_rejects_party_larger_than_tour(client, make_tour):
+    tour = await make_tour(max_people=15, available_slots=0)
+    response = join(client, tour.id, 100)
+    assert response.status_code == 422
+    assert "capacity" in response.json()["detail"]
+
+
+async def test_join_rejects_when_slots_are_free(client, make_tour):
+    tour = await make_tour(max_people=15, available_slots=5)
+    assert join(client, tour.id, 3).status_code == 409
+
+
+async def test_join_unknown_tour(client):
+    assert join(client, 999999, 2).status_code == 404
+
+
+async def test_position_and_people_ahead(client, make_tour):
+    tour = await make_tour(max_people=15, available_slots=0)
+    join(client, tour.id, 3, "First")
+    join(client, tour.id, 4, "Second")
+    third = join(client, tour.id, 2, "Third").json()
+    assert third["position"] == 3
+    assert third["people_ahead"] == 7
+
+    demand = client.get(f"/api/v1/waitlist/tours/{tour.id}").json()
+    assert demand["waiting_parties"] == 3
+    assert demand["waiting_people"] == 9
+
+
+async def test_cancel_moves_queue_up(client, make_tour):
+    tour = await make_tour(max_people=15, available_slots=0)
+    first = join(client, tour.id, 3, "First").json()
+    second = join(client, tour.id, 2, "Second").json()
+
+    response = client.delete(f"/api/v1/waitlist/{first['id']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.delete(f"/api/v1/waitlist/{first['id']}").status_code == 404
+
+    moved = client.get(f"/api/v1/waitlist/{second['id']}").json()
+    assert moved["position"] == 1
+    assert moved["people_ahead"] == 0
+
+
+async def test_promotion_is_strictly_fifo(client, db, make_tour):
+    tour_id = (await make_tour(max_people=15, available_slots=0)).id
+    big = join(client, tour_id, 5, "Big").json()["id"]
+    small = join(client, tour_id, 1, "Small").json()["id"]
+
+    # 3 free seats fit the small party, but it must not overtake the big one
+    await free_slots(db, tour_id, 3)
+    assert tour_id not in await waitlist_crud.get_promotable_tours(db)
+    assert await waitlist_crud.promote_tour(db, tour_id) == 0
+    assert await statuses(db, [big, small]) == ["waiting", "waiting"]
+
+    # 6 free seats: both are booked, in arrival order
+    await free_slots(db, tour_id, 3)
+    assert tour_id in await waitlist_crud.get_promotable_tours(db)
+    assert await waitlist_crud.promote_tour(db, tour_id) == 2
+    assert await statuses(db, [big, small]) == ["promoted", "promoted"]
+
+    entries = [client.get(f"/api/v1/waitlist/{entry_id}").json() for entry_id in (big, small)]
+    assert entries[0]["booking_id"] < entries[1]["booking_id"]
+    remaining = await db.get(Tour, tour_id, populate_existing=True)
+    assert remaining.available_slots == 0
+
+
+async def test_party_larger_than_lowered_capacity_does_not_block(client, db, make_tour):
+    tour_id = (await make_tour(max_people=15, available_slots=0)).id
+    big = join(client, tour_id, 10, "Big").json()["id"]
+    small = join(client, tour_id, 2, "Small").json()["id"]
+    # Capacity lowered after the big party queued: it can never be promoted
+    await db.execute(update(Tour).where(Tour.id == tour_id).values(max_people=8))
+    await free_slots(db, tour_id, 2)
+
+    assert tour_id in await waitlist_crud.get_promotable_tours(db)
+    assert await waitlist_crud.promote_tour(db, tour_id) == 1
+    assert await statuses(db, [big, small]) == ["waiting", "promoted"]
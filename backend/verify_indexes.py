@@ -0,0 +1,121 @@
+"""Verify that tour filter and booking cancel queries use the indexes.
+
+Runs EXPLAIN QUERY PLAN for the queries built by TourCRUD for each common
+filter combination, and for the BookingCRUD cancel UPDATEs, and fails if
+SQLite falls back to a full table scan. tests/test_query_plans.py runs the
+same cases against a freshly migrated database.
+
+Usage: python verify_indexes.py [DB_PATH]   (default: tours.db)
+"""
+import sqlite3
+import sys
+from datetime import datetime
+
+from sqlalchemy.dialects import sqlite
+
+from app.crud.tour import tour_crud, booking_crud
+
+DEFAULT_DB_PATH = "tours.db"
+
+START = datetime(2026, 6, 1)
+END = datetime(2026, 6, 30)
+
+# name -> (filters, expected index for the page query)
+CASES = {
+    "no filters": ({}, "ix_tours_created_at"),
+    "country": ({"country": "Италия"}, "ix_tours_country_norm_created_at"),
+    "country + price": (
+        {"country": "Италия", "min_price": 300, "max_price": 900},
+        "ix_tours_country_norm_",
+    ),
+    "country + dates": (
+        {"country": "Италия", "start_date": START, "end_date": END},
+        "ix_tours_country_norm_",
+    ),
+    "country + price + dates": (
+        {"country": "Италия", "min_price": 300, "max_price": 900,
+         "start_date": START, "end_date": END},
+        "ix_tours_country_norm_",
+    ),
+    "price": ({"min_price": 300, "max_price": 900}, "ix_tours_"),
+    "dates": ({"start_date": START, "end_date": END}, "ix_tours_"),
+    "overlaps": (
+        {"date_mode": "overlaps", "start_date": START, "end_date": END},
+        "ix_tours_dates_created_at",
+    ),
+    "country + overlaps": (
+        {"country": "Италия", "date_mode": "overlaps", "start_date": START, "end_date": END},
+        "ix_tours_country_norm_",
+    ),
+    "starts within": (
+        {"date_mode": "starts_within", "within_days": 14, "start_date": START},
+        "ix_tours_dates_created_at",
+    ),
+}
+
+# name -> (cancel filters, expected index); the status index is too coarse
+# (most bookings are confirmed), the tour or primary key must drive the UPDATE
+CANCEL_CASES = {
+    "cancel booking": ({"booking_ids": [1]}, "PRIMARY KEY"),
+    "cancel tour bookings": ({"tour_id": 1}, "ix_bookings_tour_id"),
+    "cancel listed tour bookings": ({"tour_id": 1, "booking_ids": [1, 2, 3]}, "bookings USING"),
+}
+
+
+def explain(cursor, query) -> list:
+    compiled = query.compile(
+        dialect=sqlite.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.params
+    # Positional parameters in the order SQLite expects them
+    args = [params[name] for name in compiled.positiontup]
+    args = [a.isoformat(" ") if isinstance(a, datetime) else a for a in args]
+    cursor.execute(f"EXPLAIN QUERY PLAN {compiled.string}", args)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def check(plan: list, expected_index: str) -> list:
+    problems = []
+    if not any(expected_index in step for step in plan):
+        problems.append(f"expected index like '{expected_index}'")
+    if any(step.startswith(("SCAN tours", "SCAN bookings")) and "INDEX" not in step for step in plan):
+        problems.append("full table scan")
+    return problems
+
+
+def main() -> int:
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("ANALYZE")
+
+    failed = 0
+    for name, (filters, expected_index) in CASES.items():
+        query, count_query = tour_crud.build_filter_queries(**filters)
+        for label, q in (("page", query), ("count", count_query)):
+            plan = explain(cursor, q)
+            problems = check(plan, expected_index if label == "page" else "ix_tours_")
+            status = "OK" if not problems else "FAIL: " + ", ".join(problems)
+            print(f"[{status}] {name} ({label})")
+            for step in plan:
+                print(f"    {step}")
+            failed += bool(problems)
+
+    for name, (filters, expected_index) in CANCEL_CASES.items():
+        plan = explain(cursor, booking_crud.build_cancel_query(**filters))
+        problems = check(plan, expected_index)
+        status = "OK" if not problems else "FAIL: " + ", ".join(problems)
+        print(f"[{status}] {name}")
+        for step in plan:
+            print(f"    {step}")
+        failed += bool(problems)
+
+    conn.close()
+    if failed:
+        print(f"\n[ERROR] {failed} queries do not use the expected indexes")
+        return 1
+    print("\n[OK] All filter and cancel queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Замер токенов промпта и задержки по ходам агента (verbose vs compact)
+
+Прогоняет фиксированный набор запросов одной сессией через MainAgent дважды: с
+результатами инструментов в формате verbose и в формате compact. Для каждого хода
+печатает число вызовов LLM, токены промпта (сумма по вызовам хода, включая историю
+и результаты инструментов, как их собрал агент) и задержку хода.
+
+Бэкенд по умолчанию записанный: ответы API отдаются локально из фиксированных
+данных, поэтому оба формата получают одни и те же результаты инструментов.
+
+Модель:
+  - по умолчанию OpenAI из .env (OPENAI_API_KEY): токены промпта — из usage провайдера;
+  - --fake-llm: локальная модель со сценарием (на каждый запрос один фиксированный
+    вызов инструмента, затем ответ), токены промпта считаются tiktoken cl100k_base
+    по сообщениям и описаниям tools, которые получила модель. Задержка тогда
+    показывает только накладные расходы агента и инструментов.
+
+    python measure_tool_tokens.py [--fake-llm] [--live-backend]
+
+--live-backend — брать ответы у настоящего бэкенда (BACKEND_URL) вместо записанных.
+"""
+
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.main_agent import MainAgent
+from src.agent.model_router import LARGE
+from src.tools import backend_tools
+
+load_dotenv()
+
+# Запросы одной сессии (история растет от хода к ходу).
+# Вызов инструмента используется только сценарием --fake-llm
+QUERIES = [
+    ("Покажи туры в Турцию", "get_tours", {"country": "Турция"}),
+    ("Расскажи подробнее про тур 5", "get_tour_details", {"tour_id": 5}),
+    ("Сравни туры 3 и 7", "compare_tours", {"tour_ids": [3, 7]}),
+    ("Что есть похожего на тур 5?", "get_similar_tours", {"tour_id": 5}),
+    ("Покажи мои бронирования, email ivan@example.com", "get_user_bookings", {"email": "ivan@example.com"}),
+]
+
+FORMATS = ("verbose", "compact")
+
+
+DESCRIPTION = (
+    "Незабываемое путешествие по историческим местам с опытным гидом. "
+    "В программу входят экскурсии по старому городу, посещение музеев, "
+    "дегустация национальной кухни и прогулка на кораблике вдоль побережья. "
+    "Проживание в отеле 4* в центре города, завтраки включены."
+)
+
+
+def _tour(i: int) -> dict:
+    return {
+        "id": i,
+        "title": f"Тур по побережью №{i}",
+        "description": DESCRIPTION,
+        "country": "Турция",
+        "city": "Анталья",
+        "price": 1200.0 + i * 50,
+        "duration_days": 7,
+        "max_people": 20,
+        "available_slots": 20 - i % 7,
+        "start_date": f"2026-07-{i % 20 + 1:02d}T00:00:00",
+        "end_date": f"2026-07-{i % 20 + 8:02d}T00:00:00",
+        "created_at": "2026-01-10T12:00:00",
+        "slot_shards": 0,
+    }
+
+
+def _booking(i: int) -> dict:
+    return {
+        "id": 100 + i,
+        "tour_id": i,
+        "customer_name": "Иван Петров",
+        "customer_email": "ivan@example.com",
+        "customer_phone": "+79990000000",
+        "number_of_people": 2,
+        "total_price": 2400.0 + i * 100,
+        "status": "confirmed",
+        "booking_date": f"2026-05-{i % 28 + 1:02d}T09:30:00.123456",
+        "created_at": f"2026-05-{i % 28 + 1:02d}T09:30:00.123456",
+        "tour": {"id": i, "title": f"Тур по побережью №{i}", "country": "Турция",
+                 "city": "Анталья", "start_date": "2026-07-01T00:00:00", "end_date": "2026-07-08T00:00:00"},
+    }
+
+
+def recorded_response(path: str, params: Dict[str, Any]) -> Optional[Any]:
+    """Ответ API по пути; None — 404"""
+    if path == "/tours/":
+        return {"tours": [_tour(i) for i in range(1, 11)], "total": 42, "page": 1,
+                "page_size": 10, "total_pages": 5}
+    if path == "/tours/batch":
+        ids = [int(i) for i in str(params.get("ids", "")).split(",") if i]
+        return {"tours": [_tour(i) for i in ids], "missing_ids": []}
+    match = re.fullmatch(r"/tours/(\d+)/similar", path)
+    if match:
+        tour_id = int(match.group(1))
+        return {"tour_id": tour_id, "tours": [
+            {**_tour(tour_id + i), "score": round(0.9 - i * 0.05, 3)}
+            for i in range(1, int(params.get("limit", 5)) + 1)
+        ]}
+    match = re.fullmatch(r"/tours/(\d+)", path)
+    if match:
+        return _tour(int(match.group(1)))
+    if path == "/bookings/":
+        return {"bookings": [_booking(i) for i in range(1, 6)], "next_cursor": "MjAyNi0wNS0wMVQwOTozMDowMHwxMDE="}
+    return None
+
+
+def recorded_get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> requests.Response:
+    """Замена requests.get для инструментов: записанный ответ без сети"""
+    data = recorded_response(url[len(backend_tools.API_BASE):], params or {})
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200 if data is not None else 404
+    response._content = json.dumps(data if data is not None else {"detail": "Not found"}).encode()
+    return response
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Модель со сценарием: вызов инструмента из QUERIES, после результата — короткий ответ"""
+
+    encoding: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _prompt_tokens(self, messages: List[BaseMessage], tools: Any) -> int:
+        parts = [str(message.content) for message in messages]
+        parts += [json.dumps(getattr(message, "tool_calls", None) or [], ensure_ascii=False) for message in messages]
+        parts.append(json.dumps(tools or [], ensure_ascii=False))
+        return sum(len(self.encoding.encode(part)) for part in parts)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        last_human = max(i for i, message in enumerate(messages) if isinstance(message, HumanMessage))
+        query = messages[last_human].content
+        if any(isinstance(message, ToolMessage) for message in messages[last_human:]):
+            message = AIMessage(content=f"Вот что удалось найти по запросу «{query}».")
+        else:
+            name, args = next((name, args) for q, name, args in QUERIES if q == query)
+            message = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}"}])
+        prompt_tokens = self._prompt_tokens(messages, kwargs.get("tools"))
+        completion_tokens = len(self.encoding.encode(str(message.content) + json.dumps(message.tool_calls)))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create_llms(fake: bool) -> Optional[Dict[str, BaseChatModel]]:
+    """Модели для MainAgent; None — ChatOpenAI из .env"""
+    if not fake:
+        if not os.getenv("OPENAI_API_KEY"):
+            sys.exit("OPENAI_API_KEY не задан: задайте его в .env или запустите с --fake-llm")
+        return None
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        sys.exit(f"Для --fake-llm нужен tiktoken со словарем cl100k_base: {e}")
+    return {LARGE: ScriptedChatModel(encoding=encoding)}
+
+
+def run_session(output_format: str, llms: Optional[Dict[str, BaseChatModel]]) -> List[Dict[str, Any]]:
+    """Прогнать QUERIES одной новой сессией и вернуть usage каждого хода"""
+    agent = MainAgent(llms=llms)
+    turns = []
+    with backend_tools.tool_output_format(output_format):
+        for query, _, _ in QUERIES:
+            result = agent.process(query, session_id=f"measure-{output_format}")
+            if result.get("error"):
+                sys.exit(f"Ход «{query}» завершился ошибкой: {result['error']}")
+            turns.append(result["usage"])
+    return turns
+
+
+def main() -> int:
+    fake = "--fake-llm" in sys.argv
+    # Измеряются ходы агента: быстрый путь без LLM отключен
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    llms = create_llms(fake)
+    if "--live-backend" not in sys.argv:
+        backend_tools.requests.get = recorded_get
+
+    results = {output_format: run_session(output_format, llms) for output_format in FORMATS}
+
+    print(f"Модель: {'сценарий (--fake-llm), токены tiktoken cl100k_base' if fake else 'OpenAI, токены из usage'}")
+    print(f"Бэкенд: {'BACKEND_URL' if '--live-backend' in sys.argv else 'записанные ответы'}\n")
+    print(f"{'#':<3}{'запрос':<48}{'формат':<9}{'LLM':>4}{'промпт':>9}{'задержка, с':>13}")
+    for i, (query, _, _) in enumerate(QUERIES, 1):
+        for output_format in FORMATS:
+            usage = results[output_format][i - 1]
+            print(f"{i:<3}{query[:46]:<48}{output_format:<9}{usage['llm_calls']:>4}"
+                  f"{usage['prompt_tokens']:>9}{usage['latency']:>13.2f}")
+
+    totals = {
+        output_format: (sum(u["prompt_tokens"] for u in turns), sum(u["latency"] for u in turns))
+        for output_format, turns in results.items()
+    }
+    print()
+    for output_format, (tokens, latency) in totals.items():
+        print(f"итого {output_format:<8} промпт {tokens:>7} токенов, {latency:.2f} с")
+    verbose_tokens, compact_tokens = totals["verbose"][0], totals["compact"][0]
+    if verbose_tokens:
+        print(f"экономия compact: {1 - compact_tokens / verbose_tokens:.0%} токенов промпта")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
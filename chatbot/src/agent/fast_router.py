@@ -0,0 +1,160 @@
+"""Быстрый детерминированный маршрутизатор простых запросов в обход LLM"""
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+try:
+    # Попытка относительного импорта (когда запускается как модуль)
+    from ..tools import backend_tools
+except ImportError:
+    # Абсолютный импорт (когда импортируется из бэкенда)
+    from tools import backend_tools
+
+# Запросы длиннее этого почти всегда составные - их разбирает агент
+FAST_PATH_MAX_LENGTH = int(os.getenv("FAST_PATH_MAX_LENGTH", "80"))
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+NUMBER_RE = re.compile(r"\d+")
+BOOKING_RE = re.compile(r"брон|booking|заказ")
+# Число с единицей - это количество, а не ID: "тур 7 дней", "бронь 2 места"
+_UNIT = (
+    r"(?:дн|ден|ноч|мест|чел|люд|взросл|дет|реб|гост|"
+    r"day|night|seat|people|person|adult|child|kid|guest|pax)"
+)
+# ID стоит сразу после слова: с меткой ("бронирование №42", "booking #42")
+# или без нее, если за числом не идет единица ("тур 7")
+_ID = rf"(?:(?:№|#|id|номер)\s*(\d+)|(\d+)(?!\s*-?\s*{_UNIT}))\b"
+BOOKING_ID_RE = re.compile(rf"\b(?:брон\w*|bookings?|заказ\w*)\s*{_ID}")
+TOUR_ID_RE = re.compile(rf"\b(?:тур(?:а|е|у|ом)?|tour)\s*{_ID}")
+# Слова, после которых нужен полноценный агент: создание, отмена, сравнение, подбор
+COMPLEX_RE = re.compile(
+    r"заброн|заказать|оформ|\bbook\b|отмен|cancel|измен|перенес|change|"
+    r"сравн|compare|похож|similar|дешевл|cheap|дорож|почему|why|посовет|recommend"
+)
+
+
+def _match_id(pattern: "re.Pattern", text: str) -> Optional[int]:
+    """ID из шаблона: число после метки (группа 1) или без нее (группа 2)"""
+    match = pattern.search(text)
+    if match is None:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+@dataclass
+class FastPathResult:
+    """Ответ, полученный без LLM"""
+    intent: str
+    output: str
+
+
+class FastPathRouter:
+    """
+    Распознает тривиальные намерения по шаблонам и вызывает инструмент напрямую:
+
+    - "бронирование 42 a@b.com"         -> get_booking_details(42, "a@b.com")
+    - "мои бронирования a@b.com"        -> get_user_bookings("a@b.com")
+    - "тур 7" / "tour 7 details"        -> get_tour_details(7)
+
+    Бронирование по ID показывается только вместе с email клиента: без него
+    (и при несовпадении email) чужие персональные данные не отдаются.
+    Все остальное (и все, что похоже на составной запрос) возвращает None
+    и уходит в агента.
+    """
+
+    def __init__(self, max_length: int = FAST_PATH_MAX_LENGTH):
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._total = 0
+        self._fast_latency = 0.0
+        self._agent_turns = 0
+        self._agent_latency = 0.0
+
+    def match(self, query: str) -> Optional[Callable[[], FastPathResult]]:
+        """Найти подходящий шаблон; вернуть вызов инструмента или None"""
+        text = " ".join(query.lower().split())
+        if len(text) > self.max_length or COMPLEX_RE.search(text):
+            return None
+
+        emails = EMAIL_RE.findall(text)
+        numbers = NUMBER_RE.findall(EMAIL_RE.sub(" ", text))
+        if len(emails) > 1 or len(numbers) > 1:
+            return None
+
+        if emails:
+            if not BOOKING_RE.search(text):
+                return None
+            email = emails[0]
+            if not numbers:
+                return lambda: FastPathResult(
+                    "user_bookings", backend_tools.get_user_bookings(email)
+                )
+            booking_id = _match_id(BOOKING_ID_RE, EMAIL_RE.sub(" ", text))
+            if booking_id is None:
+                return None
+            return lambda: FastPathResult(
+                "booking_details",
+                backend_tools.get_booking_details(booking_id, customer_email=email),
+            )
+
+        # Бронирование без email - агент сначала спросит его
+        if BOOKING_RE.search(text):
+            return None
+
+        tour_id = _match_id(TOUR_ID_RE, text)
+        if tour_id is not None:
+            return lambda: FastPathResult(
+                "tour_details", backend_tools.get_tour_details(tour_id)
+            )
+        return None
+
+    def route(self, query: str) -> Optional[FastPathResult]:
+        """Обработать запрос без LLM, если он распознан; иначе None"""
+        handler = self.match(query)
+        if handler is None:
+            with self._lock:
+                self._total += 1
+            return None
+
+        started = time.perf_counter()
+        # Ответ пользователю, а не LLM: подробный формат вместо таблиц
+        with backend_tools.tool_output_format("verbose"):
+            result = handler()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._total += 1
+            self._hits[result.intent] = self._hits.get(result.intent, 0) + 1
+            self._fast_latency += elapsed
+        return result
+
+    def record_agent_turn(self, latency: float) -> None:
+        """Учесть длительность хода через агента (база для оценки сэкономленного времени)"""
+        with self._lock:
+            self._agent_turns += 1
+            self._agent_latency += latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Доля запросов в обход LLM и оценка сэкономленного времени"""
+        with self._lock:
+            hits = sum(self._hits.values())
+            avg_agent = self._agent_latency / self._agent_turns if self._agent_turns else None
+            avg_fast = self._fast_latency / hits if hits else None
+            saved = (
+                max(0.0, avg_agent * hits - self._fast_latency)
+                if avg_agent is not None else None
+            )
+            return {
+                "requests": self._total,
+                "fast_path_hits": hits,
+                "hit_rate": round(hits / self._total, 3) if self._total else 0.0,
+                "hits_by_intent": dict(self._hits),
+                "avg_fast_path_latency": round(avg_fast, 3) if avg_fast is not None else None,
+                "avg_agent_latency": round(avg_agent, 3) if avg_agent is not None else None,
+                "estimated_latency_saved": round(saved, 3) if saved is not None else None,
+            }
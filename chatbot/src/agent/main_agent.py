@@ -1,10 +1,16 @@
 """Главный агент с архитектурой и поддержкой tools"""
 
 from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.agents.agent import RunnableMultiActionAgent
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from typing import Dict, Any, List
+from langchain_core.messages import SystemMessage
+from typing import Dict, Any, List, Optional
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 try:
@@ -12,25 +18,83 @@ try:
     from ..prompts.system_prompts import SYSTEM_PROMPT
     from ..tools.tool_registry import create_tools
     from ..memory.conversation_memory import ConversationMemory
+    from .usage import UsageCallbackHandler, UsageSummary
+    from .fast_router import FastPathRouter
+    from .model_router import ModelRouter, SMALL, LARGE
+    from .tracing import Tracer
 except ImportError:
     # Абсолютный импорт (когда импортируется из бэкенда)
     from prompts.system_prompts import SYSTEM_PROMPT
     from tools.tool_registry import create_tools
     from memory.conversation_memory import ConversationMemory
+    from agent.usage import UsageCallbackHandler, UsageSummary
+    from agent.fast_router import FastPathRouter
+    from agent.model_router import ModelRouter, SMALL, LARGE
+    from agent.tracing import Tracer
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def build_prompt() -> ChatPromptTemplate:
+    """
+    Промпт, удобный для кэширования префикса у провайдера.
+    
+    Порядок сообщений: статический system (байт-в-байт одинаковый при каждом вызове,
+    без подстановок) -> история (только дописывается в конец) -> новый запрос ->
+    scratchpad текущего хода. Описания tools передаются отдельно и тоже не меняются,
+    поэтому у каждого следующего вызова префикс совпадает с предыдущим вызовом.
+    """
+    return ChatPromptTemplate.from_messages([
+        # Готовое сообщение, а не шаблон: текст не проходит через форматирование
+        SystemMessage(content=SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+
+
+def _create_llm(model: str) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=model,
+        temperature=float(os.getenv("AGENT_TEMPERATURE", "0.7")),
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # AgentExecutor вызывает модель в режиме стриминга: без этого usage не приходит
+        stream_usage=True
+    )
+
+
+def create_tier_llms() -> Dict[str, BaseChatModel]:
+    """
+    Модели по уровням: большая (OPENAI_MODEL) и малая быстрая (OPENAI_MODEL_SMALL).
+    
+    При MODEL_ROUTING_ENABLED=false или одинаковых моделях используется только большая.
+    """
+    large_model = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+    small_model = os.getenv("OPENAI_MODEL_SMALL", "gpt-4o-mini")
+    llms: Dict[str, BaseChatModel] = {LARGE: _create_llm(large_model)}
+    if os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true" and small_model != large_model:
+        llms[SMALL] = _create_llm(small_model)
+    return llms
+
+
+def _model_name(llm: BaseChatModel) -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
 
 class MainAgent:
     """Главный агент с поддержкой tools для работы с бэкендом"""
     
-    def __init__(self):
-        # Инициализация LLM
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
-            temperature=float(os.getenv("AGENT_TEMPERATURE", "0.7")),
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+    def __init__(self, llms: Optional[Dict[str, BaseChatModel]] = None):
+        """
+        Args:
+            llms: Модели по уровням (SMALL/LARGE); по умолчанию ChatOpenAI из .env.
+                В тестах сюда передаются локальные fake-модели.
+        """
+        # Инициализация LLM по уровням
+        self.llms = llms or create_tier_llms()
+        self.llm = self.llms.get(LARGE) or next(iter(self.llms.values()))
         
         # Создание всех инструментов для работы с бэкендом
         self.tools = create_tools()
@@ -38,24 +102,34 @@ class MainAgent:
         # Память разговоров
         self.memory = ConversationMemory()
         
-        # Создание промпта для агента
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        # Суммарный учет токенов и задержки по всем запросам
+        self.usage = UsageSummary()
+        self._usage_lock = threading.Lock()
         
-        # Создание агента с поддержкой tools
-        agent = create_openai_tools_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
+        # Трассы ходов: спаны вызовов LLM и инструментов
+        self.tracer = Tracer()
+        
+        # Простые запросы (статус бронирования, тур по ID) обрабатываются без LLM
+        self.fast_router = (
+            FastPathRouter() if os.getenv("FAST_PATH_ENABLED", "true").lower() == "true" else None
+        )
+        
+        # Создание промпта для агента (один раз, чтобы префикс был стабильным)
+        prompt = build_prompt()
+        
+        # Агент с поддержкой tools на каждый уровень модели; промпт и tools общие
+        agents = {
+            tier: create_openai_tools_agent(llm=llm, tools=self.tools, prompt=prompt)
+            for tier, llm in self.llms.items()
+        }
+        # На каждом шаге выбирается модель: малая для простых шагов, большая для сложных
+        self.model_router = ModelRouter(
+            agents, {tier: _model_name(llm) for tier, llm in self.llms.items()}
         )
         
         # Создание executor для выполнения агента
         self.agent_executor = AgentExecutor(
-            agent=agent,
+            agent=RunnableMultiActionAgent(runnable=self.model_router.as_runnable(), stream_runnable=True),
             tools=self.tools,
             verbose=os.getenv("VERBOSE", "false").lower() == "true",
             handle_parsing_errors=True,
@@ -76,20 +150,51 @@ class MainAgent:
         """
         # Получаем память для сессии
         memory = self.memory.get_memory(session_id)
-        chat_history = memory.chat_memory.messages
+        # Копия: история в промпте только дописывается и не меняется во время вызова
+        chat_history = list(memory.chat_memory.messages)
+        trace_handler = self.tracer.start_turn(session_id, query)
+        started = time.perf_counter()
+        
+        fast_result = self.fast_router.route(query) if self.fast_router else None
+        if fast_result is not None:
+            memory.chat_memory.add_user_message(query)
+            memory.chat_memory.add_ai_message(fast_result.output)
+            latency = time.perf_counter() - started
+            self.tracer.record_span(
+                trace_handler, "tool", fast_result.intent, latency, len(query), len(fast_result.output)
+            )
+            turn = self.tracer.finish_turn(trace_handler, latency, fast_result.output, route="fast_path")
+            return {
+                "output": fast_result.output,
+                "route": "fast_path",
+                "intent": fast_result.intent,
+                "trace_id": turn.trace_id,
+                "usage": self._record_usage(UsageCallbackHandler(), latency, session_id)
+            }
         
+        usage_handler = UsageCallbackHandler()
         try:
             # Выполняем запрос через агента с tools
-            result = self.agent_executor.invoke({
-                "input": query,
-                "chat_history": chat_history
-            })
+            result = self.agent_executor.invoke(
+                {
+                    "input": query,
+                    "chat_history": chat_history
+                },
+                config={"callbacks": [usage_handler, trace_handler]}
+            )
             
             # Сохраняем в память
             memory.chat_memory.add_user_message(query)
             output_text = result.get("output", "")
             memory.chat_memory.add_ai_message(output_text)
             
+            latency = time.perf_counter() - started
+            if self.fast_router:
+                self.fast_router.record_agent_turn(latency)
+            turn = self.tracer.finish_turn(trace_handler, latency, output_text)
+            result["route"] = "agent"
+            result["trace_id"] = turn.trace_id
+            result["usage"] = self._record_usage(usage_handler, latency, session_id)
             return result
         except Exception as e:
             error_message = f"Произошла ошибка при обработке запроса: {str(e)}"
@@ -97,11 +202,52 @@ class MainAgent:
             memory.chat_memory.add_user_message(query)
             memory.chat_memory.add_ai_message(error_message)
             
+            latency = time.perf_counter() - started
+            turn = self.tracer.finish_turn(trace_handler, latency, error_message, error=str(e))
             return {
                 "output": error_message,
-                "error": str(e)
+                "error": str(e),
+                "route": "agent",
+                "trace_id": turn.trace_id,
+                "usage": self._record_usage(usage_handler, latency, session_id)
             }
     
+    def _record_usage(self, handler: UsageCallbackHandler, latency: float, session_id: str) -> Dict[str, Any]:
+        """Добавить учет запроса к общей статистике и вернуть его"""
+        summary = handler.summary
+        with self._usage_lock:
+            self.usage.merge(summary)
+        
+        usage = summary.to_dict()
+        usage["latency"] = round(latency, 3)
+        logger.info(
+            "session=%s llm_calls=%d prompt_tokens=%d cached=%d uncached=%d completion=%d latency=%.2fs",
+            session_id, summary.llm_calls, summary.prompt_tokens, summary.cached_prompt_tokens,
+            summary.uncached_prompt_tokens, summary.completion_tokens, latency
+        )
+        return usage
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Суммарные токены (кэшированные и нет) и задержка LLM по всем запросам"""
+        with self._usage_lock:
+            return self.usage.to_dict(with_calls=False)
+    
+    def get_model_stats(self) -> Dict[str, Any]:
+        """Шаги агента по уровням моделей и токены/задержка каждого уровня и каждой модели"""
+        with self._usage_lock:
+            usage = self.usage.to_dict(with_calls=False)
+        return {**self.model_router.get_stats(), "by_tier": usage["by_tier"], "by_model": usage["by_model"]}
+    
+    def get_session_traces(self, session_id: str) -> List[Dict[str, Any]]:
+        """Разбивка задержки по ходам сессии: LLM, инструменты, остальное"""
+        return self.tracer.session_breakdown(session_id)
+    
+    def get_router_stats(self) -> Dict[str, Any]:
+        """Доля запросов, обработанных без LLM, и сэкономленное время"""
+        if self.fast_router is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.fast_router.get_stats()}
+    
     def clear_session(self, session_id: str):
         """Очистить память сессии"""
         self.memory.clear_memory(session_id)
@@ -0,0 +1,108 @@
+"""Маршрутизация шагов агента между моделями разного размера"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+SMALL = "small"
+LARGE = "large"
+
+# Пороги политики (переопределяются через .env)
+ROUTER_MAX_QUERY_LENGTH = int(os.getenv("MODEL_ROUTER_MAX_QUERY_LENGTH", "200"))
+ROUTER_MAX_HISTORY_MESSAGES = int(os.getenv("MODEL_ROUTER_MAX_HISTORY_MESSAGES", "20"))
+ROUTER_MAX_TOOL_STEPS = int(os.getenv("MODEL_ROUTER_MAX_TOOL_STEPS", "2"))
+
+# Запросы, где ошибка модели дорого стоит или нужно рассуждать, а не извлекать аргументы
+COMPLEX_RE = re.compile(
+    r"заброн|оформ|\bbook\b|отмен|cancel|сравн|compare|посовет|recommend|"
+    r"лучше|better|почему|why|объясн|explain|план|plan"
+)
+
+
+def choose_tier(query: str, history_length: int, tool_steps: int, tool_errors: int = 0) -> str:
+    """
+    Политика выбора модели для одного шага агента.
+
+    Args:
+        query: Текущий запрос пользователя
+        history_length: Число сообщений в истории разговора
+        tool_steps: Сколько вызовов инструментов уже сделано в этом ходе
+        tool_errors: Сколько из них вернули ошибку
+
+    Returns:
+        SMALL для простых шагов (извлечь аргументы, пересказать результат),
+        LARGE для сложных запросов, длинной истории или застрявшего агента
+    """
+    if len(query) > ROUTER_MAX_QUERY_LENGTH or COMPLEX_RE.search(query.lower()):
+        return LARGE
+    if history_length > ROUTER_MAX_HISTORY_MESSAGES:
+        return LARGE
+    # Малая модель уже сделала несколько шагов или инструмент ответил ошибкой - эскалируем
+    if tool_steps >= ROUTER_MAX_TOOL_STEPS or tool_errors:
+        return LARGE
+    return SMALL
+
+
+def _is_tool_error(observation: Any) -> bool:
+    text = str(observation)
+    return text.startswith(("Ошибка", "Не удалось"))
+
+
+class ModelRouter:
+    """
+    Выбирает агента (промпт + модель уровня) на каждом шаге AgentExecutor.
+
+    Принимает готовых агентов по уровням, поэтому в тестах можно подставить
+    локальные fake-модели вместо ChatOpenAI.
+    """
+
+    def __init__(self, agents: Dict[str, Runnable], models: Dict[str, str]):
+        # Уровень в metadata доходит до callbacks вызова модели (учет токенов по уровням)
+        self.agents = {
+            tier: agent.with_config(metadata={"model_tier": tier}) for tier, agent in agents.items()
+        }
+        self.models = models
+        self._lock = threading.Lock()
+        self._steps: Dict[str, int] = {tier: 0 for tier in agents}
+
+    def select(self, inputs: Dict[str, Any]) -> str:
+        """Уровень модели для шага по входу агента"""
+        if len(self.agents) == 1:
+            return next(iter(self.agents))
+        steps: List = inputs.get("intermediate_steps") or []
+        tier = choose_tier(
+            inputs.get("input", ""),
+            len(inputs.get("chat_history") or []),
+            len(steps),
+            sum(1 for _, observation in steps if _is_tool_error(observation)),
+        )
+        return tier if tier in self.agents else LARGE
+
+    def _route(self, inputs: Dict[str, Any]) -> Runnable:
+        tier = self.select(inputs)
+        with self._lock:
+            self._steps[tier] += 1
+        return self.agents[tier]
+
+    def as_runnable(self) -> Runnable:
+        """Runnable для AgentExecutor: выбранный агент выполняется (и стримится) как есть"""
+        return RunnableLambda(self._route, name="ModelRouter")
+
+    def tier_of(self, model: Optional[str]) -> Optional[str]:
+        for tier, name in self.models.items():
+            if name == model:
+                return tier
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Число шагов агента по уровням"""
+        with self._lock:
+            total = sum(self._steps.values())
+            return {
+                "models": dict(self.models),
+                "steps": dict(self._steps),
+                "small_share": round(self._steps.get(SMALL, 0) / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,251 @@
+"""Трассировка выполнения агента: спаны вызовов LLM и инструментов за каждый ход"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+try:
+    # Попытка относительного импорта (когда запускается как модуль)
+    from .usage import usage_from_result
+except ImportError:
+    # Абсолютный импорт (когда импортируется из бэкенда)
+    from agent.usage import usage_from_result
+
+# Файл для выгрузки трасс (JSON lines, по ходу на строку); пусто - не выгружать
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+# Сколько последних ходов хранить в памяти на сессию
+TRACE_MAX_TURNS = int(os.getenv("TRACE_MAX_TURNS", "50"))
+
+
+@dataclass
+class Span:
+    """Один вызов LLM или инструмента внутри хода"""
+    kind: str  # llm | tool
+    name: str
+    started_at: float
+    duration: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class TurnTrace:
+    """Один ход разговора: запрос пользователя -> ответ"""
+    trace_id: str
+    session_id: str
+    started_at: float
+    query_size: int
+    route: str = "agent"
+    duration: float = 0.0
+    output_size: int = 0
+    max_iterations_reached: bool = False
+    error: Optional[str] = None
+    spans: List[Span] = field(default_factory=list)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Куда ушло время хода: LLM, инструменты, остальное (промпт, парсинг, код агента)"""
+        llm_time = sum((s.duration for s in self.spans if s.kind == "llm"), 0.0)
+        tool_time = sum((s.duration for s in self.spans if s.kind == "tool"), 0.0)
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "route": self.route,
+            "duration": round(self.duration, 3),
+            "llm_time": round(llm_time, 3),
+            "tool_time": round(tool_time, 3),
+            "other_time": round(max(0.0, self.duration - llm_time - tool_time), 3),
+            "llm_calls": sum(1 for s in self.spans if s.kind == "llm"),
+            "tool_calls": sum(1 for s in self.spans if s.kind == "tool"),
+            "prompt_tokens": sum(s.prompt_tokens for s in self.spans),
+            "completion_tokens": sum(s.completion_tokens for s in self.spans),
+            "retries": sum(s.retries for s in self.spans),
+            "max_iterations_reached": self.max_iterations_reached,
+            "error": self.error,
+        }
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Callback одного хода: открывает и закрывает спаны по событиям LangChain"""
+
+    def __init__(self, turn: TurnTrace):
+        self.turn = turn
+        # run_id -> (спан, момент старта по perf_counter)
+        self._open: Dict[UUID, Tuple[Span, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kind: str, name: str, input_size: int) -> None:
+        span = Span(kind=kind, name=name, started_at=time.time(), input_size=input_size)
+        with self._lock:
+            self._open[run_id] = (span, time.perf_counter())
+
+    def _finish(self, run_id: UUID, output_size: int = 0, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+            if opened is None:
+                return None
+            span, started = opened
+            span.duration = time.perf_counter() - started
+            span.output_size = output_size
+            if error is not None:
+                span.error = f"{type(error).__name__}: {error}"
+            self.turn.spans.append(span)
+        return span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        name = params.get("model") or params.get("model_name") or metadata.get("ls_model_name") or "llm"
+        size = sum(len(str(m.content)) for batch in messages for m in batch)
+        self._start(run_id, "llm", name, size)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        size = sum(len(g.text or "") for batch in response.generations for g in batch)
+        span = self._finish(run_id, size)
+        usage = usage_from_result(response)
+        if span is not None and usage is not None:
+            span.prompt_tokens = usage.prompt_tokens
+            span.cached_prompt_tokens = usage.cached_prompt_tokens
+            span.completion_tokens = usage.completion_tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=error)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            if run_id in self._open:
+                self._open[run_id][0].retries += 1
+
+    def on_tool_start(self, serialized, input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "tool", (serialized or {}).get("name") or "tool", len(input_str or ""))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, len(str(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=error)
+
+
+class Tracer:
+    """Хранит последние трассы по сессиям, выгружает их в JSONL и считает сводку"""
+
+    def __init__(self, export_path: str = TRACE_EXPORT_PATH, max_turns: int = TRACE_MAX_TURNS):
+        self.export_path = export_path
+        self.max_turns = max_turns
+        self._sessions: Dict[str, Deque[TurnTrace]] = {}
+        self._lock = threading.Lock()
+        # Накопительная сводка для /metrics: (kind, name) -> счетчики
+        self._span_totals: Dict[tuple, Dict[str, float]] = {}
+        self._turn_totals: Dict[str, Dict[str, float]] = {}
+        self._max_iterations = 0
+
+    def start_turn(self, session_id: str, query: str) -> TracingCallbackHandler:
+        turn = TurnTrace(
+            trace_id=uuid.uuid4().hex,
+            session_id=session_id,
+            started_at=time.time(),
+            query_size=len(query),
+        )
+        return TracingCallbackHandler(turn)
+
+    def finish_turn(
+        self,
+        handler: TracingCallbackHandler,
+        duration: float,
+        output: str,
+        route: str = "agent",
+        error: Optional[str] = None,
+    ) -> TurnTrace:
+        turn = handler.turn
+        turn.duration = duration
+        turn.output_size = len(output or "")
+        turn.route = route
+        turn.error = error
+        turn.max_iterations_reached = "max iterations" in (output or "")
+
+        with self._lock:
+            self._sessions.setdefault(
+                turn.session_id, deque(maxlen=self.max_turns)
+            ).append(turn)
+            self._account(turn)
+
+        if self.export_path:
+            self._export(turn)
+        return turn
+
+    def record_span(self, handler: TracingCallbackHandler, kind: str, name: str,
+                    duration: float, input_size: int = 0, output_size: int = 0) -> None:
+        """Добавить спан, выполненный вне LangChain (например, быстрый путь)"""
+        handler.turn.spans.append(Span(
+            kind=kind, name=name, started_at=time.time() - duration, duration=duration,
+            input_size=input_size, output_size=output_size,
+        ))
+
+    def _account(self, turn: TurnTrace) -> None:
+        totals = self._turn_totals.setdefault(turn.route, {"count": 0, "seconds": 0.0, "errors": 0})
+        totals["count"] += 1
+        totals["seconds"] += turn.duration
+        totals["errors"] += 1 if turn.error else 0
+        if turn.max_iterations_reached:
+            self._max_iterations += 1
+        for span in turn.spans:
+            totals = self._span_totals.setdefault((span.kind, span.name), {
+                "count": 0, "seconds": 0.0, "errors": 0, "retries": 0,
+                "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0,
+            })
+            totals["count"] += 1
+            totals["seconds"] += span.duration
+            totals["errors"] += 1 if span.error else 0
+            totals["retries"] += span.retries
+            totals["prompt_tokens"] += span.prompt_tokens
+            totals["cached_prompt_tokens"] += span.cached_prompt_tokens
+            totals["completion_tokens"] += span.completion_tokens
+
+    def _export(self, turn: TurnTrace) -> None:
+        line = json.dumps(asdict(turn), ensure_ascii=False)
+        with self._lock:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def export_jsonl(self, path: str, session_id: Optional[str] = None) -> int:
+        """Выгрузить хранимые трассы (все или одной сессии) в JSONL; вернуть число ходов"""
+        turns = self.get_turns(session_id)
+        with open(path, "w", encoding="utf-8") as f:
+            for turn in turns:
+                f.write(json.dumps(asdict(turn), ensure_ascii=False) + "\n")
+        return len(turns)
+
+    def get_turns(self, session_id: Optional[str] = None) -> List[TurnTrace]:
+        with self._lock:
+            if session_id is not None:
+                return list(self._sessions.get(session_id, ()))
+            return [turn for turns in self._sessions.values() for turn in turns]
+
+    def session_breakdown(self, session_id: str) -> List[Dict[str, Any]]:
+        """Разбивка задержки по ходам сессии"""
+        return [turn.breakdown() for turn in self.get_turns(session_id)]
+
+    def summary(self) -> Dict[str, Any]:
+        """Накопительная сводка по ходам и спанам (для /metrics)"""
+        with self._lock:
+            return {
+                "turns": {route: dict(v) for route, v in self._turn_totals.items()},
+                "spans": [
+                    {"kind": kind, "name": name, **values}
+                    for (kind, name), values in self._span_totals.items()
+                ],
+                "max_iterations_reached": self._max_iterations,
+            }
@@ -0,0 +1,155 @@
+"""Учет токенов и задержки вызовов LLM (включая попадания в кэш префикса промпта)"""
+
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+@dataclass
+class LLMCallUsage:
+    """Один вызов модели"""
+    model: str = ""
+    tier: str = ""
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+
+    @property
+    def uncached_prompt_tokens(self) -> int:
+        return self.prompt_tokens - self.cached_prompt_tokens
+
+
+@dataclass
+class UsageSummary:
+    """Сумма по нескольким вызовам модели"""
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    uncached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_latency: float = 0.0
+    # Разбивка по моделям и по уровням (SMALL/LARGE): вызовы, токены и задержка.
+    # По уровню считается и тогда, когда имя модели неизвестно (fake-модели)
+    by_model: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    by_tier: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    calls: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add(self, call: LLMCallUsage) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.cached_prompt_tokens += call.cached_prompt_tokens
+        self.uncached_prompt_tokens += call.uncached_prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.llm_latency += call.latency
+        values = {
+            "llm_calls": 1,
+            "prompt_tokens": call.prompt_tokens,
+            "cached_prompt_tokens": call.cached_prompt_tokens,
+            "completion_tokens": call.completion_tokens,
+            "llm_latency": call.latency,
+        }
+        self._add_to(self.by_model, call.model or "unknown", values)
+        self._add_to(self.by_tier, call.tier or "unknown", values)
+
+    def merge(self, other: "UsageSummary") -> None:
+        self.llm_calls += other.llm_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_prompt_tokens += other.cached_prompt_tokens
+        self.uncached_prompt_tokens += other.uncached_prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.llm_latency += other.llm_latency
+        for model, values in other.by_model.items():
+            self._add_to(self.by_model, model, values)
+        for tier, values in other.by_tier.items():
+            self._add_to(self.by_tier, tier, values)
+
+    @staticmethod
+    def _add_to(groups: Dict[str, Dict[str, float]], key: str, values: Dict[str, float]) -> None:
+        totals = groups.setdefault(key, {})
+        for key, value in values.items():
+            totals[key] = totals.get(key, 0) + value
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cached_prompt_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_dict(self, with_calls: bool = True) -> Dict[str, Any]:
+        data = asdict(self)
+        if not with_calls:
+            data.pop("calls")
+        data["llm_latency"] = round(self.llm_latency, 3)
+        for values in [*data["by_model"].values(), *data["by_tier"].values()]:
+            values["llm_latency"] = round(values["llm_latency"], 3)
+            values["avg_latency"] = round(values["llm_latency"] / values["llm_calls"], 3)
+        data["cache_hit_ratio"] = round(self.cache_hit_ratio, 3)
+        return data
+
+
+def usage_from_result(response: LLMResult) -> Optional[LLMCallUsage]:
+    """Достать токены из ответа: usage_metadata сообщения или token_usage провайдера"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                details = usage.get("input_token_details") or {}
+                return LLMCallUsage(
+                    prompt_tokens=usage.get("input_tokens", 0),
+                    cached_prompt_tokens=details.get("cache_read", 0) or 0,
+                    completion_tokens=usage.get("output_tokens", 0),
+                )
+
+    token_usage = (response.llm_output or {}).get("token_usage")
+    if token_usage:
+        details = token_usage.get("prompt_tokens_details") or {}
+        return LLMCallUsage(
+            prompt_tokens=token_usage.get("prompt_tokens", 0),
+            cached_prompt_tokens=details.get("cached_tokens", 0) or 0,
+            completion_tokens=token_usage.get("completion_tokens", 0),
+        )
+    return None
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Callback, который собирает токены и задержку каждого вызова модели за один запрос"""
+
+    def __init__(self):
+        self.summary = UsageSummary()
+        self._started: Dict[UUID, Tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model_name(kwargs: Dict[str, Any]) -> str:
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        return params.get("model") or params.get("model_name") or metadata.get("ls_model_name") or ""
+
+    @classmethod
+    def _start(cls, kwargs: Dict[str, Any]) -> Tuple[float, str, str]:
+        # Уровень проставляет ModelRouter в metadata запуска агента
+        tier = (kwargs.get("metadata") or {}).get("model_tier", "")
+        return time.perf_counter(), cls._model_name(kwargs), tier
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = self._start(kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = self._start(kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started, model, tier = self._started.pop(run_id, (None, "", ""))
+        call = usage_from_result(response) or LLMCallUsage()
+        call.model = model
+        call.tier = tier
+        call.latency = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            self.summary.add(call)
+            self.summary.calls.append({**asdict(call), "latency": round(call.latency, 3)})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
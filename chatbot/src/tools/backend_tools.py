@@ -3,6 +3,10 @@
 import requests
 from typing import Optional, Dict, Any, List
 import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -11,12 +15,248 @@ load_dotenv()
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 API_BASE = f"{BACKEND_URL}/api/v1"
 
+# Повторы создания бронирования при таймаутах (с тем же Idempotency-Key)
+BOOKING_RETRIES = int(os.getenv("BOOKING_RETRIES", "2"))
+
+# Формат результатов инструментов: compact (таблицы без повторяющихся подписей) или verbose
+TOOL_OUTPUT_FORMAT = os.getenv("TOOL_OUTPUT_FORMAT", "compact")
+# Максимальная длина описания тура в compact-формате
+DESCRIPTION_MAX_CHARS = int(os.getenv("DESCRIPTION_MAX_CHARS", "200"))
+
+# Сколько ответов (URL + параметры) с ETag хранить для условных GET; 0 - не кэшировать
+ETAG_CACHE_SIZE = int(os.getenv("ETAG_CACHE_SIZE", "256"))
+
 
 def get_headers() -> Dict[str, str]:
     """Получить заголовки для запросов"""
     return {"Content-Type": "application/json"}
 
 
+# (url, параметры) -> (ETag, разобранный JSON); LRU
+_etag_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_etag_lock = threading.Lock()
+_etag_stats = {"requests": 0, "not_modified": 0, "bytes_received": 0}
+
+
+def get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    GET с условным запросом: если ответ уже есть в кэше, отправляется If-None-Match,
+    и при 304 возвращается ранее разобранный JSON без повторной передачи и парсинга.
+    
+    Ошибки HTTP пробрасываются как requests.exceptions.HTTPError.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    headers = get_headers()
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    
+    response = requests.get(url, params=params, headers=headers, timeout=30)
+    with _etag_lock:
+        _etag_stats["requests"] += 1
+        _etag_stats["bytes_received"] += len(response.content)
+    
+    if response.status_code == 304 and cached is not None:
+        with _etag_lock:
+            _etag_stats["not_modified"] += 1
+            if key in _etag_cache:
+                _etag_cache.move_to_end(key)
+        return cached[1]
+    
+    response.raise_for_status()
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag and ETAG_CACHE_SIZE > 0:
+        with _etag_lock:
+            _etag_cache[key] = (etag, data)
+            _etag_cache.move_to_end(key)
+            while len(_etag_cache) > ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+    return data
+
+
+def get_etag_cache_stats() -> Dict[str, Any]:
+    """Статистика условных GET: сколько ответов пришло как 304 и сколько байт получено"""
+    with _etag_lock:
+        return {**_etag_stats, "cached_responses": len(_etag_cache)}
+
+
+_format_override = threading.local()
+
+
+@contextmanager
+def tool_output_format(output_format: str):
+    """Временно сменить формат результатов инструментов в текущем потоке"""
+    previous = getattr(_format_override, "value", None)
+    _format_override.value = output_format
+    try:
+        yield
+    finally:
+        _format_override.value = previous
+
+
+def _is_compact() -> bool:
+    output_format = getattr(_format_override, "value", None) or TOOL_OUTPUT_FORMAT
+    return output_format != "verbose"
+
+
+def _date(value: Optional[str]) -> str:
+    """Дата без времени: 2026-06-01T10:00:00 -> 2026-06-01"""
+    return (value or "")[:10]
+
+
+def _num(value: Any) -> str:
+    """Число без лишнего .0"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _truncate(text: Optional[str], limit: int) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _table(columns: List[str], rows: List[List[Any]]) -> str:
+    """Таблица с разделителем |: заголовок один раз, дальше только значения"""
+    lines = ["|".join(columns)]
+    for row in rows:
+        lines.append("|".join(str(v).replace("|", "/") for v in row))
+    return "\n".join(lines)
+
+
+def format_tours(data: Dict[str, Any]) -> str:
+    """Отформатировать ответ GET /tours/ для LLM"""
+    tours = data.get("tours", [])
+    if not tours:
+        return "Туры не найдены по заданным критериям."
+    
+    if _is_compact():
+        rows = [
+            [t.get("id"), t.get("title"), t.get("country"), t.get("city"), _num(t.get("price")),
+             t.get("duration_days"), _date(t.get("start_date")), t.get("available_slots")]
+            for t in tours
+        ]
+        header = f"туров: {data.get('total', len(tours))}, стр. {data.get('page', 1)}/{data.get('total_pages', 1)}, цена в $"
+        return header + "\n" + _table(["id", "название", "страна", "город", "цена", "дней", "начало", "мест"], rows)
+    
+    tours_list = []
+    for tour in tours:
+        tour_info = f"ID: {tour.get('id')}, Название: {tour.get('title')}, Страна: {tour.get('country')}, Город: {tour.get('city')}, Цена: ${tour.get('price')}, Длительность: {tour.get('duration_days')} дней"
+        tours_list.append(tour_info)
+    result_str = f"Найдено туров: {len(tours_list)}\n\n" + "\n".join(tours_list)
+    if data.get("total_pages", 1) > 1:
+        result_str += f"\n\nВсего страниц: {data.get('total_pages')}, Текущая страница: {data.get('page')}"
+    return result_str
+
+
+def format_tour_details(tour: Dict[str, Any]) -> str:
+    """Отформатировать ответ GET /tours/{id} для LLM"""
+    if _is_compact():
+        return (
+            f"тур {tour.get('id')}: {tour.get('title')} | {tour.get('country')}, {tour.get('city')}\n"
+            f"${_num(tour.get('price'))}/чел, {tour.get('duration_days')} дн, "
+            f"{_date(tour.get('start_date'))}..{_date(tour.get('end_date'))}, "
+            f"мест {tour.get('available_slots')}/{tour.get('max_people')}\n"
+            f"{_truncate(tour.get('description'), DESCRIPTION_MAX_CHARS)}"
+        )
+    
+    return f"""Детали тура:
+ID: {tour.get('id')}
+Название: {tour.get('title')}
+Страна: {tour.get('country')}
+Город: {tour.get('city')}
+Цена: ${tour.get('price')}
+Длительность: {tour.get('duration_days')} дней
+Максимум человек: {tour.get('max_people')}
+Доступных мест: {tour.get('available_slots')}
+Дата начала: {tour.get('start_date')}
+Дата окончания: {tour.get('end_date')}
+Описание: {tour.get('description', 'Нет описания')}"""
+
+
+def format_tours_comparison(data: Dict[str, Any]) -> str:
+    """Отформатировать ответ GET /tours/batch для сравнения туров"""
+    tours = data.get("tours", [])
+    missing = data.get("missing_ids", [])
+    missing_str = f"Не найдены туры с ID: {', '.join(map(str, missing))}" if missing else ""
+    if not tours:
+        return missing_str or "Туры не найдены."
+    
+    if _is_compact():
+        rows = [
+            [t.get("id"), t.get("title"), t.get("country"), t.get("city"), _num(t.get("price")),
+             t.get("duration_days"), _date(t.get("start_date")), _date(t.get("end_date")),
+             t.get("available_slots"), t.get("max_people")]
+            for t in tours
+        ]
+        result_str = f"сравнение {len(tours)} туров, цена в $/чел\n" + _table(
+            ["id", "название", "страна", "город", "цена", "дней", "начало", "конец", "мест", "макс"], rows
+        )
+    else:
+        tours_list = []
+        for tour in tours:
+            tour_info = f"ID: {tour.get('id')}, Название: {tour.get('title')}, Страна: {tour.get('country')}, Город: {tour.get('city')}, Цена: ${tour.get('price')}, Длительность: {tour.get('duration_days')} дней, Даты: {tour.get('start_date')} - {tour.get('end_date')}, Доступных мест: {tour.get('available_slots')} из {tour.get('max_people')}"
+            tours_list.append(tour_info)
+        result_str = f"Сравнение туров ({len(tours_list)}):\n\n" + "\n".join(tours_list)
+    
+    if missing_str:
+        result_str += f"\n\n{missing_str}"
+    return result_str
+
+
+def format_similar_tours(data: Dict[str, Any]) -> str:
+    """Отформатировать ответ GET /tours/{id}/similar для LLM"""
+    tours = data.get("tours", [])
+    if not tours:
+        return f"Похожие туры для тура {data.get('tour_id')} не найдены."
+    
+    if _is_compact():
+        rows = [
+            [t.get("id"), t.get("title"), t.get("country"), t.get("city"), _num(t.get("price")),
+             t.get("duration_days"), _date(t.get("start_date")), t.get("available_slots"), t.get("score")]
+            for t in tours
+        ]
+        header = f"похожие на тур {data.get('tour_id')}, лучшие сначала, сходство 0..1, цена в $"
+        return header + "\n" + _table(["id", "название", "страна", "город", "цена", "дней", "начало", "мест", "сходство"], rows)
+    
+    tours_list = []
+    for tour in tours:
+        tour_info = f"ID: {tour.get('id')}, Название: {tour.get('title')}, Страна: {tour.get('country')}, Город: {tour.get('city')}, Цена: ${tour.get('price')}, Длительность: {tour.get('duration_days')} дней, Дата начала: {tour.get('start_date')}, Доступных мест: {tour.get('available_slots')}, Сходство: {tour.get('score')}"
+        tours_list.append(tour_info)
+    return f"Похожие туры на тур {data.get('tour_id')} ({len(tours_list)}):\n\n" + "\n".join(tours_list)
+
+
+def format_user_bookings(data: Dict[str, Any], email: str) -> str:
+    """Отформатировать ответ GET /bookings/?email= для LLM"""
+    bookings = data.get("bookings", [])
+    if not bookings:
+        return f"Бронирования для email {email} не найдены."
+    
+    if _is_compact():
+        rows = [
+            [b.get("id"), b.get("tour_id"), (b.get("tour") or {}).get("title", "-"),
+             b.get("number_of_people"), _num(b.get("total_price")), b.get("status"),
+             _date(b.get("booking_date"))]
+            for b in bookings
+        ]
+        result_str = f"бронирований {email}: {len(bookings)}, сумма в $\n" + _table(
+            ["id", "тур_id", "тур", "чел", "сумма", "статус", "дата"], rows
+        )
+    else:
+        bookings_list = []
+        for booking in bookings:
+            tour = booking.get("tour") or {}
+            booking_info = f"ID: {booking.get('id')}, Тур ID: {booking.get('tour_id')}, Тур: {tour.get('title', '-')}, Клиент: {booking.get('customer_name')}, Количество человек: {booking.get('number_of_people')}, Стоимость: ${booking.get('total_price')}, Статус: {booking.get('status')}, Дата: {booking.get('booking_date')}"
+            bookings_list.append(booking_info)
+        result_str = f"Найдено бронирований: {len(bookings_list)}\n\n" + "\n".join(bookings_list)
+    
+    if data.get("next_cursor"):
+        result_str += f"\n\nЕсть еще бронирования, курсор следующей страницы: {data.get('next_cursor')}"
+    return result_str
+
+
 def get_tours(
     country: Optional[str] = None,
     min_price: Optional[float] = None,
@@ -24,7 +264,9 @@ def get_tours(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     page: int = 1,
-    page_size: int = 10
+    page_size: int = 10,
+    date_mode: Optional[str] = None,
+    within_days: Optional[int] = None
 ) -> str:
     """
     Получить список туров из бэкенда с фильтрацией.
@@ -37,6 +279,9 @@ def get_tours(
         end_date: Дата окончания (ISO format: YYYY-MM-DD)
         page: Номер страницы (по умолчанию: 1)
         page_size: Размер страницы (по умолчанию: 10)
+        date_mode: within (тур целиком в периоде), overlaps (идет в любой момент периода)
+            или starts_within (начинается в течение within_days дней от start_date или сегодня)
+        within_days: Длина окна в днях для starts_within
     
     Returns:
         Форматированная строка с информацией о турах
@@ -53,6 +298,10 @@ def get_tours(
             params["min_price"] = min_price
         if max_price is not None:
             params["max_price"] = max_price
+        if date_mode:
+            params["date_mode"] = date_mode
+        if within_days:
+            params["within_days"] = within_days
         if start_date:
             # Преобразуем в ISO format для API
             try:
@@ -76,34 +325,44 @@ def get_tours(
                 except:
                     pass
         
-        response = requests.get(
-            f"{API_BASE}/tours/",
-            params=params,
-            headers=get_headers(),
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        # Форматируем данные в читаемую строку для LLM
-        tours = data.get("tours", [])
-        if not tours:
-            result_str = "Туры не найдены по заданным критериям."
-        else:
-            tours_list = []
-            for tour in tours:
-                tour_info = f"ID: {tour.get('id')}, Название: {tour.get('title')}, Страна: {tour.get('country')}, Город: {tour.get('city')}, Цена: ${tour.get('price')}, Длительность: {tour.get('duration_days')} дней"
-                tours_list.append(tour_info)
-            result_str = f"Найдено туров: {len(tours_list)}\n\n" + "\n".join(tours_list)
-            if data.get("total_pages", 1) > 1:
-                result_str += f"\n\nВсего страниц: {data.get('total_pages')}, Текущая страница: {data.get('page')}"
+        data = get_json(f"{API_BASE}/tours/", params)
         
-        return result_str
+        # Форматируем данные в строку для LLM
+        return format_tours(data)
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code in (400, 422):
+            return f"Ошибка в параметрах поиска туров: {e.response.json().get('detail', str(e))}"
+        return f"Ошибка при получении туров: {str(e)}"
     except requests.exceptions.RequestException as e:
         error_msg = f"Ошибка при получении туров: {str(e)}"
         return error_msg
 
 
+def compare_tours(tour_ids: List[int]) -> str:
+    """
+    Получить несколько туров одним запросом для сравнения.
+    
+    Args:
+        tour_ids: Список ID туров (порядок сохраняется)
+    
+    Returns:
+        Форматированная строка с параметрами туров рядом друг с другом
+    """
+    if not tour_ids:
+        return "Укажите ID туров для сравнения"
+    try:
+        data = get_json(f"{API_BASE}/tours/batch", {"ids": ",".join(str(int(i)) for i in tour_ids)})
+        
+        # Форматируем данные в строку для LLM
+        return format_tours_comparison(data)
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 400:
+            return f"Ошибка сравнения туров: {e.response.json().get('detail', str(e))}"
+        return f"Ошибка при получении туров: {str(e)}"
+    except requests.exceptions.RequestException as e:
+        return f"Не удалось получить туры для сравнения: {str(e)}"
+
+
 def get_tour_details(tour_id: int) -> str:
     """
     Получить детальную информацию о туре по ID.
@@ -115,29 +374,10 @@ def get_tour_details(tour_id: int) -> str:
         Форматированная строка с детальной информацией о туре
     """
     try:
-        response = requests.get(
-            f"{API_BASE}/tours/{tour_id}",
-            headers=get_headers(),
-            timeout=30
-        )
-        response.raise_for_status()
-        tour = response.json()
+        tour = get_json(f"{API_BASE}/tours/{tour_id}")
         
-        # Форматируем данные в читаемую строку для LLM
-        result_str = f"""Детали тура:
-ID: {tour.get('id')}
-Название: {tour.get('title')}
-Страна: {tour.get('country')}
-Город: {tour.get('city')}
-Цена: ${tour.get('price')}
-Длительность: {tour.get('duration_days')} дней
-Максимум человек: {tour.get('max_people')}
-Доступных мест: {tour.get('available_slots')}
-Дата начала: {tour.get('start_date')}
-Дата окончания: {tour.get('end_date')}
-Описание: {tour.get('description', 'Нет описания')}"""
-        
-        return result_str
+        # Форматируем данные в строку для LLM
+        return format_tour_details(tour)
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 404:
             return f"Тур с ID {tour_id} не найден"
@@ -146,6 +386,32 @@ ID: {tour.get('id')}
         return f"Не удалось получить информацию о туре: {str(e)}"
 
 
+def get_similar_tours(tour_id: int, limit: int = 5) -> str:
+    """
+    Получить туры, похожие на заданный (страна, город, цена, длительность, даты, описание).
+    
+    Args:
+        tour_id: ID тура, для которого ищутся альтернативы
+        limit: Сколько туров вернуть (по умолчанию 5)
+    
+    Returns:
+        Форматированная строка с похожими турами, в которых есть свободные места
+    """
+    try:
+        data = get_json(f"{API_BASE}/tours/{tour_id}/similar", {"limit": limit})
+        
+        # Форматируем данные в строку для LLM
+        return format_similar_tours(data)
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 404:
+            return f"Тур с ID {tour_id} не найден"
+        if e.response.status_code == 503:
+            return "Подбор похожих туров временно недоступен, попробуйте позже или используйте get_tours"
+        return f"Ошибка при получении похожих туров: {str(e)}"
+    except requests.exceptions.RequestException as e:
+        return f"Не удалось получить похожие туры: {str(e)}"
+
+
 def create_booking(
     tour_id: int,
     customer_name: str,
@@ -180,12 +446,20 @@ def create_booking(
         if notes:
             payload["notes"] = notes
         
-        response = requests.post(
-            f"{API_BASE}/bookings/",
-            json=payload,
-            headers=get_headers(),
-            timeout=30
-        )
+        # Один ключ на все повторы: бэкенд вернет уже созданное бронирование
+        headers = {**get_headers(), "Idempotency-Key": str(uuid.uuid4())}
+        for attempt in range(BOOKING_RETRIES + 1):
+            try:
+                response = requests.post(
+                    f"{API_BASE}/bookings/",
+                    json=payload,
+                    headers=headers,
+                    timeout=30
+                )
+                break
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt == BOOKING_RETRIES:
+                    raise
         response.raise_for_status()
         booking = response.json()
         
@@ -211,12 +485,14 @@ Email: {booking.get('customer_email')}
         return f"Не удалось создать бронирование: {str(e)}"
 
 
-def get_booking_details(booking_id: int) -> str:
+def get_booking_details(booking_id: int, customer_email: Optional[str] = None) -> str:
     """
     Получить детали бронирования по ID.
     
     Args:
         booking_id: ID бронирования
+        customer_email: Email клиента; если указан и не совпадает с email
+            бронирования, ответ такой же, как для несуществующего ID
     
     Returns:
         Форматированная строка с деталями бронирования
@@ -229,6 +505,8 @@ def get_booking_details(booking_id: int) -> str:
         )
         response.raise_for_status()
         booking = response.json()
+        if customer_email and (booking.get("customer_email") or "").lower() != customer_email.strip().lower():
+            return f"Бронирование с ID {booking_id} не найдено"
         
         # Форматируем данные в читаемую строку для LLM
         result_str = f"""Детали бронирования:
@@ -252,37 +530,35 @@ Email: {booking.get('customer_email')}
         return f"Не удалось получить информацию о бронировании: {str(e)}"
 
 
-def get_user_bookings(email: str) -> str:
+def get_user_bookings(email: str, status: Optional[str] = None, cursor: Optional[str] = None) -> str:
     """
-    Получить все бронирования пользователя по email.
+    Получить бронирования пользователя по email (новые сначала, постранично).
     
     Args:
         email: Email пользователя
+        status: Фильтр по статусу: confirmed или cancelled (опционально)
+        cursor: Курсор следующей страницы из предыдущего ответа (опционально)
     
     Returns:
         Форматированная строка со списком бронирований пользователя
     """
     try:
+        params = {"email": email, "include_tour": "true"}
+        if status:
+            params["status"] = status
+        if cursor:
+            params["cursor"] = cursor
+        
         response = requests.get(
             f"{API_BASE}/bookings/",
-            params={"email": email},
+            params=params,
             headers=get_headers(),
             timeout=30
         )
         response.raise_for_status()
-        bookings = response.json()
-        
-        # Форматируем данные в читаемую строку для LLM
-        if not bookings:
-            return f"Бронирования для email {email} не найдены."
-        
-        bookings_list = []
-        for booking in bookings:
-            booking_info = f"ID: {booking.get('id')}, Тур ID: {booking.get('tour_id')}, Клиент: {booking.get('customer_name')}, Количество человек: {booking.get('number_of_people')}, Стоимость: ${booking.get('total_price')}, Статус: {booking.get('status')}, Дата: {booking.get('booking_date')}"
-            bookings_list.append(booking_info)
+        data = response.json()
         
-        result_str = f"Найдено бронирований: {len(bookings_list)}\n\n" + "\n".join(bookings_list)
-        return result_str
+        # Форматируем данные в строку для LLM
+        return format_user_bookings(data, email)
     except requests.exceptions.RequestException as e:
         return f"Не удалось получить бронирования: {str(e)}"
-
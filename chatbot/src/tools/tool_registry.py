@@ -2,11 +2,14 @@
 
 from langchain.tools import StructuredTool
 from typing import Optional
+import inspect
 try:
     # Попытка относительного импорта (когда запускается как модуль)
     from .backend_tools import (
         get_tours,
         get_tour_details,
+        compare_tours,
+        get_similar_tours,
         create_booking,
         get_booking_details,
         get_user_bookings
@@ -16,6 +19,8 @@ except ImportError:
     from backend_tools import (
         get_tours,
         get_tour_details,
+        compare_tours,
+        get_similar_tours,
         create_booking,
         get_booking_details,
         get_user_bookings
@@ -41,6 +46,11 @@ def create_tools():
             - end_date (str, optional): Дата окончания в формате YYYY-MM-DD
             - page (int): Номер страницы (по умолчанию: 1)
             - page_size (int): Количество результатов (по умолчанию: 10, максимум: 100)
+            - date_mode (str, optional): Как применять даты: within (по умолчанию, тур целиком
+              между start_date и end_date), overlaps (тур идет в любой момент периода, например
+              "во время моего отпуска"), starts_within (тур начинается в течение within_days
+              дней от start_date, по умолчанию от сегодня)
+            - within_days (int, optional): Число дней для starts_within ("в ближайшие 2 недели" = 14)
             
             Возвращает список туров с информацией: id, title, country, city, price, duration_days, description."""
         ),
@@ -56,6 +66,31 @@ def create_tools():
             
             Возвращает полную информацию о туре включая: описание, даты, доступные места, цену."""
         ),
+        StructuredTool.from_function(
+            func=compare_tours,
+            name="compare_tours",
+            description="""Сравнить несколько туров по ID одним запросом.
+            Используй когда пользователь хочет сравнить туры или нужны детали сразу нескольких туров
+            (вместо нескольких вызовов get_tour_details).
+            
+            Параметры:
+            - tour_ids (list[int]): Список ID туров (до 100)
+            
+            Возвращает для каждого тура: название, страну, город, цену, длительность, даты и свободные места."""
+        ),
+        StructuredTool.from_function(
+            func=get_similar_tours,
+            name="get_similar_tours",
+            description="""Найти туры, похожие на заданный (страна, город, цена, длительность, даты, описание).
+            Используй когда в туре нет мест, он не подходит по цене или датам,
+            или пользователь просит предложить альтернативы или "что-то похожее".
+            
+            Параметры:
+            - tour_id (int): ID тура, для которого нужны альтернативы
+            - limit (int, optional): Сколько туров вернуть (по умолчанию 5)
+            
+            Возвращает похожие туры со свободными местами, лучшие сначала, со степенью сходства от 0 до 1."""
+        ),
         StructuredTool.from_function(
             func=create_booking,
             name="create_booking",
@@ -80,6 +115,7 @@ def create_tools():
             
             Параметры:
             - booking_id (int): ID бронирования
+            - customer_email (str, optional): Email клиента; бронирование с другим email не показывается
             
             Возвращает полную информацию о бронировании."""
         ),
@@ -92,10 +128,16 @@ def create_tools():
             
             Параметры:
             - email (str): Email адрес пользователя
+            - status (str, optional): Фильтр по статусу: confirmed или cancelled
+            - cursor (str, optional): Курсор следующей страницы из предыдущего ответа
             
-            Возвращает список всех бронирований пользователя."""
+            Возвращает список бронирований пользователя (новые сначала) с названиями туров."""
         ),
     ]
     
+    # Убираем отступы из описаний: меньше токенов, текст одинаков при каждом запуске
+    for tool in tools:
+        tool.description = "\n".join(line.rstrip() for line in inspect.cleandoc(tool.description).splitlines())
+    
     return tools
 
@@ -0,0 +1,61 @@
+import pytest
+import requests
+
+from src.tools import backend_tools
+
+
+class Backend:
+    """Answer GETs like the API: 304 when If-None-Match has the current ETag."""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.body = b'{"id": 1, "available_slots": 5}'
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        response = requests.Response()
+        response.url = url
+        response.headers["ETag"] = self.etag
+        if (headers or {}).get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = self.body
+        return response
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = Backend()
+    monkeypatch.setattr(backend_tools.requests, "get", fake.get)
+    monkeypatch.setattr(backend_tools, "_etag_cache", type(backend_tools._etag_cache)())
+    return fake
+
+
+def test_not_modified_reuses_parsed_body(backend):
+    url = f"{backend_tools.API_BASE}/tours/1"
+    first = backend_tools.get_json(url)
+    second = backend_tools.get_json(url)
+
+    assert second is first
+    assert "If-None-Match" not in backend.requests[0]
+    assert backend.requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_changed_resource_is_refetched(backend):
+    url = f"{backend_tools.API_BASE}/tours/1"
+    backend_tools.get_json(url)
+    backend.etag, backend.body = '"v2"', b'{"id": 1, "available_slots": 4}'
+
+    assert backend_tools.get_json(url)["available_slots"] == 4
+    assert backend_tools.get_json(url)["available_slots"] == 4
+    assert backend.requests[2]["If-None-Match"] == '"v2"'
+
+
+def test_cache_is_keyed_by_params(backend):
+    url = f"{backend_tools.API_BASE}/tours/"
+    backend_tools.get_json(url, {"country": "Италия"})
+    backend_tools.get_json(url, {"country": "Франция"})
+    assert "If-None-Match" not in backend.requests[1]
@@ -0,0 +1,72 @@
+import pytest
+
+from src.agent import fast_router
+from src.agent.fast_router import FastPathRouter
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record tool calls instead of hitting the backend."""
+    recorded = []
+
+    def fake(name):
+        def tool(*args, **kwargs):
+            recorded.append((name, args, kwargs))
+            return f"{name} result"
+        return tool
+
+    for name in ("get_booking_details", "get_user_bookings", "get_tour_details"):
+        monkeypatch.setattr(fast_router.backend_tools, name, fake(name))
+    return recorded
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("тур 7", ("get_tour_details", (7,), {})),
+    ("tour 7 details", ("get_tour_details", (7,), {})),
+    ("Тур №12", ("get_tour_details", (12,), {})),
+    ("tour #3", ("get_tour_details", (3,), {})),
+    ("мои бронирования a@b.com", ("get_user_bookings", ("a@b.com",), {})),
+    ("бронирование 42 a@b.com", ("get_booking_details", (42,), {"customer_email": "a@b.com"})),
+    ("booking #42 for a@b.com", ("get_booking_details", (42,), {"customer_email": "a@b.com"})),
+])
+def test_routes_simple_queries(calls, query, expected):
+    result = FastPathRouter().route(query)
+    assert result is not None
+    assert calls == [expected]
+
+
+@pytest.mark.parametrize("query", [
+    # A number with a unit is a quantity, not an ID
+    "Тур 7 дней в Турции есть?",
+    "тур 10 ночей",
+    "тур 3-дневный",
+    "tour 5 days in Italy",
+    "бронь 2 места в Париж",
+    "бронь 4 человека",
+    "booking 2 people",
+    "заказ 3 взрослых",
+    # Booking by ID needs the customer's email
+    "статус бронирования 42",
+    "booking #42",
+    "бронь №5",
+    # Not a bare ID after the keyword
+    "тур на 7 дней",
+    "тур 72дня",
+])
+def test_does_not_route_ambiguous_queries(calls, query):
+    assert FastPathRouter().match(query) is None
+    assert calls == []
+
+
+def test_booking_details_hides_other_customers_booking(monkeypatch):
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"id": 2, "customer_email": "owner@example.com", "customer_name": "Owner"}
+
+    monkeypatch.setattr(fast_router.backend_tools.requests, "get", lambda *a, **k: Response())
+    details = fast_router.backend_tools.get_booking_details(2, customer_email="other@example.com")
+    assert details == "Бронирование с ID 2 не найдено"
+    assert "Owner" in fast_router.backend_tools.get_booking_details(2, customer_email="Owner@Example.com")
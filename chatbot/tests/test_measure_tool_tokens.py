@@ -0,0 +1,26 @@
+import measure_tool_tokens
+from src.agent.model_router import LARGE
+from src.tools import backend_tools
+
+
+class WordEncoding:
+    """Stand-in for tiktoken: the cl100k_base vocabulary needs network access."""
+
+    def encode(self, text):
+        return text.split()
+
+
+def test_replay_reports_prompt_tokens_per_turn(monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "false")
+    monkeypatch.setattr(backend_tools.requests, "get", measure_tool_tokens.recorded_get)
+    llms = {LARGE: measure_tool_tokens.ScriptedChatModel(encoding=WordEncoding())}
+
+    verbose = measure_tool_tokens.run_session("verbose", llms)
+    compact = measure_tool_tokens.run_session("compact", llms)
+
+    assert len(verbose) == len(compact) == len(measure_tool_tokens.QUERIES)
+    for verbose_turn, compact_turn in zip(verbose, compact):
+        # One tool call, then the answer
+        assert verbose_turn["llm_calls"] == compact_turn["llm_calls"] == 2
+        assert compact_turn["prompt_tokens"] < verbose_turn["prompt_tokens"]
+        assert verbose_turn["latency"] >= 0
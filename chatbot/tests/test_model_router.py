@@ -0,0 +1,112 @@
+import pytest
+import requests
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+from src.agent import model_router
+from src.agent.main_agent import MainAgent
+from src.agent.model_router import LARGE, SMALL, choose_tier
+from src.tools import backend_tools
+
+
+@pytest.mark.parametrize("query, history, steps, errors, expected", [
+    ("Туры в Италию", 0, 0, 0, SMALL),
+    ("Туры в Италию", 0, 1, 0, SMALL),
+    # Thresholds: the limit itself is still small, one past it is large
+    ("x" * model_router.ROUTER_MAX_QUERY_LENGTH, 0, 0, 0, SMALL),
+    ("x" * (model_router.ROUTER_MAX_QUERY_LENGTH + 1), 0, 0, 0, LARGE),
+    ("Туры в Италию", model_router.ROUTER_MAX_HISTORY_MESSAGES, 0, 0, SMALL),
+    ("Туры в Италию", model_router.ROUTER_MAX_HISTORY_MESSAGES + 1, 0, 0, LARGE),
+    ("Туры в Италию", 0, model_router.ROUTER_MAX_TOOL_STEPS - 1, 0, SMALL),
+    ("Туры в Италию", 0, model_router.ROUTER_MAX_TOOL_STEPS, 0, LARGE),
+    ("Туры в Италию", 0, 1, 1, LARGE),
+    # Queries that need reasoning or cost a lot when wrong
+    ("Забронируй тур на двоих", 0, 0, 0, LARGE),
+    ("Отмени мою бронь", 0, 0, 0, LARGE),
+    ("Сравни туры 1 и 2", 0, 0, 0, LARGE),
+    ("Please BOOK tour 3", 0, 0, 0, LARGE),
+    ("Что лучше посмотреть в Риме?", 0, 0, 0, LARGE),
+])
+def test_choose_tier(query, history, steps, errors, expected):
+    assert choose_tier(query, history, steps, errors) == expected
+
+
+def reply(content="", tool_calls=None, prompt_tokens=100):
+    return AIMessage(
+        content=content,
+        tool_calls=tool_calls or [],
+        usage_metadata={"input_tokens": prompt_tokens, "output_tokens": 10, "total_tokens": prompt_tokens + 10},
+    )
+
+
+def search_call(call_id="call_1"):
+    return {"name": "get_tours", "args": {"country": "Италия"}, "id": call_id}
+
+
+def make_agent(monkeypatch, small, large):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "false")
+    return MainAgent(llms={
+        SMALL: FakeMessagesListChatModel(responses=small),
+        LARGE: FakeMessagesListChatModel(responses=large),
+    })
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Answer tool HTTP calls locally; set .error to make them fail."""
+    class Backend:
+        error = None
+
+        def get_json(self, url, params=None):
+            if self.error:
+                raise self.error
+            return {"tours": [], "total": 0, "page": 1, "page_size": 10}
+
+    fake = Backend()
+    monkeypatch.setattr(backend_tools, "get_json", fake.get_json)
+    return fake
+
+
+def test_simple_turn_stays_on_small_model(monkeypatch, backend):
+    agent = make_agent(
+        monkeypatch,
+        small=[reply(tool_calls=[search_call()]), reply("Туров нет", prompt_tokens=150)],
+        large=[],
+    )
+    result = agent.process("Туры в Италию")
+    assert result["output"] == "Туров нет"
+
+    stats = agent.get_model_stats()
+    assert stats["steps"] == {SMALL: 2, LARGE: 0}
+    assert stats["small_share"] == 1.0
+    assert stats["by_tier"][SMALL]["llm_calls"] == 2
+    assert stats["by_tier"][SMALL]["prompt_tokens"] == 250
+    assert LARGE not in stats["by_tier"]
+
+
+def test_complex_query_goes_to_large_model(monkeypatch, backend):
+    agent = make_agent(monkeypatch, small=[], large=[reply("Уточните даты")])
+    assert agent.process("Забронируй тур в Италию")["output"] == "Уточните даты"
+
+    stats = agent.get_model_stats()
+    assert stats["steps"] == {SMALL: 0, LARGE: 1}
+    assert set(stats["by_tier"]) == {LARGE}
+
+
+def test_tool_error_escalates_to_large_model(monkeypatch, backend):
+    backend.error = requests.exceptions.ConnectionError("backend down")
+    agent = make_agent(
+        monkeypatch,
+        small=[reply(tool_calls=[search_call()], prompt_tokens=100)],
+        large=[reply("Сервис недоступен", prompt_tokens=300)],
+    )
+    result = agent.process("Туры в Италию")
+    assert result["output"] == "Сервис недоступен"
+
+    stats = agent.get_model_stats()
+    assert stats["steps"] == {SMALL: 1, LARGE: 1}
+    # Fake models have no name: by_model lumps them together, by_tier does not
+    assert stats["by_model"]["unknown"]["llm_calls"] == 2
+    assert stats["by_tier"][SMALL]["prompt_tokens"] == 100
+    assert stats["by_tier"][LARGE]["prompt_tokens"] == 300
+    assert result["usage"]["by_tier"][LARGE]["llm_calls"] == 1
@@ -0,0 +1,80 @@
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+from src.agent import fast_router
+from src.agent.main_agent import MainAgent
+from src.agent.model_router import LARGE
+from src.agent.tracing import Tracer
+from src.tools import backend_tools
+
+
+def reply(content="", tool_calls=None, prompt_tokens=100):
+    return AIMessage(
+        content=content,
+        tool_calls=tool_calls or [],
+        usage_metadata={"input_tokens": prompt_tokens, "output_tokens": 5, "total_tokens": prompt_tokens + 5},
+    )
+
+
+def test_agent_turn_has_llm_and_tool_spans(monkeypatch, tmp_path):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "false")
+    monkeypatch.setattr(
+        backend_tools, "get_json", lambda url, params=None: {"tours": [], "total": 0, "page": 1, "page_size": 10}
+    )
+    agent = MainAgent(llms={LARGE: FakeMessagesListChatModel(responses=[
+        reply(tool_calls=[{"name": "get_tours", "args": {"country": "Италия"}, "id": "call_1"}], prompt_tokens=100),
+        reply("Туров нет", prompt_tokens=140),
+    ])})
+    result = agent.process("Туры в Италию", session_id="traced")
+
+    [turn] = agent.get_session_traces("traced")
+    assert turn["trace_id"] == result["trace_id"]
+    assert turn["route"] == "agent"
+    assert (turn["llm_calls"], turn["tool_calls"]) == (2, 1)
+    assert turn["prompt_tokens"] == 240
+    assert turn["duration"] >= turn["llm_time"] + turn["tool_time"] - 0.001
+    assert turn["error"] is None
+
+    [stored] = agent.tracer.get_turns("traced")
+    assert [(span.kind, span.name) for span in stored.spans if span.kind == "tool"] == [("tool", "get_tours")]
+
+    path = tmp_path / "traces.jsonl"
+    assert agent.tracer.export_jsonl(str(path), session_id="traced") == 1
+    exported = json.loads(path.read_text(encoding="utf-8"))
+    assert exported["trace_id"] == result["trace_id"]
+    assert len(exported["spans"]) == 3
+
+
+def test_fast_path_turn_is_traced(monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    monkeypatch.setattr(fast_router.backend_tools, "get_tour_details", lambda tour_id: "Тур 7")
+    agent = MainAgent(llms={LARGE: FakeMessagesListChatModel(responses=[])})
+
+    agent.process("тур 7", session_id="fast")
+
+    [turn] = agent.get_session_traces("fast")
+    assert turn["route"] == "fast_path"
+    assert (turn["llm_calls"], turn["tool_calls"]) == (0, 1)
+    assert agent.tracer.summary()["turns"]["fast_path"]["count"] == 1
+
+
+def test_tracer_keeps_last_turns_per_session():
+    tracer = Tracer(export_path="", max_turns=2)
+    for i in range(3):
+        handler = tracer.start_turn("s", f"query {i}")
+        tracer.record_span(handler, "tool", "get_tours", 0.5)
+        tracer.finish_turn(handler, 1.0, "ответ")
+
+    turns = tracer.session_breakdown("s")
+    assert len(turns) == 2
+    assert turns[0]["tool_time"] == 0.5
+    assert turns[0]["other_time"] == 0.5
+    # The summary counts every turn, not only the kept ones
+    summary = tracer.summary()
+    assert summary["turns"]["agent"]["count"] == 3
+    assert summary["spans"] == [{
+        "kind": "tool", "name": "get_tours", "count": 3, "seconds": 1.5, "errors": 0, "retries": 0,
+        "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0,
+    }]
@@ -0,0 +1,72 @@
+from typing import Any, List
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.agent.main_agent import MainAgent
+from src.agent.model_router import LARGE
+from src.agent.usage import LLMCallUsage, UsageSummary, usage_from_result
+from src.prompts.system_prompts import SYSTEM_PROMPT
+
+
+def test_usage_from_message_metadata():
+    message = AIMessage(content="ok", usage_metadata={
+        "input_tokens": 1200, "output_tokens": 30, "total_tokens": 1230,
+        "input_token_details": {"cache_read": 1024},
+    })
+    usage = usage_from_result(LLMResult(generations=[[ChatGeneration(message=message)]]))
+    assert (usage.prompt_tokens, usage.cached_prompt_tokens, usage.completion_tokens) == (1200, 1024, 30)
+    assert usage.uncached_prompt_tokens == 176
+
+
+def test_usage_from_provider_token_usage():
+    result = LLMResult(generations=[[]], llm_output={"token_usage": {
+        "prompt_tokens": 2000, "completion_tokens": 50, "prompt_tokens_details": {"cached_tokens": 1536},
+    }})
+    usage = usage_from_result(result)
+    assert (usage.prompt_tokens, usage.cached_prompt_tokens, usage.completion_tokens) == (2000, 1536, 50)
+    assert usage_from_result(LLMResult(generations=[[]])) is None
+
+
+def test_summary_merge_and_cache_hit_ratio():
+    turn = UsageSummary()
+    turn.add(LLMCallUsage(model="m", tier=LARGE, prompt_tokens=1000, cached_prompt_tokens=0, latency=0.5))
+    turn.add(LLMCallUsage(model="m", tier=LARGE, prompt_tokens=1000, cached_prompt_tokens=800, latency=0.25))
+    total = UsageSummary()
+    total.merge(turn)
+    total.merge(turn)
+
+    data = total.to_dict(with_calls=False)
+    assert data["llm_calls"] == 4
+    assert data["uncached_prompt_tokens"] == 2400
+    assert data["cache_hit_ratio"] == 0.4
+    assert data["by_model"]["m"]["avg_latency"] == 0.375
+    assert data["by_tier"][LARGE]["cached_prompt_tokens"] == 1600
+    assert "calls" not in data
+
+
+class RecordingChatModel(FakeMessagesListChatModel):
+    """Fake model that keeps the prompt of every call."""
+
+    prompts: List[Any] = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append((list(messages), kwargs.get("tools")))
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def test_prompt_prefix_is_stable_across_turns(monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "false")
+    llm = RecordingChatModel(responses=[AIMessage(content="Первый ответ"), AIMessage(content="Второй ответ")])
+    agent = MainAgent(llms={LARGE: llm})
+
+    agent.process("Привет", session_id="prefix")
+    agent.process("Какие туры есть?", session_id="prefix")
+
+    (first, first_tools), (second, second_tools) = llm.prompts
+    assert first[0] == SystemMessage(content=SYSTEM_PROMPT)
+    # The second call starts with the whole first prompt: history is only appended
+    assert second[:len(first)] == first
+    assert second[len(first):] == [AIMessage(content="Первый ответ"), HumanMessage(content="Какие туры есть?")]
+    assert first_tools == second_tools
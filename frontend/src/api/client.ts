@@ -15,6 +15,7 @@ export interface ApiTour {
   end_date: string;
   created_at: string;
   updated_at: string;
+  version: number;
 }
 
 export interface ToursResponse {
@@ -25,6 +26,20 @@ export interface ToursResponse {
   total_pages: number;
 }
 
+export interface ToursBatchResponse {
+  tours: ApiTour[];
+  missing_ids: number[];
+}
+
+export interface SimilarTour extends ApiTour {
+  score: number;
+}
+
+export interface SimilarToursResponse {
+  tour_id: number;
+  tours: SimilarTour[];
+}
+
 export interface ToursFilters {
   page?: number;
   page_size?: number;
@@ -33,6 +48,8 @@ export interface ToursFilters {
   max_price?: number;
   start_date?: string;
   end_date?: string;
+  date_mode?: 'within' | 'overlaps' | 'starts_within';
+  within_days?: number;
 }
 
 export interface FilterOptions {
@@ -64,6 +81,55 @@ export interface BookingResponse {
   created_at: string;
 }
 
+export interface BookingTourSummary {
+  id: number;
+  title: string;
+  country: string;
+  city: string;
+  price: number;
+  start_date: string;
+  end_date: string;
+}
+
+export interface BookingHistoryItem extends BookingResponse {
+  tour: BookingTourSummary | null;
+}
+
+export interface BookingListResponse {
+  bookings: BookingHistoryItem[];
+  next_cursor: string | null;
+}
+
+export interface BookingsFilters {
+  status?: 'confirmed' | 'cancelled';
+  limit?: number;
+  cursor?: string;
+  include_tour?: boolean;
+}
+
+export interface HoldResponse {
+  id: number;
+  tour_id: number;
+  number_of_people: number;
+  status: 'active' | 'confirmed' | 'released' | 'expired';
+  expires_at: string;
+  booking_id: number | null;
+  created_at: string;
+}
+
+export interface ConfirmHoldRequest {
+  customer_name: string;
+  customer_email: string;
+  customer_phone: string;
+  notes?: string;
+}
+
+export interface TourUpdate {
+  tour_id: number;
+  available_slots?: number;
+  price?: number;
+}
+
 class ApiClient {
   private baseUrl: string;
 
@@ -98,6 +164,8 @@ class ApiClient {
     if (filters?.max_price) params.append('max_price', filters.max_price.toString());
     if (filters?.start_date) params.append('start_date', filters.start_date);
     if (filters?.end_date) params.append('end_date', filters.end_date);
+    if (filters?.date_mode) params.append('date_mode', filters.date_mode);
+    if (filters?.within_days) params.append('within_days', filters.within_days.toString());
 
     const queryString = params.toString();
     const endpoint = `/tours/${queryString ? `?${queryString}` : ''}`;
@@ -113,6 +181,14 @@ class ApiClient {
     return this.request<ApiTour>(`/tours/${id}`);
   }
 
+  async getToursByIds(ids: number[]): Promise<ToursBatchResponse> {
+    return this.request<ToursBatchResponse>(`/tours/batch?ids=${ids.join(',')}`);
+  }
+
+  async getSimilarTours(id: number, limit = 5): Promise<SimilarToursResponse> {
+    return this.request<SimilarToursResponse>(`/tours/${id}/similar?limit=${limit}`);
+  }
+
   async createBooking(data: CreateBookingRequest): Promise<BookingResponse> {
     return this.request<BookingResponse>('/bookings/', {
       method: 'POST',
@@ -120,12 +196,55 @@ class ApiClient {
     });
   }
 
+  async createHold(tourId: number, numberOfPeople: number): Promise<HoldResponse> {
+    return this.request<HoldResponse>('/holds/', {
+      method: 'POST',
+      body: JSON.stringify({ tour_id: tourId, number_of_people: numberOfPeople }),
+    });
+  }
+
+  async confirmHold(holdId: number, data: ConfirmHoldRequest): Promise<BookingResponse> {
+    return this.request<BookingResponse>(`/holds/${holdId}/confirm`, {
+      method: 'POST',
+      body: JSON.stringify(data),
+    });
+  }
+
+  async releaseHold(holdId: number): Promise<HoldResponse> {
+    return this.request<HoldResponse>(`/holds/${holdId}`, { method: 'DELETE' });
+  }
+
+  async cancelBooking(id: number): Promise<BookingResponse> {
+    return this.request<BookingResponse>(`/bookings/${id}/cancel`, { method: 'POST' });
+  }
+
   async getBookingById(id: number): Promise<BookingResponse> {
     return this.request<BookingResponse>(`/bookings/${id}`);
   }
 
-  async getBookingsByEmail(email: string): Promise<BookingResponse[]> {
-    return this.request<BookingResponse[]>(`/bookings/?email=${encodeURIComponent(email)}`);
+  async getBookingsByEmail(email: string, filters?: BookingsFilters): Promise<BookingListResponse> {
+    const params = new URLSearchParams({ email });
+
+    if (filters?.status) params.append('status', filters.status);
+    if (filters?.limit) params.append('limit', filters.limit.toString());
+    if (filters?.cursor) params.append('cursor', filters.cursor);
+    if (filters?.include_tour) params.append('include_tour', 'true');
+
+    return this.request<BookingListResponse>(`/bookings/?${params.toString()}`);
+  }
+
+  /**
+   * Subscribe to slot/price changes of tours via Server-Sent Events.
+   * Returns a function that closes the subscription.
+   */
+  subscribeToTourUpdates(ids: number[], onUpdate: (update: TourUpdate) => void): () => void {
+    const source = new EventSource(`${this.baseUrl}/tours/stream?ids=${ids.join(',')}`);
+    const handler = (event: MessageEvent) => onUpdate(JSON.parse(event.data) as TourUpdate);
+
+    source.addEventListener('snapshot', handler as EventListener);
+    source.addEventListener('update', handler as EventListener);
+
+    return () => source.close();
   }
 
   async checkHealth(): Promise<{ status: string; version: string }> {
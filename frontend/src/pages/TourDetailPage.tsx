@@ -31,6 +31,23 @@ const TourDetailPage = () => {
     fetchTour();
   }, [id]);
 
+  // Live slot/price updates instead of re-fetching the tour
+  useEffect(() => {
+    if (!id) return;
+
+    return api.subscribeToTourUpdates([parseInt(id)], (update) => {
+      setTour((current) =>
+        current && current.id === update.tour_id
+          ? {
+              ...current,
+              available_slots: update.available_slots ?? current.available_slots,
+              price: update.price ?? current.price,
+            }
+          : current
+      );
+    });
+  }, [id]);
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center">